@@ -5,13 +5,20 @@
 
 """LinkTree class for setting up trees of symbolic links."""
 
+import concurrent.futures
 import filecmp
 import os
 import shutil
 from typing import Callable, Dict, List, Optional, Tuple
 
 import llnl.util.tty as tty
-from llnl.util.filesystem import BaseDirectoryVisitor, mkdirp, touch, traverse_tree
+from llnl.util.filesystem import (
+    BaseDirectoryVisitor,
+    mkdirp,
+    touch,
+    traverse_tree,
+    visit_directory_tree,
+)
 from llnl.util.symlink import islink, symlink
 
 __all__ = ["LinkTree"]
@@ -296,6 +303,132 @@ def visit_symlinked_file(self, root: str, rel_path: str, depth: int) -> None:
         self.visit_file(root, rel_path, depth)
 
 
+#: Recorded visit of a directory tree, as a list of (kind, rel_path, depth) events, where kind is
+#: "d" for a directory that is recursed into, "f" for a file, "l" for a symlinked file, and "s"
+#: for a symlinked directory that is not recursed into.
+VisitEvents = List[Tuple[str, str, int]]
+
+
+class RecordingVisitor(BaseDirectoryVisitor):
+    """Forwards the visit of a directory tree to another visitor, and records it, so that the
+    visit can be replayed later with :func:`replay_visit` without walking the tree again."""
+
+    def __init__(self, visitor: BaseDirectoryVisitor):
+        self.visitor = visitor
+        self.events: VisitEvents = []
+
+    def visit_file(self, root: str, rel_path: str, depth: int) -> None:
+        self.events.append(("f", rel_path, depth))
+        self.visitor.visit_file(root, rel_path, depth)
+
+    def visit_symlinked_file(self, root: str, rel_path: str, depth: int) -> None:
+        self.events.append(("l", rel_path, depth))
+        self.visitor.visit_symlinked_file(root, rel_path, depth)
+
+    def before_visit_dir(self, root: str, rel_path: str, depth: int) -> bool:
+        self.events.append(("d", rel_path, depth))
+        return self.visitor.before_visit_dir(root, rel_path, depth)
+
+    def before_visit_symlinked_dir(self, root: str, rel_path: str, depth: int) -> bool:
+        # Whether the symlink is followed depends on its target, which is recorded as well, since
+        # the tree may not exist anymore when the visit is replayed.
+        event = len(self.events)
+        self.events.append(("s", rel_path, depth))
+        if not self.visitor.before_visit_symlinked_dir(root, rel_path, depth):
+            return False
+        self.events[event] = ("d", rel_path, depth)
+        return True
+
+
+def replay_visit(visitor: SourceMergeVisitor, root: str, events: VisitEvents) -> None:
+    """Replays on a merge visitor the visit of a tree recorded by a :class:`RecordingVisitor`"""
+    for kind, rel_path, depth in events:
+        if kind == "f":
+            visitor.visit_file(root, rel_path, depth)
+        elif kind == "l":
+            visitor.visit_symlinked_file(root, rel_path, depth)
+        elif kind == "d":
+            visitor.before_visit_dir(root, rel_path, depth)
+        else:
+            # Symlinked dirs that are not followed are handled as regular files
+            visitor.visit_file(root, rel_path, depth)
+
+
+class _TopLevelVisitor(RecordingVisitor):
+    """Records the top level entries of a tree, and the directories to be recursed into, without
+    recursing into them."""
+
+    def __init__(self, visitor: BaseDirectoryVisitor):
+        super().__init__(visitor)
+        self.subtrees: List[int] = []
+
+    def before_visit_dir(self, root: str, rel_path: str, depth: int) -> bool:
+        if super().before_visit_dir(root, rel_path, depth):
+            self.subtrees.append(len(self.events))
+        return False
+
+    def before_visit_symlinked_dir(self, root: str, rel_path: str, depth: int) -> bool:
+        if super().before_visit_symlinked_dir(root, rel_path, depth):
+            self.subtrees.append(len(self.events))
+        return False
+
+
+def _scan_top_level(root: str, ignore: Optional[Callable[[str], bool]]) -> _TopLevelVisitor:
+    visitor = _TopLevelVisitor(SourceMergeVisitor(ignore=ignore))
+    visit_directory_tree(root, visitor)
+    return visitor
+
+
+def _scan_subtree(
+    root: str, rel_path: str, depth: int, ignore: Optional[Callable[[str], bool]]
+) -> VisitEvents:
+    visitor = RecordingVisitor(SourceMergeVisitor(ignore=ignore))
+    visit_directory_tree(root, visitor, rel_path, depth)
+    return visitor.events
+
+
+def scan_source_trees(
+    roots: List[str], ignore: Optional[Callable[[str], bool]] = None, jobs: Optional[int] = None
+) -> List[VisitEvents]:
+    """Walks the given source trees concurrently, and records the visit of each of them as a
+    :class:`SourceMergeVisitor` would recurse into it.
+
+    The top level directories of every tree are walked in separate tasks of a thread pool, which
+    hides the latency of each ``scandir`` call on network filesystems. The visits can then be
+    replayed in order with :func:`replay_visit`, which gives the same result as visiting the trees
+    in order with ``visit_directory_tree``.
+
+    Parameters:
+        roots: source trees to walk
+        ignore: predicate on relative paths of files and directories to skip
+        jobs: number of threads; when not given, uses the default of ``ThreadPoolExecutor``
+    """
+    if not roots:
+        return []
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+        top_levels = list(executor.map(lambda root: _scan_top_level(root, ignore), roots))
+        subtrees = [
+            [
+                executor.submit(_scan_subtree, root, top.events[i - 1][1], 1, ignore)
+                for i in top.subtrees
+            ]
+            for root, top in zip(roots, top_levels)
+        ]
+
+        result = []
+        for top, futures in zip(top_levels, subtrees):
+            events: VisitEvents = []
+            start = 0
+            for i, future in zip(top.subtrees, futures):
+                events.extend(top.events[start:i])
+                events.extend(future.result())
+                start = i
+            events.extend(top.events[start:])
+            result.append(events)
+        return result
+
+
 class LinkTree:
     """Class to create trees of symbolic links from a source directory.
 
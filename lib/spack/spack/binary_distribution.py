@@ -5,6 +5,7 @@
 
 import codecs
 import collections
+import concurrent.futures
 import hashlib
 import io
 import itertools
@@ -20,9 +21,10 @@
 import urllib.error
 import urllib.parse
 import urllib.request
+import uuid
 import warnings
 from contextlib import closing
-from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple, Union
 from urllib.error import HTTPError, URLError
 
 import llnl.util.filesystem as fsys
@@ -31,6 +33,7 @@
 from llnl.util.filesystem import BaseDirectoryVisitor, mkdirp, visit_directory_tree
 from llnl.util.symlink import readlink
 
+import spack.binary_index
 import spack.caches
 import spack.cmd
 import spack.config as config
@@ -60,7 +63,7 @@
 import spack.util.web as web_util
 from spack.caches import misc_cache_location
 from spack.package_prefs import get_package_dir_permissions, get_package_group
-from spack.relocate_text import utf8_paths_to_single_binary_regex
+from spack.relocate_text import find_prefix_offsets, utf8_paths_to_single_binary_regex
 from spack.spec import Spec
 from spack.stage import Stage
 from spack.util.executable import which
@@ -68,6 +71,25 @@
 BUILD_CACHE_RELATIVE_PATH = "build_cache"
 BUILD_CACHE_KEYS_RELATIVE_PATH = "_pgp"
 
+#: Directory of the build cache storing the changes between consecutive indices, keyed by
+#: the hash of the index they apply to
+INDEX_DELTAS_RELATIVE_PATH = "index_deltas"
+
+#: Maximum number of index deltas applied in a row, before downloading the whole index
+MAX_INDEX_DELTAS = 16
+
+#: Deltas changing more than this fraction of the records of an index are not published
+MAX_INDEX_DELTA_RATIO = 0.5
+
+#: Directory of the build cache storing a copy of the spec files pushed since the index was
+#: last regenerated
+PUSH_LOG_RELATIVE_PATH = "push_log"
+
+#: Seconds an entry stays in the push log after it was pushed. Entries are removed only once
+#: they are this old and their spec is in the index, so that concurrent index updates, which
+#: may overwrite each other, add them again.
+PUSH_LOG_RETENTION = 3600
+
 #: The build cache layout version that this version of Spack creates.
 #: Version 2: includes parent directories of the package prefix in the tarball
 CURRENT_BUILD_CACHE_LAYOUT_VERSION = 2
@@ -87,6 +109,17 @@ def __init__(self, root):
         super().__init__(root, lock_cfg=spack_db.NO_LOCK)
         self._write_transaction_impl = llnl.util.lang.nullcontext
         self._read_transaction_impl = llnl.util.lang.nullcontext
+        self.binary_index: Optional[spack.binary_index.BinaryIndex] = None
+
+    def read_binary_index(self, index: spack.binary_index.BinaryIndex) -> None:
+        """Reads the records of a binary index. Records are materialized only when they
+        are accessed."""
+        if index.database_version != str(spack_db._DB_VERSION):
+            raise spack_db.InvalidDatabaseVersionError(
+                self, spack_db._DB_VERSION, index.database_version
+            )
+        self._set_lazy_index(index)
+        self.binary_index = index
 
 
 class FetchCacheError(Exception):
@@ -160,6 +193,14 @@ def __init__(self, cache_root: Optional[str] = None):
         #           use the updated source if available)
         self._mirrors_for_spec: Dict[str, dict] = {}
 
+        # maps the urls of mirrors whose index is in the binary format to a database
+        # reading their index lazily. Specs from these mirrors are added to
+        # _mirrors_for_spec only when they are looked up.
+        self._binary_index_dbs: Dict[str, BuildCacheDatabase] = {}
+
+        # DAG hashes already looked up in the databases of _binary_index_dbs
+        self._hashes_looked_up: Set[str] = set()
+
     def _init_local_index_cache(self):
         if not self._index_file_cache:
             self._index_file_cache = file_cache.FileCache(self._index_cache_root)
@@ -184,6 +225,8 @@ def clear(self):
         self._specs_already_associated = set()
         self._last_fetch_times = {}
         self._mirrors_for_spec = {}
+        self._binary_index_dbs = {}
+        self._hashes_looked_up = set()
 
     def _write_local_index_cache(self):
         self._init_local_index_cache()
@@ -201,13 +244,18 @@ def regenerate_spec_cache(self, clear_existing=False):
         if clear_existing:
             self._specs_already_associated = set()
             self._mirrors_for_spec = {}
+            self._binary_index_dbs = {}
+            self._hashes_looked_up = set()
 
         for mirror_url in self._local_index_cache:
             cache_entry = self._local_index_cache[mirror_url]
             cached_index_path = cache_entry["index_path"]
             cached_index_hash = cache_entry["index_hash"]
             if cached_index_hash not in self._specs_already_associated:
-                self._associate_built_specs_with_mirror(cached_index_path, mirror_url)
+                if cache_entry.get("index_format") == "binary":
+                    self._read_binary_index(cached_index_path, mirror_url)
+                else:
+                    self._associate_built_specs_with_mirror(cached_index_path, mirror_url)
                 self._specs_already_associated.add(cached_index_hash)
 
     def _associate_built_specs_with_mirror(self, cache_key, mirror_url):
@@ -228,32 +276,113 @@ def _associate_built_specs_with_mirror(self, cache_key, mirror_url):
                 )
                 return
 
-            spec_list = [
-                s
-                for s in db.query_local(installed=any, in_buildcache=any)
-                if s.external or db.query_local_by_spec_hash(s.dag_hash()).in_buildcache
-            ]
+            self._associate_db_with_mirror(db, mirror_url)
+        finally:
+            shutil.rmtree(tmpdir)
 
-            for indexed_spec in spec_list:
-                dag_hash = indexed_spec.dag_hash()
+    def _associate_db_with_mirror(self, db, mirror_url):
+        spec_list = [
+            s
+            for s in db.query_local(installed=any, in_buildcache=any)
+            if s.external or db.query_local_by_spec_hash(s.dag_hash()).in_buildcache
+        ]
+        self._associate_specs_with_mirror(spec_list, mirror_url)
 
-                if dag_hash not in self._mirrors_for_spec:
-                    self._mirrors_for_spec[dag_hash] = []
+    def _associate_specs_with_mirror(self, spec_list, mirror_url):
+        for indexed_spec in spec_list:
+            dag_hash = indexed_spec.dag_hash()
 
-                for entry in self._mirrors_for_spec[dag_hash]:
-                    # A binary mirror can only have one spec per DAG hash, so
-                    # if we already have an entry under this DAG hash for this
-                    # mirror url, we're done.
-                    if entry["mirror_url"] == mirror_url:
-                        break
-                else:
-                    self._mirrors_for_spec[dag_hash].append(
-                        {"mirror_url": mirror_url, "spec": indexed_spec}
-                    )
-        finally:
-            shutil.rmtree(tmpdir)
+            if dag_hash not in self._mirrors_for_spec:
+                self._mirrors_for_spec[dag_hash] = []
+
+            for entry in self._mirrors_for_spec[dag_hash]:
+                # A binary mirror can only have one spec per DAG hash, so
+                # if we already have an entry under this DAG hash for this
+                # mirror url, we're done.
+                if entry["mirror_url"] == mirror_url:
+                    break
+            else:
+                self._mirrors_for_spec[dag_hash].append(
+                    {"mirror_url": mirror_url, "spec": indexed_spec}
+                )
+
+    def _read_binary_index(self, cache_key, mirror_url):
+        """Reads a buildcache index in the binary format. Specs are associated with the
+        mirror only when they are looked up, or when all the built specs are requested."""
+        self._index_file_cache.init_entry(cache_key)
+        cache_path = self._index_file_cache.cache_path(cache_key)
+        with self._index_file_cache.read_transaction(cache_key):
+            index = spack.binary_index.BinaryIndex.from_file(cache_path)
+
+        if index is None:
+            tty.warn(
+                f"you need a newer Spack version to read the binary buildcache index for the "
+                f"following mirror: '{mirror_url}'"
+            )
+            return
+
+        # The database reads the index lazily, so it outlives this call: give it a directory
+        # of its own in the index cache, shared by all the indices of the same mirror
+        db_root = os.path.join(self._index_cache_root, "databases", compute_hash(mirror_url)[:10])
+        db = BuildCacheDatabase(db_root)
+        try:
+            db.read_binary_index(index)
+        except spack_db.InvalidDatabaseVersionError as e:
+            tty.warn(
+                f"you need a newer Spack version to read the buildcache index for the "
+                f"following mirror: '{mirror_url}'. {e.database_version_message}"
+            )
+            index.close()
+            return
+        self._binary_index_dbs[mirror_url] = db
+        self._hashes_looked_up = set()
+
+    def _look_up_in_binary_indices(self, hashes):
+        """Associates the specs with the given DAG hashes with the mirrors whose binary
+        index contains them. Only those specs, and their dependencies, are decoded."""
+        if not self._binary_index_dbs:
+            return
+
+        for dag_hash in hashes:
+            if dag_hash in self._hashes_looked_up:
+                continue
+            self._hashes_looked_up.add(dag_hash)
+            for mirror_url, db in self._binary_index_dbs.items():
+                record = db.query_local_by_spec_hash(dag_hash)
+                if record and (record.in_buildcache or record.spec.external):
+                    self._associate_specs_with_mirror([record.spec], mirror_url)
+
+    def _load_binary_indices(self):
+        """Associates all the specs in binary indices with their mirrors."""
+        for mirror_url, db in self._binary_index_dbs.items():
+            self._associate_db_with_mirror(db, mirror_url)
+        self._binary_index_dbs = {}
+        self._hashes_looked_up = set()
+
+    def find_built_specs(self, name=None, abstract_hash=None):
+        """Returns the built specs with a given name, and whose DAG hash starts with a given
+        prefix. Binary indices are narrowed down without decoding their records, so only
+        the matching specs are decoded.
+
+        Args:
+            name (str): name of the package, or None to match any name
+            abstract_hash (str): prefix of the DAG hash, or None to match any hash
+        """
+        for db in self._binary_index_dbs.values():
+            self._look_up_in_binary_indices(
+                db.binary_index.select(name=name, hash_prefix=abstract_hash, available=True)
+            )
+
+        return [
+            entries[0]["spec"]
+            for dag_hash, entries in self._mirrors_for_spec.items()
+            if entries
+            and (abstract_hash is None or dag_hash.startswith(abstract_hash))
+            and (name is None or entries[0]["spec"].name == name)
+        ]
 
     def get_all_built_specs(self):
+        self._load_binary_indices()
         spec_list = []
         for dag_hash in self._mirrors_for_spec:
             # in the absence of further information, all concrete specs
@@ -305,6 +434,7 @@ def find_by_hash(self, find_hash, mirrors_to_check=None):
             mirrors_to_check: Optional mapping containing mirrors to check.  If
                 None, just assumes all configured mirrors.
         """
+        self._look_up_in_binary_indices([find_hash])
         if find_hash not in self._mirrors_for_spec:
             return []
         results = self._mirrors_for_spec[find_hash]
@@ -467,12 +597,17 @@ def _fetch_and_cache_index(self, mirror_url, cache_entry={}):
         """Fetch a buildcache index file from a remote mirror and cache it.
 
         If we already have a cached index from this mirror, then we first
-        check if the hash has changed, and we avoid fetching it if not.
+        check if the hash has changed, and we avoid fetching it if not. If
+        it changed, we try to update our copy with the deltas published
+        since, before fetching the whole index.
+
+        If ``config:binary_index_format`` is ``binary``, the binary index is fetched
+        instead of ``index.json`` when the mirror has one that is up to date.
 
         Args:
             mirror_url (str): Base url of mirror
             cache_entry (dict): Old cache metadata with keys ``index_hash``, ``index_path``,
-                ``etag``
+                ``etag``, ``index_format``
 
         Returns:
             True if the local index.json was updated.
@@ -488,38 +623,72 @@ def _fetch_and_cache_index(self, mirror_url, cache_entry={}):
         ):
             return False
 
-        if scheme == "oci":
-            # TODO: Actually etag and OCI are not mutually exclusive...
-            fetcher = OCIIndexFetcher(mirror_url, cache_entry.get("index_hash", None))
-        elif cache_entry.get("etag"):
-            fetcher = EtagIndexFetcher(mirror_url, cache_entry["etag"])
-        else:
-            fetcher = DefaultIndexFetcher(
-                mirror_url, local_hash=cache_entry.get("index_hash", None)
-            )
+        result, index_format = None, "json"
+        if scheme != "oci" and spack.config.get("config:binary_index_format") == "binary":
+            local_hash = None
+            if cache_entry.get("index_format") == "binary":
+                local_hash = cache_entry.get("index_hash")
+            try:
+                result = BinaryIndexFetcher(mirror_url, local_hash).conditional_fetch()
+                index_format = "binary"
+            except FetchIndexError as e:
+                tty.debug(f"Using index.json for {mirror_url}: {e}")
 
-        result = fetcher.conditional_fetch()
+        def read_local_index():
+            # Deltas can be applied only to a local copy of index.json
+            if cache_entry.get("index_format", "json") != "json":
+                return None
+            try:
+                with self._index_file_cache.read_transaction(cache_entry["index_path"]) as f:
+                    return f.read()
+            except (OSError, KeyError, file_cache.CacheError) as e:
+                tty.debug(f"Cannot read the local copy of the index of {mirror_url}: {e}")
+                return None
+
+        if result is None:
+            if scheme == "oci":
+                # TODO: Actually etag and OCI are not mutually exclusive...
+                fetcher = OCIIndexFetcher(mirror_url, cache_entry.get("index_hash", None))
+            elif cache_entry.get("etag"):
+                fetcher = EtagIndexFetcher(
+                    mirror_url,
+                    cache_entry["etag"],
+                    local_hash=cache_entry.get("index_hash", None),
+                    read_local_index=read_local_index,
+                )
+            else:
+                fetcher = DefaultIndexFetcher(
+                    mirror_url,
+                    local_hash=cache_entry.get("index_hash", None),
+                    read_local_index=read_local_index,
+                )
+
+            result = fetcher.conditional_fetch()
 
         # Nothing to do
         if result.fresh:
             return False
 
-        # Persist new index.json
+        # Persist new index.json, or binary index
         url_hash = compute_hash(mirror_url)
-        cache_key = "{}_{}.json".format(url_hash[:10], result.hash[:10])
+        extension = "bin" if index_format == "binary" else "json"
+        cache_key = "{}_{}.{}".format(url_hash[:10], result.hash[:10], extension)
         self._index_file_cache.init_entry(cache_key)
-        with self._index_file_cache.write_transaction(cache_key) as (old, new):
+        with self._index_file_cache.write_transaction(
+            cache_key, binary=index_format == "binary"
+        ) as (old, new):
             new.write(result.data)
 
         self._local_index_cache[mirror_url] = {
             "index_hash": result.hash,
             "index_path": cache_key,
             "etag": result.etag,
+            "index_format": index_format,
         }
 
         # clean up the old cache_key if necessary
         old_cache_key = cache_entry.get("index_path", None)
-        if old_cache_key:
+        if old_cache_key and old_cache_key != cache_key:
             self._index_file_cache.remove(old_cache_key)
 
         # We fetched an index and updated the local index cache, we should
@@ -702,11 +871,22 @@ def hashes_to_prefixes(spec):
     }
 
 
-def get_buildinfo_dict(spec):
-    """Create metadata for a tarball"""
+def get_relocation_offsets(spec, binaries):
+    """Returns a mapping from the binaries of a spec, relative to its prefix, to the offsets
+    of all the occurrences in them of the prefixes that may be relocated."""
+    prefixes = [*hashes_to_prefixes(spec).values(), str(spack.store.STORE.layout.root)]
+    return {
+        rel_path: find_prefix_offsets(os.path.join(spec.prefix, rel_path), prefixes)
+        for rel_path in binaries
+    }
+
+
+def get_buildinfo_dict(spec, relocation_offsets: bool = False):
+    """Create metadata for a tarball. With ``relocation_offsets``, also record the offsets
+    of the prefixes in binaries, so that they do not need to be scanned at install time."""
     manifest = get_buildfile_manifest(spec)
 
-    return {
+    buildinfo = {
         "sbang_install_path": spack.hooks.sbang.sbang_install_path(),
         "buildpath": spack.store.STORE.layout.root,
         "spackprefix": spack.paths.prefix,
@@ -717,6 +897,11 @@ def get_buildinfo_dict(spec):
         "hardlinks_deduped": manifest["hardlinks_deduped"],
         "hash_to_prefix": hashes_to_prefixes(spec),
     }
+    if relocation_offsets:
+        buildinfo["relocate_offsets"] = get_relocation_offsets(
+            spec, manifest["binary_to_relocate"]
+        )
+    return buildinfo
 
 
 def tarball_directory_name(spec):
@@ -776,7 +961,9 @@ def sign_specfile(key, force, specfile_path):
     spack.util.gpg.sign(key, specfile_path, signed_specfile_path, clearsign=True)
 
 
-def _read_specs_and_push_index(file_list, read_method, cache_prefix, db, temp_dir, concurrency):
+def _read_specs_and_push_index(
+    file_list, read_method, cache_prefix, db, temp_dir, concurrency, previous_index=None
+):
     """Read all the specs listed in the provided list, using thread given thread parallelism,
         generate the index, and push it to the mirror.
 
@@ -786,8 +973,9 @@ def _read_specs_and_push_index(file_list, read_method, cache_prefix, db, temp_di
             and which reads the spec file at that location, and returns the spec.
         cache_prefix (str): prefix of the build cache on s3 where index should be pushed.
         db: A spack database used for adding specs and then writing the index.
-        temp_dir (str): Location to write index.json and hash for pushing
+        temp_dir (str): Location to write index.json, index.bin and hash for pushing
         concurrency (int): Number of parallel processes to use when fetching
+        previous_index (str): content of the index currently in the build cache, if any
     """
     for file in file_list:
         contents = read_method(file)
@@ -804,21 +992,31 @@ def _read_specs_and_push_index(file_list, read_method, cache_prefix, db, temp_di
         db.mark(fetched_spec, "in_buildcache", True)
 
     # Now generate the index, compute its hash, and push the two files to
-    # the mirror.
+    # the mirror. Records are sorted by DAG hash, so that the content of the
+    # index depends only on the specs in the mirror, and clients applying
+    # deltas to a previous index obtain exactly the same content.
+    stream = io.StringIO()
+    db._write_to_file(stream)
+    index_data = sjson.load(stream.getvalue())
+    database = index_data["database"]
+    database["installs"] = dict(sorted(database["installs"].items()))
+    index_string = sjson.dump(index_data)
+    index_hash = compute_hash(index_string)
+
     index_json_path = os.path.join(temp_dir, "index.json")
     with open(index_json_path, "w") as f:
-        db._write_to_file(f)
-
-    # Read the index back in and compute its hash
-    with open(index_json_path) as f:
-        index_string = f.read()
-        index_hash = compute_hash(index_string)
+        f.write(index_string)
 
     # Write the hash out to a local file
     index_hash_path = os.path.join(temp_dir, "index.json.hash")
     with open(index_hash_path, "w") as f:
         f.write(index_hash)
 
+    # Push the changes from the previous index before the index itself, so that
+    # clients can use them as soon as they see the new hash
+    if previous_index is not None:
+        _push_index_delta(cache_prefix, database, index_hash, previous_index, temp_dir)
+
     # Push the index itself
     web_util.push_to_url(
         index_json_path,
@@ -827,6 +1025,21 @@ def _read_specs_and_push_index(file_list, read_method, cache_prefix, db, temp_di
         extra_args={"ContentType": "application/json", "CacheControl": "no-cache"},
     )
 
+    # Push the binary index before the hash, so that clients seeing the new hash can find
+    # the corresponding binary index
+    index_bin_path = os.path.join(temp_dir, "index.bin")
+    with open(index_bin_path, "wb") as f:
+        spack.binary_index.write(
+            database["installs"], f, database_version=database["version"], index_hash=index_hash
+        )
+
+    web_util.push_to_url(
+        index_bin_path,
+        url_util.join(cache_prefix, "index.bin"),
+        keep_original=False,
+        extra_args={"ContentType": "application/octet-stream", "CacheControl": "no-cache"},
+    )
+
     # Push the hash
     web_util.push_to_url(
         index_hash_path,
@@ -836,6 +1049,69 @@ def _read_specs_and_push_index(file_list, read_method, cache_prefix, db, temp_di
     )
 
 
+def _read_remote_index(cache_prefix):
+    """Returns the content of the index.json currently in a build cache, or None if it
+    cannot be read."""
+    try:
+        _, _, response = web_util.read_from_url(url_util.join(cache_prefix, "index.json"))
+        return codecs.getreader("utf-8")(response).read()
+    except (URLError, web_util.SpackWebError, ValueError) as e:
+        tty.debug(f"Cannot read the index in {cache_prefix}: {e}")
+        return None
+
+
+def index_delta(old_installs, new_installs):
+    """Returns the install records that changed between two indices, keyed by DAG hash.
+    Records that were removed are mapped to None."""
+    delta = {key: None for key in old_installs if key not in new_installs}
+    for key, record in new_installs.items():
+        if old_installs.get(key) != record:
+            delta[key] = record
+    return delta
+
+
+def apply_index_delta(index_data, delta):
+    """Applies the install records in a delta to the content of an index."""
+    installs = index_data["database"]["installs"]
+    for key, record in delta.items():
+        if record is None:
+            installs.pop(key, None)
+        else:
+            installs[key] = record
+
+
+def _push_index_delta(cache_prefix, database, index_hash, previous_index, temp_dir):
+    """Pushes the changes between the index currently in a build cache and a new index,
+    keyed by the hash of the current index. Clients with a copy of the current index use
+    it to update their copy, instead of downloading the new index."""
+    previous_hash = compute_hash(previous_index)
+    if previous_hash == index_hash:
+        return
+
+    try:
+        previous_database = sjson.load(previous_index)["database"]
+        if previous_database["version"] != database["version"]:
+            return
+        delta = index_delta(previous_database["installs"], database["installs"])
+    except (ValueError, KeyError, TypeError) as e:
+        tty.debug(f"Cannot compute the changes to the index in {cache_prefix}: {e}")
+        return
+
+    if len(delta) > MAX_INDEX_DELTA_RATIO * max(len(database["installs"]), 1):
+        return
+
+    delta_path = os.path.join(temp_dir, "index_delta.json")
+    with open(delta_path, "w") as f:
+        sjson.dump({"from": previous_hash, "to": index_hash, "installs": delta}, f)
+
+    web_util.push_to_url(
+        delta_path,
+        url_util.join(cache_prefix, INDEX_DELTAS_RELATIVE_PATH, f"{previous_hash}.json"),
+        keep_original=False,
+        extra_args={"ContentType": "application/json"},
+    )
+
+
 def _specs_from_cache_aws_cli(cache_prefix):
     """Use aws cli to sync all the specs into a local temporary directory.
 
@@ -863,6 +1139,9 @@ def file_read_method(file_path):
         "*.spec.json.sig",
         "--include",
         "*.spec.json",
+        # The push log contains copies of spec files
+        "--exclude",
+        f"{PUSH_LOG_RELATIVE_PATH}/*",
         cache_prefix,
         tmpspecsdir,
     ]
@@ -881,6 +1160,18 @@ def file_read_method(file_path):
     return file_list, read_fn
 
 
+def _read_spec_file_from_url(url):
+    """Returns the content of the spec file at the given url, or None if it cannot be read."""
+    contents = None
+    try:
+        _, _, spec_file = web_util.read_from_url(url)
+        contents = codecs.getreader("utf-8")(spec_file).read()
+    except (URLError, web_util.SpackWebError) as url_err:
+        tty.error("Error reading specfile: {0}".format(url))
+        tty.error(url_err)
+    return contents
+
+
 def _specs_from_cache_fallback(cache_prefix):
     """Use spack.util.web module to get a list of all the specs at the remote url.
 
@@ -894,23 +1185,13 @@ def _specs_from_cache_fallback(cache_prefix):
     read_fn = None
     file_list = None
 
-    def url_read_method(url):
-        contents = None
-        try:
-            _, _, spec_file = web_util.read_from_url(url)
-            contents = codecs.getreader("utf-8")(spec_file).read()
-        except (URLError, web_util.SpackWebError) as url_err:
-            tty.error("Error reading specfile: {0}".format(url))
-            tty.error(url_err)
-        return contents
-
     try:
         file_list = [
             url_util.join(cache_prefix, entry)
             for entry in web_util.list_url(cache_prefix)
             if entry.endswith("spec.json") or entry.endswith("spec.json.sig")
         ]
-        read_fn = url_read_method
+        read_fn = _read_spec_file_from_url
     except Exception as err:
         # If we got some kind of S3 (access denied or other connection error), the first non
         # boto-specific class in the exception is Exception.  Just print a warning and return
@@ -946,25 +1227,100 @@ def _spec_files_from_cache(cache_prefix):
     raise ListMirrorSpecsError("Failed to get list of specs from {0}".format(cache_prefix))
 
 
-def generate_package_index(cache_prefix, concurrency=32):
+class PushLogEntry(NamedTuple):
+    #: Url of the copy of the spec file
+    url: str
+    #: Time the spec file was pushed, in seconds since the epoch
+    timestamp: int
+    #: DAG hash of the spec
+    dag_hash: str
+
+
+def push_log_entry_name(spec: Spec, signed: bool) -> str:
+    """Returns a new, unique name for the push log entry of a spec file, so that concurrent
+    pushes of the same spec do not overwrite each other's entries."""
+    extension = "spec.json.sig" if signed else "spec.json"
+    return f"{int(time.time())}-{uuid.uuid4().hex}-{spec.dag_hash()}.{extension}"
+
+
+def _push_log_from_cache(cache_prefix) -> List[PushLogEntry]:
+    """Returns the entries in the push log of a build cache. Each entry is a copy of a spec
+    file pushed since the index was last regenerated."""
+    push_log_url = url_util.join(cache_prefix, PUSH_LOG_RELATIVE_PATH)
+    try:
+        names = web_util.list_url(push_log_url) or []
+    except Exception as e:
+        tty.debug(f"Cannot list the push log in {cache_prefix}: {e}")
+        return []
+
+    entries = []
+    for name in names:
+        match = re.fullmatch(r"(\d+)-[0-9a-f]+-([a-z0-9]+)\.spec\.json(\.sig)?", name)
+        if match:
+            entries.append(
+                PushLogEntry(url_util.join(push_log_url, name), int(match[1]), match[2])
+            )
+    return entries
+
+
+def _compact_push_log(push_log: List[PushLogEntry], db) -> None:
+    """Removes the entries of the push log that are older than the retention period, and whose
+    spec is in the index that was just pushed."""
+    expired = time.time() - PUSH_LOG_RETENTION
+    for entry in push_log:
+        if entry.timestamp > expired or db.query_local_by_spec_hash(entry.dag_hash) is None:
+            continue
+        try:
+            web_util.remove_url(entry.url)
+        except Exception as e:
+            tty.debug(f"Cannot remove {entry.url} from the push log: {e}")
+
+
+def _read_previous_index(db, previous_index):
+    """Reads the content of the index currently in a build cache into a database. Returns
+    False if the index cannot be read."""
+    index_path = os.path.join(db.database_directory, "index.json")
+    with open(index_path, "w") as f:
+        f.write(previous_index)
+
+    try:
+        db._read_from_file(index_path)
+    except (spack_db.CorruptDatabaseError, spack_db.InvalidDatabaseVersionError) as e:
+        tty.debug(f"Cannot read the previous index: {e}")
+        return False
+    return True
+
+
+def generate_package_index(cache_prefix, concurrency=32, incremental=False):
     """Create or replace the build cache index on the given mirror.  The
     buildcache index contains an entry for each binary package under the
     cache_prefix.
 
+    In incremental mode, only the spec files in the push log of the build cache are read,
+    and merged into the existing index. The whole build cache is read if there is no index
+    yet, or if it cannot be read. Spec files removed from the build cache, or pushed without
+    writing a push log entry, are only taken into account when regenerating the index from
+    scratch.
+
+    Concurrent updates of the index may overwrite each other. Entries are kept in the push
+    log for ``PUSH_LOG_RETENTION`` seconds, so that the specs dropped by an overwritten update
+    are added again by the next one. In both modes, older entries whose spec is in the new
+    index are removed from the push log.
+
     Args:
         cache_prefix(str): Base url of binary mirror.
         concurrency: (int): The desired threading concurrency to use when
             fetching the spec files from the mirror.
+        incremental (bool): whether to merge the spec files pushed since the index was last
+            regenerated into the existing index, instead of reading all the spec files
 
     Return:
         None
     """
-    try:
-        file_list, read_fn = _spec_files_from_cache(cache_prefix)
-    except ListMirrorSpecsError as e:
-        raise GenerateIndexError(f"Unable to generate package index: {e}") from e
-
-    tty.debug(f"Retrieving spec descriptor files from {cache_prefix} to build index")
+    # List the push log first: spec files that are pushed while the index is regenerated are
+    # kept in the log for the next regeneration
+    push_log = _push_log_from_cache(cache_prefix)
+    previous_index = _read_remote_index(cache_prefix)
 
     tmpdir = tempfile.mkdtemp()
 
@@ -973,11 +1329,31 @@ def generate_package_index(cache_prefix, concurrency=32):
     db_root_dir = db.database_directory
 
     try:
-        _read_specs_and_push_index(file_list, read_fn, cache_prefix, db, db_root_dir, concurrency)
-    except Exception as e:
-        raise GenerateIndexError(
-            f"Encountered problem pushing package index to {cache_prefix}: {e}"
-        ) from e
+        if incremental and previous_index is not None and _read_previous_index(db, previous_index):
+            tty.debug(f"Merging {len(push_log)} spec files into the index of {cache_prefix}")
+            file_list, read_fn = [e.url for e in push_log], _read_spec_file_from_url
+        else:
+            try:
+                file_list, read_fn = _spec_files_from_cache(cache_prefix)
+            except ListMirrorSpecsError as e:
+                raise GenerateIndexError(f"Unable to generate package index: {e}") from e
+            tty.debug(f"Retrieving spec descriptor files from {cache_prefix} to build index")
+
+        try:
+            _read_specs_and_push_index(
+                file_list,
+                read_fn,
+                cache_prefix,
+                db,
+                db_root_dir,
+                concurrency,
+                previous_index=previous_index,
+            )
+        except Exception as e:
+            raise GenerateIndexError(
+                f"Encountered problem pushing package index to {cache_prefix}: {e}"
+            ) from e
+        _compact_push_log(push_log, db)
     finally:
         shutil.rmtree(tmpdir, ignore_errors=True)
 
@@ -1093,6 +1469,13 @@ class PushOptions(NamedTuple):
     #: What key to use for signing
     key: Optional[str] = None
 
+    #: Whether to record the offsets of prefixes in binaries, to speed up their relocation
+    relocation_offsets: bool = False
+
+    #: Whether to regenerate indices by adding the pushed specs to them, instead of reading
+    #: all the spec files in the buildcache
+    incremental_index: bool = False
+
 
 def push_or_raise(spec: Spec, out_url: str, options: PushOptions):
     """
@@ -1153,7 +1536,7 @@ def _build_tarball_in_stage_dir(spec: Spec, out_url: str, stage_dir: str, option
     binaries_dir = spec.prefix
 
     # create info for later relocation and create tar
-    buildinfo = get_buildinfo_dict(spec)
+    buildinfo = get_buildinfo_dict(spec, relocation_offsets=options.relocation_offsets)
 
     checksum, _ = _do_create_tarball(tarfile_path, binaries_dir, buildinfo)
 
@@ -1179,14 +1562,24 @@ def _build_tarball_in_stage_dir(spec: Spec, out_url: str, stage_dir: str, option
         key = select_signing_key(options.key)
         sign_specfile(key, options.force, specfile_path)
 
+    local_specfile = signed_specfile_path if not options.unsigned else specfile_path
+    remote_push_log_entry = url_util.join(
+        out_url,
+        os.path.relpath(cache_prefix, stage_dir),
+        PUSH_LOG_RELATIVE_PATH,
+        push_log_entry_name(spec, signed=not options.unsigned),
+    )
+
     try:
         # push tarball and signed spec json to remote mirror
         web_util.push_to_url(spackfile_path, remote_spackfile_path, keep_original=False)
         web_util.push_to_url(
-            signed_specfile_path if not options.unsigned else specfile_path,
+            local_specfile,
             remote_signed_specfile_path if not options.unsigned else remote_specfile_path,
-            keep_original=False,
+            keep_original=True,
         )
+        # record the spec file in the push log, so that the index can be updated incrementally
+        web_util.push_to_url(local_specfile, remote_push_log_entry, keep_original=False)
     except Exception as e:
         raise PushToBuildCacheError(
             f"Encountered problem pushing binary {remote_spackfile_path}: {e}"
@@ -1200,7 +1593,10 @@ def _build_tarball_in_stage_dir(spec: Spec, out_url: str, stage_dir: str, option
     # create an index.json for the build_cache directory so specs can be
     # found
     if options.regenerate_index:
-        generate_package_index(url_util.join(out_url, os.path.relpath(cache_prefix, stage_dir)))
+        generate_package_index(
+            url_util.join(out_url, os.path.relpath(cache_prefix, stage_dir)),
+            incremental=options.incremental_index,
+        )
 
 
 class NotInstalledError(spack.error.SpackError):
@@ -1679,11 +2075,17 @@ def is_backup_file(file):
         files_to_relocate = [
             os.path.join(workdir, filename) for filename in buildinfo.get("relocate_binaries")
         ]
+        # Offsets of the prefixes in binaries, recorded when the tarball was created. They
+        # remain valid only for binaries that are not rewritten by external tools.
+        offsets = {}
+        # Mach-O binaries whose load commands were rewritten, which need new signatures
+        rewritten_macho = []
+
         # If the buildcache was not created with relativized rpaths
         # do the relocation of path in binaries
         platform = spack.platforms.by_name(spec.platform)
         if "macho" in platform.binary_formats:
-            relocate.relocate_macho_binaries(
+            rewritten_macho = relocate.relocate_macho_binaries(
                 files_to_relocate,
                 old_layout_root,
                 new_layout_root,
@@ -1695,7 +2097,14 @@ def is_backup_file(file):
         elif "elf" in platform.binary_formats and not rel:
             # The new ELF dynamic section relocation logic only handles absolute to
             # absolute relocation.
-            relocate.new_relocate_elf_binaries(files_to_relocate, prefix_to_prefix_bin)
+            rewritten = set(
+                relocate.new_relocate_elf_binaries(files_to_relocate, prefix_to_prefix_bin)
+            )
+            offsets = {
+                os.path.join(workdir, filename): file_offsets
+                for filename, file_offsets in buildinfo.get("relocate_offsets", {}).items()
+                if os.path.join(workdir, filename) not in rewritten
+            }
         elif "elf" in platform.binary_formats and rel:
             relocate.relocate_elf_binaries(
                 files_to_relocate,
@@ -1716,14 +2125,16 @@ def is_backup_file(file):
         relocate.relocate_text(text_names, prefix_to_prefix_text)
 
         # relocate the install prefixes in binary files including dependencies
-        changed_files = relocate.relocate_text_bin(files_to_relocate, prefix_to_prefix_bin)
+        changed_files = relocate.relocate_text_bin(
+            files_to_relocate, prefix_to_prefix_bin, offsets=offsets
+        )
 
         # Add ad-hoc signatures to patched macho files when on macOS.
         if "macho" in platform.binary_formats and sys.platform == "darwin":
             codesign = which("codesign")
             if not codesign:
                 return
-            for binary in changed_files:
+            for binary in llnl.util.lang.dedupe(rewritten_macho + changed_files):
                 codesign("-fs-", binary)
 
     # If we are installing back to the same location
@@ -2020,58 +2431,86 @@ def install_single_spec(spec, unsigned=False, force=False):
         install_root_node(node, unsigned=unsigned, force=force)
 
 
+def _fetch_spec_from_mirror(spec, mirror_url):
+    """Fetches the spec file of a spec from a mirror, preferring the signed one. Returns the
+    concrete spec read from the file, or None if the mirror has no spec file for the spec.
+    """
+    specfile_name = tarball_name(spec, ".spec.json")
+    signed_specfile_name = tarball_name(spec, ".spec.json.sig")
+    buildcache_fetch_url_json = url_util.join(mirror_url, BUILD_CACHE_RELATIVE_PATH, specfile_name)
+    buildcache_fetch_url_signed_json = url_util.join(
+        mirror_url, BUILD_CACHE_RELATIVE_PATH, signed_specfile_name
+    )
+    try:
+        _, _, fs = web_util.read_from_url(buildcache_fetch_url_signed_json)
+        specfile_is_signed = True
+    except (URLError, web_util.SpackWebError, HTTPError) as url_err:
+        try:
+            _, _, fs = web_util.read_from_url(buildcache_fetch_url_json)
+            specfile_is_signed = False
+        except (URLError, web_util.SpackWebError, HTTPError) as url_err_x:
+            tty.debug(
+                "Did not find {0} on {1}".format(specfile_name, buildcache_fetch_url_signed_json),
+                url_err,
+                level=2,
+            )
+            tty.debug(
+                "Did not find {0} on {1}".format(specfile_name, buildcache_fetch_url_json),
+                url_err_x,
+                level=2,
+            )
+            return None
+    specfile_contents = codecs.getreader("utf-8")(fs).read()
+
+    # read the spec from the build cache file. All specs in build caches
+    # are concrete (as they are built) so we need to mark this spec
+    # concrete on read-in.
+    if specfile_is_signed:
+        specfile_json = Spec.extract_json_from_clearsig(specfile_contents)
+        fetched_spec = Spec.from_dict(specfile_json)
+    else:
+        fetched_spec = Spec.from_json(specfile_contents)
+    fetched_spec._mark_concrete()
+    return fetched_spec
+
+
 def try_direct_fetch(spec, mirrors=None):
     """
     Try to find the spec directly on the configured mirrors
     """
-    specfile_name = tarball_name(spec, ".spec.json")
-    signed_specfile_name = tarball_name(spec, ".spec.json.sig")
-    specfile_is_signed = False
-    found_specs = []
+    return try_direct_fetch_specs([spec], mirrors=mirrors)[spec.dag_hash()]
 
-    binary_mirrors = spack.mirror.MirrorCollection(mirrors=mirrors, binary=True).values()
 
-    for mirror in binary_mirrors:
-        buildcache_fetch_url_json = url_util.join(
-            mirror.fetch_url, BUILD_CACHE_RELATIVE_PATH, specfile_name
-        )
-        buildcache_fetch_url_signed_json = url_util.join(
-            mirror.fetch_url, BUILD_CACHE_RELATIVE_PATH, signed_specfile_name
-        )
-        try:
-            _, _, fs = web_util.read_from_url(buildcache_fetch_url_signed_json)
-            specfile_is_signed = True
-        except (URLError, web_util.SpackWebError, HTTPError) as url_err:
-            try:
-                _, _, fs = web_util.read_from_url(buildcache_fetch_url_json)
-            except (URLError, web_util.SpackWebError, HTTPError) as url_err_x:
-                tty.debug(
-                    "Did not find {0} on {1}".format(
-                        specfile_name, buildcache_fetch_url_signed_json
-                    ),
-                    url_err,
-                    level=2,
-                )
-                tty.debug(
-                    "Did not find {0} on {1}".format(specfile_name, buildcache_fetch_url_json),
-                    url_err_x,
-                    level=2,
-                )
-                continue
-        specfile_contents = codecs.getreader("utf-8")(fs).read()
+def try_direct_fetch_specs(specs, mirrors=None, jobs=None):
+    """Try to find many specs directly on the configured mirrors. All the mirrors are probed
+    for all the specs concurrently, with at most ``jobs`` requests in flight.
 
-        # read the spec from the build cache file. All specs in build caches
-        # are concrete (as they are built) so we need to mark this spec
-        # concrete on read-in.
-        if specfile_is_signed:
-            specfile_json = Spec.extract_json_from_clearsig(specfile_contents)
-            fetched_spec = Spec.from_dict(specfile_json)
-        else:
-            fetched_spec = Spec.from_json(specfile_contents)
-        fetched_spec._mark_concrete()
+    Args:
+        specs (list): concrete specs to look for
+        mirrors (dict): optionally override the configured mirrors
+        jobs (int): maximum number of concurrent requests, defaults to ``config:fetch_jobs``
 
-        found_specs.append({"mirror_url": mirror.fetch_url, "spec": fetched_spec})
+    Return:
+        A dictionary mapping the DAG hash of each spec to a list of objects, each containing
+        a ``mirror_url`` and ``spec`` key, in the order of the mirrors.
+    """
+    binary_mirrors = spack.mirror.MirrorCollection(mirrors=mirrors, binary=True).values()
+    specs = list(llnl.util.lang.dedupe(specs, key=lambda s: s.dag_hash()))
+    found_specs = {spec.dag_hash(): [] for spec in specs}
+    probes = [(spec, mirror.fetch_url) for spec in specs for mirror in binary_mirrors]
+    if not probes:
+        return found_specs
+
+    jobs = min(jobs or config.get("config:fetch_jobs", 16), len(probes))
+    if jobs < 2:
+        fetched_specs = [_fetch_spec_from_mirror(spec, url) for spec, url in probes]
+    else:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+            fetched_specs = list(executor.map(lambda p: _fetch_spec_from_mirror(*p), probes))
 
+    for (spec, mirror_url), fetched_spec in zip(probes, fetched_specs):
+        if fetched_spec is not None:
+            found_specs[spec.dag_hash()].append({"mirror_url": mirror_url, "spec": fetched_spec})
     return found_specs
 
 
@@ -2112,6 +2551,46 @@ def get_mirrors_for_spec(spec=None, mirrors_to_check=None, index_only=False):
     return results
 
 
+def get_mirrors_for_specs(specs, mirrors_to_check=None, index_only=False):
+    """Same as :func:`get_mirrors_for_spec`, for many specs at once. The specs that are not
+    in the local cache of the buildcache indices are looked for directly on all the mirrors
+    concurrently, and the ones that are found are added to the cache.
+
+    Args:
+        specs (list): concrete specs to look for in binary mirrors
+        mirrors_to_check (dict): Optionally override the configured mirrors
+            with the mirrors in this dictionary.
+        index_only (bool): When ``index_only`` is set to ``True``, only the local
+            cache is checked, no requests are made.
+
+    Return:
+        A dictionary mapping the DAG hash of each spec to a list of objects, each containing
+        a ``mirror_url`` and ``spec`` key indicating all mirrors where the spec can be found.
+    """
+    results = {spec.dag_hash(): [] for spec in specs}
+    if not specs or not spack.mirror.MirrorCollection(mirrors=mirrors_to_check, binary=True):
+        return results
+
+    missing = []
+    for spec in specs:
+        found = BINARY_INDEX.find_built_spec(spec, mirrors_to_check=mirrors_to_check)
+        if found:
+            results[spec.dag_hash()] = found
+        else:
+            missing.append(spec)
+
+    # The index may be out-of-date, so look for the missing specs where their files should be
+    if missing and not index_only:
+        fetched = try_direct_fetch_specs(missing, mirrors=mirrors_to_check)
+        for spec in missing:
+            found = fetched[spec.dag_hash()]
+            if found:
+                BINARY_INDEX.update_spec(spec, found)
+                results[spec.dag_hash()] = found
+
+    return results
+
+
 def update_cache_and_get_specs():
     """
     Get all concrete specs for build caches available on configured mirrors.
@@ -2397,20 +2876,26 @@ def __init__(self, all_architectures):
         """
         self.all_architectures = all_architectures
 
-        specs = update_cache_and_get_specs()
-
-        if not self.all_architectures:
-            arch = spack.spec.Spec.default_arch()
-            specs = [s for s in specs if s.satisfies(arch)]
-
-        self.possible_specs = specs
+        BINARY_INDEX.update()
 
-    def __call__(self, spec: Spec, **kwargs):
+    def __call__(self, spec: Union[Spec, str], **kwargs):
         """
         Args:
             spec: The spec being searched for
         """
-        return [s for s in self.possible_specs if s.satisfies(spec)]
+        if isinstance(spec, str):
+            spec = spack.spec.Spec(spec)
+
+        # Narrow down the candidates by name and hash, so that specs in binary indices are
+        # decoded only if they can match
+        name = spec.name if spec.name and not spec.virtual else None
+        specs = BINARY_INDEX.find_built_specs(name=name, abstract_hash=spec.abstract_hash)
+
+        if not self.all_architectures:
+            arch = spack.spec.Spec.default_arch()
+            specs = [s for s in specs if s.satisfies(arch)]
+
+        return [s for s in specs if s.satisfies(spec)]
 
 
 class FetchIndexError(Exception):
@@ -2428,13 +2913,72 @@ class BuildcacheIndexError(spack.error.SpackError):
 FetchIndexResult = collections.namedtuple("FetchIndexResult", "etag hash data fresh")
 
 
+def _fetch_index_from_deltas(url, local_hash, remote_hash, read_local_index, urlopen):
+    """Returns the content of the remote index, obtained by applying the chain of deltas
+    from the local index to the remote one, or None if the chain is not available.
+
+    Args:
+        url (str): base url of the mirror
+        local_hash (str): hash of the local copy of the index
+        remote_hash (str): hash of the remote index
+        read_local_index: function returning the content of the local copy of the index,
+            or None if it cannot be read
+        urlopen: function used to open urls
+    """
+    headers = {"User-Agent": web_util.SPACK_USER_AGENT}
+    index_data, current_hash = None, local_hash
+    for _ in range(MAX_INDEX_DELTAS):
+        url_delta = url_util.join(
+            url, BUILD_CACHE_RELATIVE_PATH, INDEX_DELTAS_RELATIVE_PATH, f"{current_hash}.json"
+        )
+        try:
+            response = urlopen(urllib.request.Request(url_delta, headers=headers))
+            delta = sjson.load(codecs.getreader("utf-8")(response).read())
+        except (urllib.error.URLError, ValueError) as e:
+            tty.debug(f"Cannot fetch the index delta {url_delta}: {e}")
+            return None
+
+        if delta.get("from") != current_hash or not isinstance(delta.get("installs"), dict):
+            return None
+
+        if index_data is None:
+            local_index = read_local_index()
+            if local_index is None:
+                return None
+            try:
+                index_data = sjson.load(local_index)
+            except ValueError:
+                return None
+
+        apply_index_delta(index_data, delta["installs"])
+        current_hash = delta.get("to")
+        if current_hash == remote_hash:
+            break
+    else:
+        return None
+
+    installs = index_data["database"]["installs"]
+    index_data["database"]["installs"] = dict(sorted(installs.items()))
+    result = sjson.dump(index_data)
+
+    # Deltas are applied only if they result in exactly the remote index
+    if compute_hash(result) != remote_hash:
+        tty.debug(f"Index deltas in {url} don't result in the remote index")
+        return None
+    return result
+
+
 class DefaultIndexFetcher:
-    """Fetcher for index.json, using separate index.json.hash as cache invalidation strategy"""
+    """Fetcher for index.json, using separate index.json.hash as cache invalidation strategy.
 
-    def __init__(self, url, local_hash, urlopen=web_util.urlopen):
+    If the function reading the local copy of the index is given, and the index changed,
+    the fetcher first tries to update the local copy with the deltas published since."""
+
+    def __init__(self, url, local_hash, urlopen=web_util.urlopen, read_local_index=None):
         self.url = url
         self.local_hash = local_hash
         self.urlopen = urlopen
+        self.read_local_index = read_local_index
         self.headers = {"User-Agent": web_util.SPACK_USER_AGENT}
 
     def get_remote_hash(self):
@@ -2455,9 +2999,20 @@ def conditional_fetch(self) -> FetchIndexResult:
         # Do an intermediate fetch for the hash
         # and a conditional fetch for the contents
 
-        # Early exit if our cache is up to date.
-        if self.local_hash and self.local_hash == self.get_remote_hash():
-            return FetchIndexResult(etag=None, hash=None, data=None, fresh=True)
+        if self.local_hash:
+            remote_hash = self.get_remote_hash()
+
+            # Early exit if our cache is up to date.
+            if self.local_hash == remote_hash:
+                return FetchIndexResult(etag=None, hash=None, data=None, fresh=True)
+
+            # Then try to apply the changes since our copy of the index
+            if remote_hash and self.read_local_index:
+                result = _fetch_index_from_deltas(
+                    self.url, self.local_hash, remote_hash, self.read_local_index, self.urlopen
+                )
+                if result is not None:
+                    return FetchIndexResult(etag=None, hash=remote_hash, data=result, fresh=False)
 
         # Otherwise, download index.json
         url_index = url_util.join(self.url, BUILD_CACHE_RELATIVE_PATH, "index.json")
@@ -2495,15 +3050,37 @@ def conditional_fetch(self) -> FetchIndexResult:
 
 
 class EtagIndexFetcher:
-    """Fetcher for index.json, using ETags headers as cache invalidation strategy"""
+    """Fetcher for index.json, using ETags headers as cache invalidation strategy.
 
-    def __init__(self, url, etag, urlopen=web_util.urlopen):
+    If the hash and the function reading the local copy of the index are given, the
+    fetcher first tries to update the local copy with the deltas published since."""
+
+    def __init__(
+        self, url, etag, urlopen=web_util.urlopen, local_hash=None, read_local_index=None
+    ):
         self.url = url
         self.etag = etag
         self.urlopen = urlopen
+        self.local_hash = local_hash
+        self.read_local_index = read_local_index
 
     def conditional_fetch(self) -> FetchIndexResult:
-        # Just do a conditional fetch immediately
+        if self.local_hash and self.read_local_index:
+            remote_hash = DefaultIndexFetcher(
+                self.url, None, urlopen=self.urlopen
+            ).get_remote_hash()
+            if remote_hash == self.local_hash:
+                return FetchIndexResult(etag=None, hash=None, data=None, fresh=True)
+            if remote_hash:
+                result = _fetch_index_from_deltas(
+                    self.url, self.local_hash, remote_hash, self.read_local_index, self.urlopen
+                )
+                if result is not None:
+                    # The etag of the remote index is not known, so the next fetch will
+                    # use the hash of the index
+                    return FetchIndexResult(etag=None, hash=remote_hash, data=result, fresh=False)
+
+        # Otherwise do a conditional fetch
         url = url_util.join(self.url, BUILD_CACHE_RELATIVE_PATH, "index.json")
         headers = {
             "User-Agent": web_util.SPACK_USER_AGENT,
@@ -2535,6 +3112,45 @@ def conditional_fetch(self) -> FetchIndexResult:
         )
 
 
+class BinaryIndexFetcher:
+    """Fetcher for index.bin, the binary index stored next to index.json. The binary index
+    is used only if it was generated from the current index.json, whose hash is used as
+    cache invalidation strategy."""
+
+    def __init__(self, url, local_hash, urlopen=web_util.urlopen):
+        self.url = url
+        self.local_hash = local_hash
+        self.urlopen = urlopen
+        self.headers = {"User-Agent": web_util.SPACK_USER_AGENT}
+
+    def conditional_fetch(self) -> FetchIndexResult:
+        remote_hash = DefaultIndexFetcher(self.url, None, urlopen=self.urlopen).get_remote_hash()
+        if remote_hash is None:
+            raise FetchIndexError("Could not fetch the hash of the remote index")
+
+        # Early exit if our cache is up to date.
+        if self.local_hash == remote_hash:
+            return FetchIndexResult(etag=None, hash=None, data=None, fresh=True)
+
+        url_index = url_util.join(self.url, BUILD_CACHE_RELATIVE_PATH, "index.bin")
+        try:
+            response = self.urlopen(urllib.request.Request(url_index, headers=self.headers))
+            result = response.read()
+        except urllib.error.URLError as e:
+            raise FetchIndexError("Could not fetch index from {}".format(url_index), e) from e
+
+        index = spack.binary_index.BinaryIndex.from_buffer(result)
+        if index is None or index.database_version != str(spack_db._DB_VERSION):
+            raise FetchIndexError("Remote index {} cannot be read".format(url_index))
+
+        # The binary index may be left behind when index.json is regenerated by a version
+        # of Spack that does not write it.
+        if index.index_hash != remote_hash:
+            raise FetchIndexError("Remote index {} is out of date".format(url_index))
+
+        return FetchIndexResult(etag=None, hash=remote_hash, data=result, fresh=False)
+
+
 class OCIIndexFetcher:
     def __init__(self, url: str, local_hash, urlopen=None) -> None:
         self.local_hash = local_hash
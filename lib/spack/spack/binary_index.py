@@ -0,0 +1,396 @@
+# Copyright 2013-2024 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+"""Binary, columnar format for buildcache indexes.
+
+A binary index stores the same install records as the ``index.json`` file of a buildcache,
+but lays them out so that clients can look up records without decoding the whole index:
+
+* install records are sorted by DAG hash, and hashes are stored in a fixed width column,
+  so that a record can be found by binary search
+* package names and flags are stored in separate columns, so that records can be
+  selected without decoding them
+* each install record is compressed on its own, using a dictionary shared by all the
+  records, and can be decoded independently of the others
+
+The file starts with a fixed size header, followed by a table with the offset and length
+of each section. All integers are little-endian.
+"""
+import array
+import bisect
+import collections.abc
+import json
+import mmap
+import os
+import struct
+import sys
+import zlib
+from typing import IO, Any, Dict, List, Optional, Tuple, Union
+
+import spack.lazy_index
+import spack.util.spack_json as sjson
+
+#: Magic bytes at the beginning of a binary index
+MAGIC = b"SPACKIDX"
+
+#: Version of the binary index format
+FORMAT_VERSION = 1
+
+#: Length of the DAG hashes stored in the index
+HASH_LENGTH = 32
+
+#: Maximum size of the dictionary used to compress records
+MAX_DICTIONARY_SIZE = 32 * 1024
+
+#: Flag set for records whose spec is in the buildcache
+IN_BUILDCACHE = 1
+
+#: Flag set for records whose spec is external
+EXTERNAL = 2
+
+#: Magic bytes, format version, number of records and number of strings
+_HEADER = struct.Struct("<8sIII")
+
+#: Sections of a binary index, in the order they are stored
+_SECTIONS = (
+    "metadata",
+    "hashes",
+    "names",
+    "flags",
+    "string_offsets",
+    "strings",
+    "record_offsets",
+    "dictionary",
+    "records",
+)
+
+#: Offset and length of each section
+_SECTION_TABLE = struct.Struct(f"<{2 * len(_SECTIONS)}Q")
+
+
+def _to_bytes(typecode: str, values: List[int]) -> bytes:
+    column = array.array(typecode, values)
+    if sys.byteorder == "big":
+        column.byteswap()
+    return column.tobytes()
+
+
+def _from_bytes(typecode: str, data: bytes) -> array.array:
+    column = array.array(typecode)
+    column.frombytes(data)
+    if sys.byteorder == "big":
+        column.byteswap()
+    return column
+
+
+def write(
+    installs: Dict[str, Dict[str, Any]],
+    stream: IO[bytes],
+    *,
+    database_version: str,
+    index_hash: Optional[str] = None,
+) -> None:
+    """Writes install records in the binary index format.
+
+    Args:
+        installs: install records, keyed by DAG hash, as stored in ``index.json``
+        stream: binary stream where the index is written
+        database_version: version of the database format of the install records
+        index_hash: hash of the ``index.json`` file the records come from, if any
+    """
+    keys = sorted(installs)
+    strings: Dict[str, int] = {}
+
+    def string_id(value: str) -> int:
+        return strings.setdefault(value, len(strings))
+
+    names, flags, payloads = [], [], []
+    for key in keys:
+        if len(key) != HASH_LENGTH or len(key.encode("utf-8")) != HASH_LENGTH:
+            raise ValueError(f"invalid DAG hash in install records: '{key}'")
+        record = installs[key]
+        node = record["spec"]
+        names.append(string_id(node["name"]))
+        flags.append(
+            (IN_BUILDCACHE if record.get("in_buildcache") else 0)
+            | (EXTERNAL if node.get("external") else 0)
+        )
+        payloads.append(json.dumps(record, separators=(",", ":")).encode("utf-8"))
+
+    # Sample records evenly, so that the dictionary contains the strings that are common
+    # to most of them, e.g. compilers, architectures and build dependencies
+    dictionary = b""
+    stride = max(1, len(payloads) * 1024 // MAX_DICTIONARY_SIZE)
+    for payload in payloads[::stride]:
+        if len(dictionary) + len(payload) > MAX_DICTIONARY_SIZE:
+            break
+        dictionary += payload
+
+    records, record_offsets = [], [0]
+    for payload in payloads:
+        compressor = zlib.compressobj(9, zdict=dictionary) if dictionary else zlib.compressobj(9)
+        compressed = compressor.compress(payload) + compressor.flush()
+        records.append(compressed)
+        record_offsets.append(record_offsets[-1] + len(compressed))
+
+    encoded_strings = [x.encode("utf-8") for x in strings]
+    string_offsets = [0]
+    for value in encoded_strings:
+        string_offsets.append(string_offsets[-1] + len(value))
+
+    metadata = {"database_version": database_version, "index_hash": index_hash}
+    sections = {
+        "metadata": json.dumps(metadata).encode("utf-8"),
+        "hashes": "".join(keys).encode("ascii"),
+        "names": _to_bytes("I", names),
+        "flags": bytes(flags),
+        "string_offsets": _to_bytes("Q", string_offsets),
+        "strings": b"".join(encoded_strings),
+        "record_offsets": _to_bytes("Q", record_offsets),
+        "dictionary": dictionary,
+        "records": b"".join(records),
+    }
+
+    table: List[int] = []
+    offset = _HEADER.size + _SECTION_TABLE.size
+    for name in _SECTIONS:
+        table.extend((offset, len(sections[name])))
+        offset += len(sections[name])
+
+    stream.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(keys), len(strings)))
+    stream.write(_SECTION_TABLE.pack(*table))
+    for name in _SECTIONS:
+        stream.write(sections[name])
+
+
+class _HashColumn(collections.abc.Sequence):
+    """Read-only view of the column of DAG hashes, which supports binary search."""
+
+    def __init__(self, buffer: Union[bytes, mmap.mmap], offset: int, length: int) -> None:
+        self.buffer = buffer
+        self.offset = offset
+        self.length = length
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, i):
+        if not 0 <= i < self.length:
+            raise IndexError(i)
+        start = self.offset + i * HASH_LENGTH
+        return self.buffer[start : start + HASH_LENGTH]
+
+
+class BinaryIndex(spack.lazy_index.LazyIndexBase):
+    """Install records of a binary index, decoded only when they are accessed.
+
+    Instances can be used as the lazy index of a database, so that install records are
+    materialized only for the DAG hashes that are looked up. Binary indexes have no journal.
+
+    Args:
+        buffer: content of the binary index
+        stat: identity of the file the index was read from
+        sections: offset and length of each section, keyed by name
+        num_records: number of install records in the index
+        metadata: metadata stored in the index
+    """
+
+    def __init__(
+        self,
+        buffer: Union[bytes, mmap.mmap],
+        stat: Tuple[int, int, int],
+        sections: Dict[str, Tuple[int, int]],
+        num_records: int,
+        metadata: Dict[str, Any],
+    ) -> None:
+        super().__init__(buffer, stat, None)
+        self.sections = sections
+        self.metadata = metadata
+        self.hashes = _HashColumn(buffer, sections["hashes"][0], num_records)
+        self.names = _from_bytes("I", self._section("names"))
+        self.flags = self._section("flags")
+        self.record_offsets = _from_bytes("Q", self._section("record_offsets"))
+        self.dictionary = self._section("dictionary")
+        self._strings: Optional[List[str]] = None
+
+    @staticmethod
+    def from_buffer(
+        buffer: Union[bytes, mmap.mmap], stat: Tuple[int, int, int] = (0, 0, 0)
+    ) -> Optional["BinaryIndex"]:
+        """Returns the binary index stored in a buffer, or None if the buffer does not
+        contain a binary index that can be read by this version of Spack.
+        """
+        try:
+            magic, version, num_records, num_strings = _HEADER.unpack_from(buffer, 0)
+            if magic != MAGIC or version != FORMAT_VERSION:
+                return None
+            table = _SECTION_TABLE.unpack_from(buffer, _HEADER.size)
+        except struct.error:
+            return None
+
+        sections = {x: (table[2 * i], table[2 * i + 1]) for i, x in enumerate(_SECTIONS)}
+        if any(offset + length > len(buffer) for offset, length in sections.values()):
+            return None
+
+        expected_lengths = {
+            "hashes": num_records * HASH_LENGTH,
+            "names": num_records * 4,
+            "flags": num_records,
+            "string_offsets": (num_strings + 1) * 8,
+            "record_offsets": (num_records + 1) * 8,
+        }
+        if any(sections[x][1] != length for x, length in expected_lengths.items()):
+            return None
+
+        offset, length = sections["metadata"]
+        try:
+            metadata = json.loads(buffer[offset : offset + length].decode("utf-8"))
+        except ValueError:
+            return None
+
+        return BinaryIndex(buffer, stat, sections, num_records, metadata)
+
+    @staticmethod
+    def from_file(filename: str) -> Optional["BinaryIndex"]:
+        """Returns the binary index stored in a file, or None if the file can't be read,
+        or does not contain a binary index that can be read by this version of Spack.
+        """
+        try:
+            with open(filename, "rb") as f:
+                st = os.fstat(f.fileno())
+                stat = (st.st_ino, st.st_mtime_ns, st.st_size)
+                if sys.platform == "win32" or st.st_size == 0:
+                    # A mapped file cannot be replaced on Windows
+                    buffer: Union[bytes, mmap.mmap] = f.read()
+                else:
+                    buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except OSError:
+            return None
+
+        index = BinaryIndex.from_buffer(buffer, stat)
+        if index is None and isinstance(buffer, mmap.mmap):
+            buffer.close()
+        return index
+
+    @property
+    def database_version(self) -> str:
+        """Version of the database format of the install records."""
+        return self.metadata.get("database_version", "")
+
+    @property
+    def index_hash(self) -> Optional[str]:
+        """Hash of the ``index.json`` file this index was generated from."""
+        return self.metadata.get("index_hash")
+
+    def position(self, key: str) -> Optional[int]:
+        """Returns the position of a DAG hash in the index, or None if it's not there."""
+        try:
+            encoded = key.encode("ascii")
+        except UnicodeEncodeError:
+            return None
+        i = bisect.bisect_left(self.hashes, encoded)
+        if i < len(self.hashes) and self.hashes[i] == encoded:
+            return i
+        return None
+
+    def _section(self, name: str) -> bytes:
+        offset, length = self.sections[name]
+        return self.buffer[offset : offset + length]
+
+    def _all_strings(self) -> List[str]:
+        if self._strings is None:
+            offsets = _from_bytes("Q", self._section("string_offsets"))
+            data = self._section("strings")
+            self._strings = [
+                data[start:end].decode("utf-8") for start, end in zip(offsets, offsets[1:])
+            ]
+        return self._strings
+
+    def _string(self, i: int) -> str:
+        return self._all_strings()[i]
+
+    def name(self, key: str) -> Optional[str]:
+        """Returns the package name of the record with the DAG hash passed as argument, or
+        None if there is no such record. The record is not decoded.
+        """
+        i = self.position(key)
+        return None if i is None else self._string(self.names[i])
+
+    def select(
+        self,
+        name: Optional[str] = None,
+        hash_prefix: Optional[str] = None,
+        available: Optional[bool] = None,
+    ) -> List[str]:
+        """Returns the DAG hashes of the records matching all the arguments that are not
+        None, using only the columns of the index.
+
+        Args:
+            name: name of the package
+            hash_prefix: prefix of the DAG hash
+            available: whether the spec can be installed from the buildcache, i.e. it's
+                either in the buildcache or external
+        """
+        if hash_prefix is not None:
+            encoded = hash_prefix.encode("ascii", errors="replace")
+            start = bisect.bisect_left(self.hashes, encoded)
+            end = start
+            while end < len(self.hashes) and self.hashes[end].startswith(encoded):
+                end += 1
+            positions: Union[range, List[int]] = range(start, end)
+        else:
+            positions = range(len(self.hashes))
+
+        if name is not None:
+            try:
+                name_id = self._all_strings().index(name)
+            except ValueError:
+                return []
+            names = self.names
+            positions = [i for i in positions if names[i] == name_id]
+
+        if available is not None:
+            flags = self.flags
+            mask = IN_BUILDCACHE | EXTERNAL
+            positions = [i for i in positions if bool(flags[i] & mask) == available]
+
+        return [self.hashes[i].decode("ascii") for i in positions]
+
+    def keys(self) -> List[str]:
+        """Returns the DAG hashes of all the install records."""
+        result = [
+            x
+            for x in (self.hashes[i].decode("ascii") for i in range(len(self.hashes)))
+            if self.updates.get(x, True) is not None
+        ]
+        result.extend(
+            x for x, y in self.updates.items() if y is not None and self.position(x) is None
+        )
+        return result
+
+    def raw(self, key: str) -> Optional[Dict[str, Any]]:
+        """Returns the dictionary of an install record, or None if there is no record for
+        the DAG hash passed as argument.
+        """
+        if key in self.updates:
+            return self.updates[key]
+
+        i = self.position(key)
+        if i is None:
+            return None
+
+        offset = self.sections["records"][0]
+        start, end = self.record_offsets[i], self.record_offsets[i + 1]
+        data = self.buffer[offset + start : offset + end]
+        if self.dictionary:
+            decompressor = zlib.decompressobj(zdict=self.dictionary)
+        else:
+            decompressor = zlib.decompressobj()
+        return sjson.load((decompressor.decompress(data) + decompressor.flush()).decode("utf-8"))
+
+    def all_raw(self) -> Dict[str, Any]:
+        """Returns the dictionaries of all the install records, keyed by DAG hash. Records
+        that were already materialized are mapped to None.
+        """
+        return {x: None if x in self.records else self.raw(x) for x in self.keys()}
@@ -890,6 +890,18 @@ def ensure_expected_target_path(path):
 
     rebuild_decisions = {}
 
+    # Look for all the specs on the mirrors at once, so that mirrors are probed concurrently
+    # for the specs missing from the buildcache indices
+    specs_to_check = [
+        spec_labels[spec_label]
+        for stage_jobs in stages
+        for spec_label in stage_jobs
+        if not prune_untouched_packages or spec_labels[spec_label] in affected_specs
+    ]
+    mirrors_for_specs = bindist.get_mirrors_for_specs(
+        specs_to_check, mirrors_to_check=mirrors_to_check, index_only=check_index_only
+    )
+
     for stage_jobs in stages:
         stage_name = f"stage-{stage_id}"
         stage_names.append(stage_name)
@@ -908,9 +920,7 @@ def ensure_expected_target_path(path):
                     spec_record.reason = "Pruned, untouched by change."
                     continue
 
-            up_to_date_mirrors = bindist.get_mirrors_for_spec(
-                spec=release_spec, mirrors_to_check=mirrors_to_check, index_only=check_index_only
-            )
+            up_to_date_mirrors = mirrors_for_specs[release_spec_dag_hash]
 
             spec_record.rebuild = not up_to_date_mirrors
             if up_to_date_mirrors:
@@ -3,6 +3,7 @@
 #
 # SPDX-License-Identifier: (Apache-2.0 OR MIT)
 import argparse
+import concurrent.futures
 import copy
 import glob
 import hashlib
@@ -99,6 +100,12 @@ def setup_parser(subparser: argparse.ArgumentParser):
         default=False,
         help="regenerate buildcache index after building package(s)",
     )
+    push.add_argument(
+        "--incremental-index",
+        action="store_true",
+        default=False,
+        help="with --update-index, only add the pushed specs to the existing index",
+    )
     push.add_argument(
         "--spec-file", default=None, help="create buildcache entry for spec from json or yaml file"
     )
@@ -132,6 +139,12 @@ def setup_parser(subparser: argparse.ArgumentParser):
         action="store_true",
         help="for a private mirror, include non-redistributable packages",
     )
+    push.add_argument(
+        "--relocation-offsets",
+        action="store_true",
+        help="record where install prefixes occur in binaries, so that they are relocated "
+        "without being scanned at install time",
+    )
     arguments.add_common_arguments(push, ["specs", "jobs"])
     push.set_defaults(func=push_fn)
 
@@ -317,6 +330,12 @@ def setup_parser(subparser: argparse.ArgumentParser):
         action="store_true",
         help="if provided, key index will be updated as well as package index",
     )
+    update_index.add_argument(
+        "--incremental",
+        default=False,
+        action="store_true",
+        help="only add the specs pushed since the index was last updated",
+    )
     update_index.set_defaults(func=update_index_fn)
 
 
@@ -337,6 +356,9 @@ def _progress(i: int, total: int):
 
 
 class NoPool:
+    def apply(self, func, args):
+        return func(*args)
+
     def map(self, func, args):
         return [func(a) for a in args]
 
@@ -362,6 +384,12 @@ def _make_pool() -> MaybePool:
         return NoPool()
 
 
+def _make_transfer_pool() -> concurrent.futures.ThreadPoolExecutor:
+    """Threads for requests to an OCI registry, which share one authenticated opener and its
+    connections"""
+    return concurrent.futures.ThreadPoolExecutor(max_workers=spack.oci.oci.transfer_jobs())
+
+
 def _skip_no_redistribute_for_public(specs):
     remaining_specs = list()
     removed_specs = list()
@@ -479,6 +507,8 @@ def push_fn(args):
                         unsigned=unsigned,
                         key=args.key,
                         regenerate_index=args.update_index,
+                        relocation_offsets=args.relocation_offsets,
+                        incremental_index=args.incremental_index,
                     ),
                 )
 
@@ -527,10 +557,8 @@ def push_fn(args):
     # TODO: remove update index logic out of bindist; should be once after all specs are pushed
     # not once per spec.
     if target_image and len(skipped) < len(specs) and args.update_index:
-        with tempfile.TemporaryDirectory(
-            dir=spack.stage.get_stage_root()
-        ) as tmpdir, _make_pool() as pool:
-            _update_index_oci(target_image, tmpdir, pool)
+        with tempfile.TemporaryDirectory(dir=spack.stage.get_stage_root()) as tmpdir:
+            _update_index_oci(target_image, tmpdir)
 
 
 def _get_spack_binary_blob(image_ref: ImageReference) -> Optional[spack.oci.oci.Blob]:
@@ -547,7 +575,9 @@ def _get_spack_binary_blob(image_ref: ImageReference) -> Optional[spack.oci.oci.
         return None
 
 
-def _push_single_spack_binary_blob(image_ref: ImageReference, spec: spack.spec.Spec, tmpdir: str):
+def _create_spack_binary_blob(
+    spec: spack.spec.Spec, tmpdir: str
+) -> Tuple[str, spack.oci.oci.Blob]:
     filename = os.path.join(tmpdir, f"{spec.dag_hash()}.tar.gz")
 
     # Create an oci.image.layer aka tarball of the package
@@ -559,6 +589,15 @@ def _push_single_spack_binary_blob(image_ref: ImageReference, spec: spack.spec.S
         os.path.getsize(filename),
     )
 
+    return filename, blob
+
+
+def _push_single_spack_binary_blob(
+    image_ref: ImageReference, spec: spack.spec.Spec, tmpdir: str, pool: MaybePool
+) -> spack.oci.oci.Blob:
+    # Compress in the process pool, upload in the calling thread
+    filename, blob = pool.apply(_create_spack_binary_blob, (spec, tmpdir))
+
     # Upload the blob
     upload_blob_with_retry(image_ref, file=filename, digest=blob.compressed_digest)
 
@@ -759,7 +798,8 @@ def _push_oci(
         to_be_uploaded = []
 
         tags_to_check = (target_image.with_tag(default_tag(s)) for s in installed_specs_with_deps)
-        available_blobs = pool.map(_get_spack_binary_blob, tags_to_check)
+        with _make_transfer_pool() as transfers:
+            available_blobs = list(transfers.map(_get_spack_binary_blob, tags_to_check))
 
         for spec, maybe_blob in zip(installed_specs_with_deps, available_blobs):
             if maybe_blob is not None:
@@ -778,10 +818,14 @@ def _push_oci(
         f"{target_image.domain}/{target_image.name}"
     )
 
-    # Upload blobs
-    new_blobs = pool.starmap(
-        _push_single_spack_binary_blob, ((target_image, spec, tmpdir) for spec in to_be_uploaded)
-    )
+    # Upload blobs, while the next tarballs are created
+    with _make_transfer_pool() as transfers:
+        new_blobs = list(
+            transfers.map(
+                lambda spec: _push_single_spack_binary_blob(target_image, spec, tmpdir, pool),
+                to_be_uploaded,
+            )
+        )
 
     # And update the spec to blob mapping
     for spec, blob in zip(to_be_uploaded, new_blobs):
@@ -840,13 +884,17 @@ def _config_from_tag(image_ref: ImageReference, tag: str) -> Optional[dict]:
     return config if "spec" in config else None
 
 
-def _update_index_oci(image_ref: ImageReference, tmpdir: str, pool: MaybePool) -> None:
+def _update_index_oci(image_ref: ImageReference, tmpdir: str) -> None:
     tags = list_tags(image_ref)
 
     # Fetch all image config files in parallel
-    spec_dicts = pool.starmap(
-        _config_from_tag, ((image_ref, tag) for tag in tags if tag_is_spec(tag))
-    )
+    with _make_transfer_pool() as transfers:
+        spec_dicts = list(
+            transfers.map(
+                lambda tag: _config_from_tag(image_ref, tag),
+                (tag for tag in tags if tag_is_spec(tag)),
+            )
+        )
 
     # Populate the database
     db_root_dir = os.path.join(tmpdir, "db_root")
@@ -1172,7 +1220,7 @@ def manifest_copy(manifest_file_list, dest_mirror=None):
             copy_buildcache_file(copy_file["src"], dest)
 
 
-def update_index(mirror: spack.mirror.Mirror, update_keys=False):
+def update_index(mirror: spack.mirror.Mirror, update_keys=False, incremental=False):
     # Special case OCI images for now.
     try:
         image_ref = spack.oci.oci.image_from_mirror(mirror)
@@ -1180,16 +1228,16 @@ def update_index(mirror: spack.mirror.Mirror, update_keys=False):
         image_ref = None
 
     if image_ref:
-        with tempfile.TemporaryDirectory(
-            dir=spack.stage.get_stage_root()
-        ) as tmpdir, _make_pool() as pool:
-            _update_index_oci(image_ref, tmpdir, pool)
+        with tempfile.TemporaryDirectory(dir=spack.stage.get_stage_root()) as tmpdir:
+            _update_index_oci(image_ref, tmpdir)
         return
 
     # Otherwise, assume a normal mirror.
     url = mirror.push_url
 
-    bindist.generate_package_index(url_util.join(url, bindist.build_cache_relative_path()))
+    bindist.generate_package_index(
+        url_util.join(url, bindist.build_cache_relative_path()), incremental=incremental
+    )
 
     if update_keys:
         keys_url = url_util.join(
@@ -1206,7 +1254,7 @@ def update_index(mirror: spack.mirror.Mirror, update_keys=False):
 
 def update_index_fn(args):
     """update a buildcache index"""
-    return update_index(args.mirror, update_keys=args.keys)
+    return update_index(args.mirror, update_keys=args.keys, incremental=args.incremental)
 
 
 def buildcache(parser, args):
@@ -70,6 +70,8 @@ def create_db_tarball(args):
     wd = os.path.dirname(str(spack.store.STORE.root))
     with working_dir(wd):
         files = [spack.store.STORE.db._index_path]
+        if os.path.exists(spack.store.STORE.db._journal_path):
+            files.append(spack.store.STORE.db._journal_path)
         files += glob("%s/*/*/*/.spack/spec.json" % base)
         files += glob("%s/*/*/*/.spack/spec.yaml" % base)
         files = [os.path.relpath(f) for f in files]
@@ -9,6 +9,7 @@
 import spack.config
 import spack.environment as ev
 import spack.repo
+import spack.stage
 import spack.traverse
 from spack.cmd.common import arguments
 
@@ -28,6 +29,13 @@ def setup_parser(subparser):
     subparser.add_argument(
         "-D", "--dependencies", action="store_true", help="also fetch all dependencies"
     )
+    subparser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="maximum number of packages fetched concurrently (default: config:fetch_jobs)",
+    )
     arguments.add_concretizer_args(subparser)
     subparser.epilog = (
         "With an active environment, the specs "
@@ -40,6 +48,9 @@ def fetch(parser, args):
     if args.no_checksum:
         spack.config.set("config:checksum", False, scope="command_line")
 
+    if args.jobs is not None:
+        spack.config.set("config:fetch_jobs", args.jobs, scope="command_line")
+
     if args.specs:
         specs = spack.cmd.parse_specs(args.specs, concretize=True)
     else:
@@ -64,12 +75,14 @@ def fetch(parser, args):
     else:
         to_be_fetched = specs
 
-    for spec in to_be_fetched:
-        if args.missing and spec.installed:
-            continue
+    pkgs = [spec.package for spec in to_be_fetched if not (args.missing and spec.installed)]
+    results = spack.stage.FetchScheduler().run(pkgs, _fetch_package)
+    errors = [error for _, error in results if error is not None]
+    if errors:
+        raise errors[0]
 
-        pkg = spec.package
 
-        pkg.stage.keep = True
-        with pkg.stage:
-            pkg.do_fetch()
+def _fetch_package(pkg):
+    pkg.stage.keep = True
+    with pkg.stage:
+        pkg.do_fetch()
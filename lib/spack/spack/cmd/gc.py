@@ -99,9 +99,13 @@ def gc(parser, args):
         specs = spack.store.STORE.db.unused_specs(root_hashes=root_hashes, deptype=deptype)
         if not specs:
             tty.msg("There are no unused specs. Spack's store is clean.")
-            return
+        else:
+            if not args.yes_to_all:
+                spack.cmd.common.confirmation.confirm_action(specs, "uninstalled", "uninstall")
 
-        if not args.yes_to_all:
-            spack.cmd.common.confirmation.confirm_action(specs, "uninstalled", "uninstall")
+            spack.cmd.uninstall.do_uninstall(specs, force=False)
 
-        spack.cmd.uninstall.do_uninstall(specs, force=False)
+    # Remove the deduplicated files that are not used by any installation anymore
+    count, size = spack.store.STORE.objects.prune()
+    if count:
+        tty.msg(f"Removed {count} unused files ({size / 1024 ** 2:.1f} MB) from the object store")
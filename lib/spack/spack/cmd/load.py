@@ -99,7 +99,7 @@ def load(parser, args):
         return 1
 
     with spack.store.STORE.db.read_transaction():
-        env_mod = uenv.environment_modifications_for_specs(*specs)
+        env_mod = uenv.cached_environment_modifications_for_specs(*specs)
         for spec in specs:
             env_mod.prepend_path(uenv.spack_loaded_hashes_var, spec.dag_hash())
         cmds = env_mod.shell_modifications(args.shell)
@@ -71,6 +71,13 @@ def setup_parser(subparser):
         help="the number of versions to fetch for each spec, choose 'all' to"
         " retrieve all versions of each package",
     )
+    create_parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="maximum number of packages fetched concurrently (default: config:fetch_jobs)",
+    )
     create_parser.add_argument(
         "--private",
         action="store_true",
@@ -514,6 +521,9 @@ def mirror_create(args):
             "The option '--all' already implies mirroring all versions for each package.",
         )
 
+    if args.jobs is not None:
+        spack.config.set("config:fetch_jobs", args.jobs, scope="command_line")
+
     # When no directory is provided, the source dir is used
     path = args.directory or spack.caches.fetch_cache_location()
 
@@ -542,11 +552,11 @@ def create_mirror_for_all_specs(mirror_specs, path, skip_unstable_versions):
     mirror_cache, mirror_stats = spack.mirror.mirror_cache_and_stats(
         path, skip_unstable_versions=skip_unstable_versions
     )
+    pkg_objs = []
     for candidate in mirror_specs:
         pkg_cls = spack.repo.PATH.get_pkg_class(candidate.name)
-        pkg_obj = pkg_cls(spack.spec.Spec(candidate))
-        mirror_stats.next_spec(pkg_obj.spec)
-        spack.mirror.create_mirror_from_package_object(pkg_obj, mirror_cache, mirror_stats)
+        pkg_objs.append(pkg_cls(spack.spec.Spec(candidate)))
+    spack.mirror.create_mirror_from_package_objects(pkg_objs, mirror_cache, mirror_stats)
     process_mirror_stats(*mirror_stats.stats())
 
 
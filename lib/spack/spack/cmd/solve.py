@@ -85,6 +85,12 @@ def setup_parser(subparser):
     subparser.add_argument(
         "--stats", action="store_true", default=False, help="print out statistics from clingo"
     )
+    subparser.add_argument(
+        "--cache-stats",
+        action="store_true",
+        default=False,
+        help="print out statistics of the cache of solve results",
+    )
     subparser.add_argument("specs", nargs=argparse.REMAINDER, help="specs of packages")
 
     spack.cmd.common.arguments.add_concretizer_args(subparser)
@@ -130,6 +136,20 @@ def _process_result(result, show, required_format, kwargs):
         tty.msg(asp.Result.format_unsolved(result.unsolved_specs))
 
 
+def _print_cache_stats():
+    cache = asp.result_cache()
+    stats = cache.stats()
+    lookups = stats["hits"] + stats["misses"]
+    hit_rate = 100.0 * stats["hits"] / lookups if lookups else 0.0
+    enabled = spack.config.get("concretizer:cache:results", False)
+    tty.msg(f"Cache of solve results ({'enabled' if enabled else 'disabled'})")
+    print(f"    hits: {stats['hits']}, misses: {stats['misses']} (hit rate {hit_rate:.1f}%)")
+    print(
+        f"    entries: {stats['entries']}/{cache.max_entries}, "
+        f"size: {stats['size'] / 1024 ** 2:.1f} MB"
+    )
+
+
 def solve(parser, args):
     # these are the same options as `spack spec`
     install_status_fn = spack.spec.Spec.install_status
@@ -167,6 +187,10 @@ def solve(parser, args):
         msg = "cannot give explicit specs when an environment is active"
         raise RuntimeError(msg)
 
+    if args.cache_stats and not env and not args.specs:
+        _print_cache_stats()
+        return
+
     specs = list(env.user_specs) if env else spack.cmd.parse_specs(args.specs)
 
     solver = asp.Solver()
@@ -204,3 +228,6 @@ def solve(parser, args):
                 print("% END ROUND {0}\n".format(idx))
             if not setup_only:
                 _process_result(result, show, required_format, kwargs)
+
+    if args.cache_stats:
+        _print_cache_stats()
@@ -3,11 +3,13 @@
 #
 # SPDX-License-Identifier: (Apache-2.0 OR MIT)
 import argparse
+import concurrent.futures
 
 import llnl.util.tty as tty
 
 import spack.environment as ev
 import spack.store
+import spack.util.cpus
 import spack.verify
 
 description = "check that all spack packages are on disk as installed"
@@ -25,6 +27,11 @@ def setup_parser(subparser):
         "-j", "--json", action="store_true", help="ouptut json-formatted errors"
     )
     subparser.add_argument("-a", "--all", action="store_true", help="verify all packages")
+    subparser.add_argument(
+        "--fast",
+        action="store_true",
+        help="do not hash files whose size, modification time and inode match the manifest",
+    )
     subparser.add_argument(
         "specs_or_files", nargs=argparse.REMAINDER, help="specs or files to verify"
     )
@@ -90,15 +97,34 @@ def verify(parser, args):
         setup_parser.parser.print_help()
         return 1
 
-    for spec in specs:
-        tty.debug("Verifying package %s")
-        results = spack.verify.check_spec_manifest(spec)
-        if results.has_errors():
-            if args.json:
-                print(results.json_string())
+    # Hash the files of a single spec concurrently, or verify many specs concurrently with one
+    # thread each, so that the number of threads stays bounded by build_jobs.
+    jobs = spack.util.cpus.determine_number_of_jobs(parallel=True)
+    spec_jobs = min(jobs, len(specs))
+
+    def _check(spec):
+        tty.debug("Verifying package %s" % spec.format("{name}/{hash:7}"))
+        file_jobs = 1 if spec_jobs > 1 else jobs
+        return spack.verify.check_spec_manifest(spec, fast=args.fast, jobs=file_jobs)
+
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=max(spec_jobs, 1))
+    futures = []
+    try:
+        futures = [executor.submit(_check, spec) for spec in specs]
+        for spec, future in zip(specs, futures):
+            results = future.result()
+            if results.has_errors():
+                if args.json:
+                    print(results.json_string())
+                else:
+                    tty.msg("In package %s" % spec.format("{name}/{hash:7}"))
+                    print(results)
+                return 1
             else:
-                tty.msg("In package %s" % spec.format("{name}/{hash:7}"))
-                print(results)
-            return 1
-        else:
-            tty.debug(results)
+                tty.debug(results)
+    finally:
+        # Report the first spec with errors without waiting for the specs still being verified,
+        # and drop the ones that have not started yet.
+        for f in futures:
+            f.cancel()
+        executor.shutdown(wait=False)
@@ -18,10 +18,13 @@
 provides a cache and a sanity checking mechanism for what is in the
 filesystem.
 """
+import bisect
 import contextlib
 import datetime
+import mmap
 import os
 import pathlib
+import re
 import socket
 import sys
 import time
@@ -32,6 +35,7 @@
     Container,
     Dict,
     Generator,
+    Iterable,
     List,
     NamedTuple,
     Optional,
@@ -54,6 +58,8 @@
 
 import spack.deptypes as dt
 import spack.hash_types as ht
+import spack.lazy_index
+import spack.repo
 import spack.spec
 import spack.traverse as tr
 import spack.util.lock as lk
@@ -72,7 +78,7 @@
 #: DB version.  This is stuck in the DB file to track changes in format.
 #: Increment by one when the database format changes.
 #: Versions before 5 were not integers.
-_DB_VERSION = vn.Version("7")
+_DB_VERSION = vn.StandardVersion.from_string("7")
 
 #: For any version combinations here, skip reindex when upgrading.
 #: Reindexing can take considerable time and is not always necessary.
@@ -87,6 +93,19 @@
     (vn.Version("6"), vn.Version("7")),
 ]
 
+#: The journal is compacted into the index when its size exceeds this fraction of
+#: the size of the index
+_JOURNAL_COMPACTION_RATIO = 0.5
+
+#: Matches the beginning of an index file written by Spack, up to the first install record
+_INDEX_HEADER = re.compile(rb'\{"database":\{"version":"([^"]*)","installs":\{')
+
+#: Matches the DAG hash of an install record in an index file, followed by its first field
+_INDEX_RECORD = re.compile(rb'"([a-z0-9]{32})":\{"spec":')
+
+#: Matches the end of an index file, after the last install record
+_INDEX_TRAILER = re.compile(rb'\}(?:,"journal":"([^"]*)")?\}\}')
+
 #: Default timeout for spack database locks in seconds or None (no timeout).
 #: A balance needs to be struck between quick turnaround for parallel installs
 #: (to avoid excess delays) and waiting long enough when the system is busy
@@ -131,6 +150,17 @@ def _now() -> float:
     return time.time()
 
 
+def _file_identity(stat: os.stat_result) -> Tuple[int, int, int]:
+    """Returns a tuple that changes whenever a file is replaced or modified."""
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def _new_journal_id() -> str:
+    if _use_uuid:
+        return str(uuid.uuid4())
+    return f"{socket.getfqdn()}-{os.getpid()}-{time.time_ns()}"
+
+
 def _autospec(function):
     """Decorator that automatically converts the argument of a single-arg
     function to a Spec."""
@@ -262,6 +292,236 @@ def from_dict(cls, spec, dictionary):
         return InstallRecord(spec, **d)
 
 
+class QueryIndex:
+    """Secondary indexes over the install records of a database.
+
+    The indexes are used to narrow down the records that may match a query, before checking
+    each of them with ``Spec.satisfies``. They must be updated whenever a record is added or
+    removed, and whenever the ``explicit`` flag or the installation time of a record change.
+    """
+
+    #: Margin, in seconds, used when selecting records by date. Installation times are
+    #: compared as local datetimes, so the timestamp range is widened to be safe around
+    #: daylight saving time changes.
+    DATE_MARGIN = 86400
+
+    def __init__(self) -> None:
+        #: Maps package names to versions, and versions to DAG hashes
+        self.by_name: Dict[str, Dict[vn.VersionList, Set[str]]] = {}
+        #: Maps the explicit flag to DAG hashes
+        self.by_explicit: Dict[bool, Set[str]] = {True: set(), False: set()}
+        #: List of (installation time, DAG hash), sorted by installation time
+        self.by_date: List[Tuple[float, str]] = []
+
+    @staticmethod
+    def from_records(records: Dict[str, InstallRecord]) -> "QueryIndex":
+        """Returns the indexes for a dictionary mapping DAG hashes to install records."""
+        index = QueryIndex()
+        for key, rec in records.items():
+            index._add_to_name_and_explicit(key, rec)
+        index.by_date = sorted((rec.installation_time, key) for key, rec in records.items())
+        return index
+
+    def _add_to_name_and_explicit(self, key: str, rec: InstallRecord) -> None:
+        versions = self.by_name.setdefault(rec.spec.name, {})
+        versions.setdefault(rec.spec.versions, set()).add(key)
+        self.by_explicit[bool(rec.explicit)].add(key)
+
+    def add(self, key: str, rec: InstallRecord) -> None:
+        """Adds a record to the indexes."""
+        self._add_to_name_and_explicit(key, rec)
+        bisect.insort(self.by_date, (rec.installation_time, key))
+
+    def remove(self, key: str, rec: InstallRecord) -> None:
+        """Removes a record from the indexes. The record must have the same attributes it had
+        when it was added.
+        """
+        versions = self.by_name.get(rec.spec.name, {})
+        keys = versions.get(rec.spec.versions, set())
+        keys.discard(key)
+        if not keys:
+            versions.pop(rec.spec.versions, None)
+        if not versions:
+            self.by_name.pop(rec.spec.name, None)
+
+        self.by_explicit[bool(rec.explicit)].discard(key)
+
+        item = (rec.installation_time, key)
+        idx = bisect.bisect_left(self.by_date, item)
+        if idx < len(self.by_date) and self.by_date[idx] == item:
+            del self.by_date[idx]
+
+    def _select_by_name(self, names: Iterable[str], versions: Optional[vn.VersionList]):
+        result: Set[str] = set()
+        for name in names:
+            for candidate, keys in self.by_name.get(name, {}).items():
+                if versions is None or candidate.satisfies(versions):
+                    result.update(keys)
+        return result
+
+    def _select_by_date(
+        self, start_date: Optional[datetime.datetime], end_date: Optional[datetime.datetime]
+    ) -> Optional[Set[str]]:
+        try:
+            start = start_date.timestamp() - self.DATE_MARGIN if start_date else None
+            end = end_date.timestamp() + self.DATE_MARGIN if end_date else None
+        except (OverflowError, ValueError, OSError):
+            return None
+
+        lo = bisect.bisect_left(self.by_date, (start,)) if start is not None else 0
+        hi = bisect.bisect_left(self.by_date, (end,)) if end is not None else len(self.by_date)
+        return set(key for _, key in self.by_date[lo:hi])
+
+    def candidates(
+        self,
+        names: Optional[Iterable[str]] = None,
+        versions: Optional[vn.VersionList] = None,
+        explicit: Any = any,
+        start_date: Optional[datetime.datetime] = None,
+        end_date: Optional[datetime.datetime] = None,
+    ) -> Optional[Set[str]]:
+        """Returns the DAG hashes of the records that may match the arguments, or None if no
+        index can be used to narrow down the selection.
+
+        Args:
+            names: names of the packages to be selected
+            versions: versions to be selected, only used together with names
+            explicit: if a boolean, select records with a matching explicit flag
+            start_date: select records installed after this date
+            end_date: select records installed before this date
+        """
+        selections = []
+        if names is not None:
+            selections.append(self._select_by_name(names, versions))
+
+        if isinstance(explicit, bool):
+            selections.append(self.by_explicit[explicit])
+
+        if start_date or end_date:
+            by_date = self._select_by_date(start_date, end_date)
+            if by_date is not None:
+                selections.append(by_date)
+
+        if not selections:
+            return None
+
+        selections.sort(key=len)
+        return selections[0].intersection(*selections[1:])
+
+
+class LazyIndex(spack.lazy_index.LazyIndexBase):
+    """Install records of an index file, decoded only when they are accessed.
+
+    The index file is mapped in memory and scanned once, to record the offsets of each
+    install record. Changes read from the journal take precedence over the records in
+    the index file.
+
+    Args:
+        buffer: content of the index file
+        offsets: maps the DAG hash of each install record to its start and end offsets
+        stat: identity of the index file
+        journal_id: id of the journal entries that apply to the index
+    """
+
+    def __init__(
+        self,
+        buffer: Union[bytes, mmap.mmap],
+        offsets: Dict[str, Tuple[int, int]],
+        stat: Tuple[int, int, int],
+        journal_id: Optional[str],
+    ) -> None:
+        super().__init__(buffer, stat, journal_id)
+        self.offsets = offsets
+
+    @staticmethod
+    def from_file(filename: str) -> Optional["LazyIndex"]:
+        """Returns the lazy index of a file, or None if the file can't be indexed, e.g.
+        because it was written by a different version of Spack.
+        """
+        try:
+            with open(filename, "rb") as f:
+                stat = _file_identity(os.fstat(f.fileno()))
+                if sys.platform == "win32" or stat[2] == 0:
+                    # A mapped file cannot be replaced on Windows
+                    buffer: Union[bytes, mmap.mmap] = f.read()
+                else:
+                    buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except OSError:
+            return None
+
+        header = _INDEX_HEADER.match(buffer)
+        if not header or header.group(1).decode() != str(_DB_VERSION):
+            return None
+
+        starts = [
+            (m.group(1).decode(), m.start(), m.end(1) + 2)
+            for m in _INDEX_RECORD.finditer(buffer, header.end())
+        ]
+        if starts and starts[0][1] != header.end():
+            return None
+
+        offsets = {}
+        for (key, _, start), (_, end, _) in zip(starts, starts[1:]):
+            # Skip the comma separating two records
+            offsets[key] = (start, end - 1)
+
+        end = header.end()
+        if starts:
+            key, _, start = starts[-1]
+            try:
+                text = buffer[start:].decode("utf-8")
+                _, length = JSONDecoder().raw_decode(text)
+            except ValueError:
+                return None
+            end = start + len(text[:length].encode("utf-8"))
+            offsets[key] = (start, end)
+
+        trailer = _INDEX_TRAILER.match(buffer, end)
+        if not trailer:
+            return None
+
+        journal_id = trailer.group(1).decode() if trailer.group(1) else None
+        return LazyIndex(buffer, offsets, stat, journal_id)
+
+    def keys(self) -> List[str]:
+        """Returns the DAG hashes of all the install records."""
+        result = [x for x in self.offsets if self.updates.get(x, True) is not None]
+        result.extend(
+            x for x, y in self.updates.items() if y is not None and x not in self.offsets
+        )
+        return result
+
+    def raw(self, key: str) -> Optional[Dict[str, Any]]:
+        """Returns the dictionary of an install record, or None if there is no record for
+        the DAG hash passed as argument.
+        """
+        if key in self.updates:
+            return self.updates[key]
+
+        if key not in self.offsets:
+            return None
+
+        start, end = self.offsets[key]
+        return sjson.load(self.buffer[start:end].decode("utf-8"))
+
+    def all_raw(self) -> Dict[str, Any]:
+        """Returns the dictionaries of all the install records, keyed by DAG hash. Records
+        that were already materialized are mapped to None.
+        """
+        if self.records:
+            return {x: None if x in self.records else self.raw(x) for x in self.keys()}
+
+        # Decoding the whole file at once is faster than decoding each record
+        fdata, _ = JSONDecoder().raw_decode(self.buffer[:].decode("utf-8"))
+        installs = fdata["database"]["installs"]
+        for key, rec in self.updates.items():
+            if rec is None:
+                installs.pop(key, None)
+            else:
+                installs[key] = rec
+        return installs
+
+
 class ForbiddenLockError(SpackError):
     """Raised when an upstream DB attempts to acquire a lock"""
 
@@ -598,6 +858,7 @@ def __init__(
         upstream_dbs: Optional[List["Database"]] = None,
         is_upstream: bool = False,
         lock_cfg: LockConfiguration = DEFAULT_LOCK_CFG,
+        journal: bool = False,
     ) -> None:
         """Database for Spack installations.
 
@@ -617,6 +878,9 @@ def __init__(
             is_upstream: whether this repository is an upstream.
             lock_cfg: configuration for the locks to be used by this repository.
                 Relevant only if the repository is not an upstream.
+            journal: whether writes append the modified records to a journal, which is
+                periodically compacted into ``index.json``, instead of rewriting the
+                whole index. Journals are replayed on read regardless of this setting.
         """
         self.root = root
         self.database_directory = os.path.join(self.root, _DB_DIRNAME)
@@ -624,6 +888,7 @@ def __init__(
         # Set up layout of database files within the db dir
         self._index_path = os.path.join(self.database_directory, "index.json")
         self._verifier_path = os.path.join(self.database_directory, "index_verifier")
+        self._journal_path = os.path.join(self.database_directory, "index_journal")
         self._lock_path = os.path.join(self.database_directory, "lock")
 
         # Create needed directories and files
@@ -655,12 +920,31 @@ def __init__(
                 desc="database",
                 enable=lock_cfg.enable,
             )
-        self._data: Dict[str, InstallRecord] = {}
+        # Index file whose records are materialized on demand, if any. Records are all
+        # materialized when the _data, _query_index or _installed_prefixes attributes
+        # are first accessed.
+        self._lazy_index: Optional[spack.lazy_index.LazyIndexBase] = None
+        self._loaded_data: Dict[str, InstallRecord] = {}
+
+        # Secondary indexes on the records in _data, used to speed-up queries
+        self._loaded_query_index = QueryIndex()
+
+        self.journal = journal
+        # Keys of the records modified since the last write, or None if the whole
+        # index needs to be written
+        self._changed_records: Optional[Set[str]] = set()
+        # Identity and version of the index file that was last read or written,
+        # together with the id linking it to its journal, and the offset of the
+        # last journal entry that was replayed
+        self._index_stat: Optional[Tuple[int, int, int]] = None
+        self._index_version: vn.StandardVersion = _DB_VERSION
+        self._journal_id: Optional[str] = None
+        self._journal_offset = 0
 
         # For every installed spec we keep track of its install prefix, so that
         # we can answer the simple query whether a given path is already taken
         # before installing a different spec.
-        self._installed_prefixes: Set[str] = set()
+        self._loaded_installed_prefixes: Set[str] = set()
 
         self.upstream_dbs = list(upstream_dbs) if upstream_dbs else []
 
@@ -675,6 +959,37 @@ def __init__(
         self._write_transaction_impl = lk.WriteTransaction
         self._read_transaction_impl = lk.ReadTransaction
 
+    @property
+    def _data(self) -> Dict[str, InstallRecord]:
+        if self._lazy_index is not None:
+            self._load_lazy_index()
+        return self._loaded_data
+
+    @_data.setter
+    def _data(self, value: Dict[str, InstallRecord]) -> None:
+        self._lazy_index = None
+        self._loaded_data = value
+
+    @property
+    def _query_index(self) -> QueryIndex:
+        if self._lazy_index is not None:
+            self._load_lazy_index()
+        return self._loaded_query_index
+
+    @_query_index.setter
+    def _query_index(self, value: QueryIndex) -> None:
+        self._loaded_query_index = value
+
+    @property
+    def _installed_prefixes(self) -> Set[str]:
+        if self._lazy_index is not None:
+            self._load_lazy_index()
+        return self._loaded_installed_prefixes
+
+    @_installed_prefixes.setter
+    def _installed_prefixes(self, value: Set[str]) -> None:
+        self._loaded_installed_prefixes = value
+
     def write_transaction(self):
         """Get a write lock context manager for use in a `with` block."""
         return self._write_transaction_impl(self.lock, acquire=self._read, release=self._write)
@@ -709,6 +1024,9 @@ def _write_to_file(self, stream):
                 "installs": installs,
             }
         }
+        if self._journal_id:
+            # id of the journal entries that apply to this index
+            database["database"]["journal"] = self._journal_id
 
         try:
             sjson.dump(database, stream)
@@ -737,11 +1055,11 @@ def _read_spec_from_dict(self, spec_reader, hash_key, installs, hash=ht.dag_hash
 
     def db_for_spec_hash(self, hash_key):
         with self.read_transaction():
-            if hash_key in self._data:
+            if self._get_record_local(hash_key) is not None:
                 return self
 
         for db in self.upstream_dbs:
-            if hash_key in db._data:
+            if db._get_record_local(hash_key) is not None:
                 return db
 
     def query_by_spec_hash(
@@ -758,11 +1076,13 @@ def query_by_spec_hash(
             return False, data[hash_key]
         if not data:
             with self.read_transaction():
-                if hash_key in self._data:
-                    return False, self._data[hash_key]
+                record = self._get_record_local(hash_key)
+                if record is not None:
+                    return False, record
         for db in self.upstream_dbs:
-            if hash_key in db._data:
-                return True, db._data[hash_key]
+            record = db._get_record_local(hash_key)
+            if record is not None:
+                return True, record
         return False, None
 
     def query_local_by_spec_hash(self, hash_key):
@@ -772,7 +1092,25 @@ def query_local_by_spec_hash(self, hash_key):
             (InstallRecord or None): InstallRecord when installed
                 locally, otherwise None."""
         with self.read_transaction():
-            return self._data.get(hash_key, None)
+            return self._get_record_local(hash_key)
+
+    def _get_record_local(self, hash_key: str) -> Optional[InstallRecord]:
+        """Returns the install record for a DAG hash in the local database, or None. If
+        records are loaded lazily, only this record and its dependencies are materialized.
+
+        Does not do any locking.
+        """
+        if self._lazy_index is None:
+            return self._loaded_data.get(hash_key)
+        return self._lazy_record(hash_key)
+
+    def _local_hashes(self) -> List[str]:
+        """Returns the DAG hashes of all the records in the local database, without
+        materializing them. Does not do any locking.
+        """
+        if self._lazy_index is None:
+            return list(self._loaded_data)
+        return self._lazy_index.keys()
 
     def _assign_dependencies(self, spec_reader, hash_key, installs, data):
         # Add dependencies from other records in the install DB to
@@ -815,12 +1153,24 @@ def _read_from_file(self, filename):
         """Fill database from file, do not maintain old data.
         Translate the spec portions from node-dict form to spec form.
 
+        If the file was written by this version of Spack, the install records are
+        materialized only when they are accessed.
+
         Does not do any locking.
         """
+        # Errors for missing dependencies are reported only when reading eagerly
+        lazy_index = None if self._fail_when_missing_deps else LazyIndex.from_file(filename)
+        if lazy_index is not None:
+            updates, journal_offset = self._read_journal(lazy_index.journal_id, _DB_VERSION, 0)
+            lazy_index.updates = updates
+            self._set_lazy_index(lazy_index, journal_offset)
+            return
+
         try:
             with open(filename, "r") as f:
                 # In the future we may use a stream of JSON objects, hence `raw_decode` for compat.
                 fdata, _ = JSONDecoder().raw_decode(f.read())
+                index_stat = _file_identity(os.fstat(f.fileno()))
         except Exception as e:
             raise CorruptDatabaseError("error parsing database:", str(e)) from e
 
@@ -850,18 +1200,54 @@ def check(cond, msg):
             installs = dict(
                 (k, v.to_dict(include_fields=self._record_fields)) for k, v in self._data.items()
             )
+            journal_id, journal_offset = None, 0
         else:
             check("installs" in db, "no 'installs' in JSON DB.")
             installs = db["installs"]
 
-        spec_reader = reader(version)
+            # Apply the changes recorded in the journal since the index was written
+            journal_id = db.get("journal")
+            updates, journal_offset = self._read_journal(journal_id, version, 0)
+            for hash_key, rec in updates.items():
+                if rec is None:
+                    installs.pop(hash_key, None)
+                else:
+                    installs[hash_key] = rec
 
-        def invalid_record(hash_key, error):
-            return CorruptDatabaseError(
-                f"Invalid record in Spack database: hash: {hash_key}, cause: "
-                f"{type(error).__name__}: {error}",
-                self._index_path,
-            )
+        data = self._read_records(reader(version), installs)
+        self._data = data
+        self._query_index = QueryIndex.from_records(data)
+        self._installed_prefixes = set(
+            rec.path for rec in data.values() if not rec.spec.external and rec.installed
+        )
+        self._changed_records = set()
+        self._index_stat = index_stat
+        self._index_version = version
+        self._journal_id = journal_id
+        self._journal_offset = journal_offset
+
+    def _invalid_record(self, hash_key: str, error: Exception) -> "CorruptDatabaseError":
+        return CorruptDatabaseError(
+            f"Invalid record in Spack database: hash: {hash_key}, cause: "
+            f"{type(error).__name__}: {error}",
+            self._index_path,
+        )
+
+    def _read_records(
+        self,
+        spec_reader: Type["spack.spec.SpecfileReaderBase"],
+        installs: Dict[str, Any],
+        records: Optional[Dict[str, InstallRecord]] = None,
+    ) -> Dict[str, InstallRecord]:
+        """Constructs install records from their dictionaries in an index file.
+
+        Args:
+            spec_reader: reader for the specs in the index file
+            installs: dictionaries of the install records, keyed by DAG hash
+            records: records that were already constructed. They are reused instead of
+                reading their dictionary, which may be None.
+        """
+        records = records or {}
 
         # Build up the database in three passes:
         #
@@ -874,8 +1260,11 @@ def invalid_record(hash_key, error):
 
         # Pass 1: Iterate through database and build specs w/o dependencies
         data = {}
-        installed_prefixes = set()
         for hash_key, rec in installs.items():
+            if hash_key in records:
+                data[hash_key] = records[hash_key]
+                continue
+
             try:
                 # This constructs a spec DAG from the list of all installs
                 spec = self._read_spec_from_dict(spec_reader, hash_key, installs)
@@ -885,20 +1274,19 @@ def invalid_record(hash_key, error):
                 # TODO: would a more immmutable spec implementation simplify
                 #       this?
                 data[hash_key] = InstallRecord.from_dict(spec, rec)
-
-                if not spec.external and "installed" in rec and rec["installed"]:
-                    installed_prefixes.add(rec["path"])
             except Exception as e:
-                raise invalid_record(hash_key, e) from e
+                raise self._invalid_record(hash_key, e) from e
 
         # Pass 2: Assign dependencies once all specs are created.
         for hash_key in data:
+            if hash_key in records:
+                continue
             try:
                 self._assign_dependencies(spec_reader, hash_key, installs, data)
             except MissingDependenciesError:
                 raise
             except Exception as e:
-                raise invalid_record(hash_key, e) from e
+                raise self._invalid_record(hash_key, e) from e
 
         # Pass 3: Mark all specs concrete.  Specs representing real
         # installations must be explicitly marked.
@@ -906,10 +1294,211 @@ def invalid_record(hash_key, error):
         # do it *while* we're constructing specs,it causes hashes to be
         # cached prematurely.
         for hash_key, rec in data.items():
-            rec.spec._mark_root_concrete()
+            if hash_key not in records:
+                rec.spec._mark_root_concrete()
 
-        self._data = data
-        self._installed_prefixes = installed_prefixes
+        return data
+
+    def _set_lazy_index(
+        self, lazy_index: spack.lazy_index.LazyIndexBase, journal_offset: int = 0
+    ) -> None:
+        """Replaces all the records in memory with those of a lazy index, written by this
+        version of Spack.
+
+        Args:
+            lazy_index: index whose records are materialized on demand
+            journal_offset: offset of the last journal entry applied to the index
+        """
+        self._loaded_data = {}
+        self._loaded_query_index = QueryIndex()
+        self._loaded_installed_prefixes = set()
+        self._lazy_index = lazy_index
+        self._changed_records = set()
+        self._index_stat = lazy_index.stat
+        self._index_version = _DB_VERSION
+        self._journal_id = lazy_index.journal_id
+        self._journal_offset = journal_offset
+
+    def _lazy_record(self, hash_key: str) -> Optional[InstallRecord]:
+        """Materializes an install record of the lazy index, together with the records of
+        its dependencies. Returns None if there is no record for the DAG hash.
+        """
+        assert self._lazy_index is not None
+        lazy_index = self._lazy_index
+        if hash_key in lazy_index.records:
+            return lazy_index.records[hash_key]
+
+        try:
+            rec = lazy_index.raw(hash_key)
+        except Exception as e:
+            raise self._invalid_record(hash_key, e) from e
+
+        if rec is None:
+            return None
+
+        spec_reader = reader(self._index_version)
+        installs = {hash_key: rec}
+        try:
+            spec = self._read_spec_from_dict(spec_reader, hash_key, installs)
+            record = InstallRecord.from_dict(spec, rec)
+            lazy_index.records[hash_key] = record
+
+            # Dependencies are materialized, and marked concrete, before their dependents
+            dependencies = rec["spec"].get("dependencies", [])
+            for _, dhash, _, _, _ in spec_reader.read_specfile_dep_specs(dependencies):
+                self._lazy_record(dhash)
+
+            self._assign_dependencies(spec_reader, hash_key, installs, lazy_index.records)
+        except (MissingDependenciesError, CorruptDatabaseError):
+            raise
+        except Exception as e:
+            raise self._invalid_record(hash_key, e) from e
+
+        spec._mark_root_concrete()
+        return record
+
+    def _load_lazy_index(self) -> None:
+        """Materializes all the install records of the lazy index."""
+        assert self._lazy_index is not None
+        lazy_index, self._lazy_index = self._lazy_index, None
+
+        try:
+            try:
+                installs = lazy_index.all_raw()
+            except Exception as e:
+                raise CorruptDatabaseError("error parsing database:", str(e)) from e
+            data = self._read_records(
+                reader(self._index_version), installs, records=lazy_index.records
+            )
+        except BaseException:
+            self._lazy_index = lazy_index
+            raise
+
+        self._loaded_data = data
+        self._loaded_query_index = QueryIndex.from_records(data)
+        self._loaded_installed_prefixes = set(
+            rec.path
+            for rec in data.values()
+            if rec.path is not None and not rec.spec.external and rec.installed
+        )
+        lazy_index.close()
+
+    def _read_journal(
+        self, journal_id: Optional[str], version: vn.StandardVersion, offset: int
+    ) -> Tuple[Dict[str, Any], int]:
+        """Reads the journal entries that apply to an index, starting at a given offset.
+
+        Returns the changes to the install records, where removed records are mapped to None,
+        and the offset after the last entry that was read. Does not do any locking.
+
+        Args:
+            journal_id: id of the journal entries that apply to the index
+            version: version of the index
+            offset: offset where to start reading the journal
+        """
+        updates: Dict[str, Any] = {}
+        if not journal_id:
+            return updates, 0
+
+        try:
+            with open(self._journal_path, "rb") as f:
+                f.seek(offset)
+                for line in f:
+                    # Stop at incomplete entries, left by interrupted writes
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        entry = sjson.load(line.decode("utf-8"))
+                    except Exception as e:
+                        raise CorruptDatabaseError(
+                            "error parsing database journal:", str(e)
+                        ) from e
+
+                    # Stop at entries written for a previous index
+                    if entry.get("journal") != journal_id:
+                        break
+
+                    if entry.get("version") != str(version):
+                        raise CorruptDatabaseError(
+                            f"Spack database journal has version {entry.get('version')}, "
+                            f"but the index has version {version}",
+                            self._journal_path,
+                        )
+                    updates.update(entry["installs"])
+                    offset += len(line)
+        except FileNotFoundError:
+            pass
+
+        return updates, offset
+
+    def _replay_journal(self) -> bool:
+        """Updates the in-memory database with the journal entries written after the last
+        read, if the index file is the same that was read last. Returns True on success,
+        False if the database needs to be read from scratch.
+
+        Does not do any locking.
+        """
+        if self._index_stat is None or not self._journal_id:
+            return False
+
+        try:
+            if _file_identity(os.stat(self._index_path)) != self._index_stat:
+                return False
+        except OSError:
+            return False
+
+        updates, offset = self._read_journal(
+            self._journal_id, self._index_version, self._journal_offset
+        )
+
+        if self._lazy_index is not None:
+            lazy_index = self._lazy_index
+            lazy_index.updates.update(updates)
+            for hash_key, rec in updates.items():
+                old_rec = lazy_index.records.pop(hash_key, None)
+                if old_rec is None:
+                    continue
+                if rec is None:
+                    old_rec.spec.detach(deptype=_TRACKED_DEPENDENCIES)
+                else:
+                    lazy_index.records[hash_key] = InstallRecord.from_dict(old_rec.spec, rec)
+            self._journal_offset = offset
+            return True
+
+        spec_reader = reader(self._index_version)
+
+        new_records = {}
+        for hash_key, rec in updates.items():
+            old_rec = self._data.pop(hash_key, None)
+            if old_rec is not None:
+                self._query_index.remove(hash_key, old_rec)
+                if not old_rec.spec.external and old_rec.installed:
+                    self._installed_prefixes.discard(old_rec.path)
+
+            if rec is None:
+                if old_rec is not None:
+                    old_rec.spec.detach(deptype=_TRACKED_DEPENDENCIES)
+                continue
+
+            # Records with the same hash have the same spec, so reuse it if possible
+            if old_rec is not None:
+                spec = old_rec.spec
+            else:
+                spec = self._read_spec_from_dict(spec_reader, hash_key, updates)
+                new_records[hash_key] = updates[hash_key]
+
+            self._data[hash_key] = InstallRecord.from_dict(spec, rec)
+            self._query_index.add(hash_key, self._data[hash_key])
+            if not spec.external and rec.get("installed"):
+                self._installed_prefixes.add(rec["path"])
+
+        for hash_key in new_records:
+            self._assign_dependencies(spec_reader, hash_key, new_records, self._data)
+        for hash_key in new_records:
+            self._data[hash_key].spec._mark_root_concrete()
+
+        self._journal_offset = offset
+        return True
 
     def reindex(self, directory_layout):
         """Build database index from scratch based on a directory layout.
@@ -925,9 +1514,13 @@ def _read_suppress_error():
             try:
                 if os.path.isfile(self._index_path):
                     self._read_from_file(self._index_path)
+                    # Invalid records are found only when they are materialized
+                    if self._lazy_index is not None:
+                        self._load_lazy_index()
             except CorruptDatabaseError as e:
                 self._error = e
                 self._data = {}
+                self._query_index = QueryIndex()
                 self._installed_prefixes = set()
 
         transaction = lk.WriteTransaction(
@@ -940,12 +1533,14 @@ def _read_suppress_error():
                 self._error = None
 
             old_data = self._data
+            old_query_index = self._query_index
             old_installed_prefixes = self._installed_prefixes
             try:
                 self._construct_from_directory_layout(directory_layout, old_data)
             except BaseException:
                 # If anything explodes, restore old data, skip write.
                 self._data = old_data
+                self._query_index = old_query_index
                 self._installed_prefixes = old_installed_prefixes
                 raise
 
@@ -979,6 +1574,8 @@ def _construct_from_directory_layout(self, directory_layout, old_data):
         with directory_layout.disable_upstream_check():
             # Initialize data in the reconstructed DB
             self._data = {}
+            self._query_index = QueryIndex()
+            self._changed_records = None
             self._installed_prefixes = set()
 
             # Start inspecting the installed prefixes
@@ -1074,19 +1671,32 @@ def _write(self, type, value, traceback):
             self._state_is_inconsistent = True
             return
 
+        if self._can_append_to_journal():
+            # Nothing to do if no record changed
+            if not self._changed_records:
+                return
+            self._append_to_journal()
+            self._write_verifier()
+            return
+
         temp_file = self._index_path + (".%s.%s.temp" % (socket.getfqdn(), os.getpid()))
 
         # Write a temporary database file them move it into place
         try:
+            self._journal_id = _new_journal_id() if self.journal else None
             with open(temp_file, "w") as f:
                 self._write_to_file(f)
             fs.rename(temp_file, self._index_path)
 
-            if _use_uuid:
-                with open(self._verifier_path, "w") as f:
-                    new_verifier = str(uuid.uuid4())
-                    f.write(new_verifier)
-                    self.last_seen_verifier = new_verifier
+            # Entries in the journal are now part of the index
+            if os.path.exists(self._journal_path):
+                os.remove(self._journal_path)
+            self._changed_records = set()
+            self._index_stat = _file_identity(os.stat(self._index_path))
+            self._index_version = _DB_VERSION
+            self._journal_offset = 0
+
+            self._write_verifier()
         except BaseException as e:
             tty.debug(e)
             # Clean up temp file if something goes wrong.
@@ -1094,6 +1704,78 @@ def _write(self, type, value, traceback):
                 os.remove(temp_file)
             raise
 
+    def files_identity(self) -> List[Optional[Tuple[int, int, int]]]:
+        """Returns a value that changes whenever this database, or any of its upstreams, is
+        written, e.g. when specs are installed or uninstalled, also by other processes.
+
+        Does not do any locking.
+        """
+        result: List[Optional[Tuple[int, int, int]]] = []
+        for db in [self, *self.upstream_dbs]:
+            for path in (db._index_path, db._journal_path):
+                try:
+                    result.append(_file_identity(os.stat(path)))
+                except OSError:
+                    result.append(None)
+        return result
+
+    def _write_verifier(self) -> None:
+        if _use_uuid:
+            with open(self._verifier_path, "w") as f:
+                new_verifier = str(uuid.uuid4())
+                f.write(new_verifier)
+                self.last_seen_verifier = new_verifier
+
+    def _record_changed(self, key: str) -> None:
+        """Records that the install record with the given key was added, modified or
+        removed, so that it is written to the journal.
+        """
+        if self._changed_records is not None:
+            self._changed_records.add(key)
+
+    def _can_append_to_journal(self) -> bool:
+        """Whether the changes to the database can be appended to the journal, rather than
+        rewriting the whole index.
+        """
+        if not self.journal or not self._journal_id or self._changed_records is None:
+            return False
+
+        if self._index_version != _DB_VERSION or self._index_stat is None:
+            return False
+
+        try:
+            if _file_identity(os.stat(self._index_path)) != self._index_stat:
+                return False
+        except OSError:
+            return False
+
+        # Compact the journal into the index once it grows too large
+        return self._journal_offset <= _JOURNAL_COMPACTION_RATIO * self._index_stat[2]
+
+    def _append_to_journal(self) -> None:
+        """Appends the records changed since the last write to the journal. Removed records
+        are stored as None.
+
+        This routine does no locking.
+        """
+        installs = {}
+        for key in sorted(self._changed_records or ()):
+            rec = self._data.get(key)
+            installs[key] = rec.to_dict(include_fields=self.record_fields) if rec else None
+
+        entry = {"journal": self._journal_id, "version": str(_DB_VERSION), "installs": installs}
+        line = f"{sjson.dump(entry)}\n".encode("utf-8")
+        with open(self._journal_path, "ab") as f:
+            # Drop anything after the last entry that was read, e.g. incomplete entries
+            # left by interrupted writes
+            f.truncate(self._journal_offset)
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+        self._journal_offset += len(line)
+        self._changed_records = set()
+
     def _read(self):
         """Re-read Database from the data in the set location. This does no locking."""
         if os.path.isfile(self._index_path):
@@ -1106,8 +1788,10 @@ def _read(self):
                     pass
             if (current_verifier != self.last_seen_verifier) or (current_verifier == ""):
                 self.last_seen_verifier = current_verifier
-                # Read from file if a database exists
-                self._read_from_file(self._index_path)
+                # Replay only the tail of the journal if the index didn't change, otherwise
+                # read from file if a database exists
+                if self._state_is_inconsistent or not self._replay_journal():
+                    self._read_from_file(self._index_path)
             elif self._state_is_inconsistent:
                 self._read_from_file(self._index_path)
                 self._state_is_inconsistent = False
@@ -1216,6 +1900,7 @@ def _add(
                 new_spec._add_dependency(record.spec, depflag=dep.depflag, virtuals=dep.virtuals)
                 if not upstream:
                     record.ref_count += 1
+                    self._record_changed(dkey)
 
             # Mark concrete once everything is built, and preserve
             # the original hashes of concrete specs.
@@ -1225,10 +1910,13 @@ def _add(
 
         else:
             # It is already in the database
+            self._query_index.remove(key, self._data[key])
             self._data[key].installed = installed
             self._data[key].installation_time = _now()
 
         self._data[key].explicit = explicit
+        self._query_index.add(key, self._data[key])
+        self._record_changed(key)
 
     @_autospec
     def add(self, spec, directory_layout, explicit=False):
@@ -1269,9 +1957,11 @@ def _decrement_ref_count(self, spec):
 
         rec = self._data[key]
         rec.ref_count -= 1
+        self._record_changed(key)
 
         if rec.ref_count == 0 and not rec.installed:
             del self._data[key]
+            self._query_index.remove(key, rec)
 
             for dep in spec.dependencies(deptype=_TRACKED_DEPENDENCIES):
                 self._decrement_ref_count(dep)
@@ -1284,11 +1974,13 @@ def _increment_ref_count(self, spec):
 
         rec = self._data[key]
         rec.ref_count += 1
+        self._record_changed(key)
 
     def _remove(self, spec):
         """Non-locking version of remove(); does real work."""
         key = self._get_matching_spec_key(spec)
         rec = self._data[key]
+        self._record_changed(key)
 
         # This install prefix is now free for other specs to use, even if the
         # spec is only marked uninstalled.
@@ -1300,6 +1992,7 @@ def _remove(self, spec):
             return rec.spec
 
         del self._data[key]
+        self._query_index.remove(key, rec)
 
         # Remove any reference to this node from dependencies and
         # decrement the reference count
@@ -1365,6 +2058,7 @@ def _deprecate(self, spec, deprecator):
         spec_rec.deprecated_for = deprecator_key
         spec_rec.installed = False
         self._data[spec_key] = spec_rec
+        self._record_changed(spec_key)
 
     @_autospec
     def mark(self, spec, key, value):
@@ -1373,8 +2067,12 @@ def mark(self, spec, key, value):
             return self._mark(spec, key, value)
 
     def _mark(self, spec, key, value):
-        record = self._data[self._get_matching_spec_key(spec)]
+        spec_key = self._get_matching_spec_key(spec)
+        record = self._data[spec_key]
+        self._query_index.remove(spec_key, record)
         setattr(record, key, value)
+        self._query_index.add(spec_key, record)
+        self._record_changed(spec_key)
 
     @_autospec
     def deprecate(self, spec, deprecator):
@@ -1433,8 +2131,8 @@ def installed_extensions_for(self, extendee_spec):
 
     def _get_by_hash_local(self, dag_hash, default=None, installed=any):
         # hash is a full hash and is in the data somewhere
-        if dag_hash in self._data:
-            rec = self._data[dag_hash]
+        rec = self._get_record_local(dag_hash)
+        if rec is not None:
             if rec.install_type_matches(installed):
                 return [rec.spec]
             else:
@@ -1442,10 +2140,10 @@ def _get_by_hash_local(self, dag_hash, default=None, installed=any):
 
         # check if hash is a prefix of some installed (or previously
         # installed) spec.
+        hashes = [h for h in self._local_hashes() if h.startswith(dag_hash)]
+        records = [self._get_record_local(h) for h in hashes]
         matches = [
-            record.spec
-            for h, record in self._data.items()
-            if h.startswith(dag_hash) and record.install_type_matches(installed)
+            record.spec for record in records if record and record.install_type_matches(installed)
         ]
         if matches:
             return matches
@@ -1540,64 +2238,91 @@ def _query(
             if query_spec.concrete:
                 # TODO: handling of hashes restriction is not particularly elegant.
                 hash_key = query_spec.dag_hash()
-                if hash_key in self._data and (not hashes or hash_key in hashes):
-                    return [self._data[hash_key].spec]
+                record = self._get_record_local(hash_key)
+                if record is not None and (not hashes or hash_key in hashes):
+                    return [record.spec]
                 else:
                     return []
 
-        # Abstract specs require more work -- currently we test
-        # against everything.
-        results = []
-        start_date = start_date or datetime.datetime.min
-        end_date = end_date or datetime.datetime.max
-
-        # save specs whose name doesn't match for last, to avoid a virtual check
-        deferred = []
+        # Abstract specs require more work: first narrow down the records to be checked
+        # using the indexes, then test the remaining candidates one by one.
+        def _records(names: Optional[Iterable[str]], versions: Optional[vn.VersionList]):
+            keys = self._query_index.candidates(
+                names=names,
+                versions=versions,
+                explicit=explicit,
+                start_date=start_date,
+                end_date=end_date,
+            )
+            if hashes is not None:
+                keys = set(hashes) if keys is None else keys.intersection(hashes)
 
-        for key, rec in self._data.items():
-            if hashes is not None and rec.spec.dag_hash() not in hashes:
-                continue
+            if keys is None:
+                return self._data.values()
+            return [self._data[key] for key in keys if key in self._data]
 
+        def _select(rec: InstallRecord) -> bool:
             if origin and not (origin == rec.origin):
-                continue
+                return False
 
             if not rec.install_type_matches(installed):
-                continue
+                return False
 
             if in_buildcache is not any and rec.in_buildcache != in_buildcache:
-                continue
+                return False
 
             if explicit is not any and rec.explicit != explicit:
-                continue
+                return False
 
             if known is not any and known(rec.spec.name):
-                continue
+                return False
 
             if start_date or end_date:
+                min_date = start_date or datetime.datetime.min
+                max_date = end_date or datetime.datetime.max
                 inst_date = datetime.datetime.fromtimestamp(rec.installation_time)
-                if not (start_date < inst_date < end_date):
-                    continue
+                return min_date < inst_date < max_date
 
-            if query_spec is any:
-                results.append(rec.spec)
-                continue
+            return True
 
-            # check anon specs and exact name matches first
-            if not query_spec.name or rec.spec.name == query_spec.name:
-                if rec.spec.satisfies(query_spec):
-                    results.append(rec.spec)
+        if query_spec is any:
+            return [rec.spec for rec in _records(None, None) if _select(rec)]
 
-            # save potential virtual matches for later, but not if we already found a match
-            elif not results:
-                deferred.append(rec.spec)
+        # Specs with an abstract hash can only match records whose hash has the same prefix,
+        # so the other records don't need to be materialized
+        if query_spec.abstract_hash:
+            keys = [
+                h
+                for h in self._local_hashes()
+                if h.startswith(query_spec.abstract_hash) and (hashes is None or h in hashes)
+            ]
+            records = [self._get_record_local(h) for h in keys]
+            return [
+                rec.spec
+                for rec in records
+                if rec is not None and _select(rec) and rec.spec.satisfies(query_spec)
+            ]
+
+        # check anon specs and exact name matches first
+        name = query_spec.name
+        results = [
+            rec.spec
+            for rec in _records([name] if name else None, query_spec.versions if name else None)
+            if _select(rec) and rec.spec.satisfies(query_spec)
+        ]
 
         # Checking for virtuals is expensive, so we save it for last and only if needed.
         # If we get here, we didn't find anything in the DB that matched by name.
-        # If we did fine something, the query spec can't be virtual b/c we matched an actual
+        # If we did find something, the query spec can't be virtual b/c we matched an actual
         # package installation, so skip the virtual check entirely. If we *didn't* find anything,
-        # check all the deferred specs *if* the query is virtual.
-        if not results and query_spec is not any and deferred and query_spec.virtual:
-            results = [spec for spec in deferred if spec.satisfies(query_spec)]
+        # check the installations of the providers *if* the query is virtual.
+        if not results and name and self._data and query_spec.virtual:
+            providers = spack.repo.PATH.provider_index.providers_for(name)
+            results = [
+                rec.spec
+                for rec in _records(set(x.name for x in providers), None)
+                if _select(rec) and rec.spec.satisfies(query_spec)
+            ]
 
         return results
 
@@ -1678,7 +2403,7 @@ def is_occupied_install_prefix(self, path):
     def all_hashes(self):
         """Return dag hash of every spec in the database."""
         with self.read_transaction():
-            return list(self._data.keys())
+            return self._local_hashes()
 
     def unused_specs(
         self,
@@ -1725,7 +2450,11 @@ def update_explicit(self, spec, explicit):
                 message = "{s.name}@{s.version} : marking the package {0}"
                 status = "explicit" if explicit else "implicit"
                 tty.debug(message.format(status, s=spec))
+                key = rec.spec.dag_hash()
+                self._query_index.remove(key, rec)
                 rec.explicit = explicit
+                self._query_index.add(key, rec)
+                self._record_changed(key)
 
 
 class UpstreamDatabaseLockingError(SpackError):
@@ -12,6 +12,7 @@
 import shutil
 import stat
 import sys
+import tempfile
 import time
 import urllib.parse
 import urllib.request
@@ -599,6 +600,7 @@ def __init__(
         exclude=[],
         link=default_view_link,
         link_type="symlink",
+        update_in_place=False,
     ):
         self.base = base_path
         self.raw_root = root
@@ -608,6 +610,7 @@ def __init__(
         self.exclude = exclude
         self.link_type = fsv.canonicalize_link_type(link_type)
         self.link = link
+        self.update_in_place = update_in_place
 
     def select_fn(self, spec):
         return any(spec.satisfies(s) for s in self.select)
@@ -628,6 +631,7 @@ def __eq__(self, other):
                 self.exclude == other.exclude,
                 self.link == other.link,
                 self.link_type == other.link_type,
+                self.update_in_place == other.update_in_place,
             ]
         )
 
@@ -643,6 +647,8 @@ def to_dict(self):
             ret["link_type"] = self.link_type
         if self.link != default_view_link:
             ret["link"] = self.link
+        if self.update_in_place:
+            ret["update_in_place"] = True
         return ret
 
     @staticmethod
@@ -655,6 +661,7 @@ def from_dict(base_path, d):
             d.get("exclude", []),
             d.get("link", default_view_link),
             d.get("link_type", "symlink"),
+            d.get("update_in_place", False),
         )
 
     @property
@@ -718,6 +725,7 @@ def _view(self, root: str) -> fsv.SimpleFilesystemView:
             ignore_conflicts=True,
             projections=self.projections,
             link_type=self.link_type,
+            state_file=self._state_path(root),
         )
 
     def __contains__(self, spec):
@@ -774,16 +782,27 @@ def regenerate(self, concrete_roots: List[Spec]) -> None:
         new_root = self._next_root(specs)
         old_root = self._current_root
 
-        if new_root == old_root:
+        content_hash = os.path.basename(new_root)
+        if old_root and self._content_hash_of_root(old_root) == content_hash:
             tty.debug(f"View at {self.root} does not need regeneration.")
             return
 
-        _error_on_nonempty_view_dir(new_root)
+        if new_root != old_root:
+            _error_on_nonempty_view_dir(new_root)
 
         # construct view at new_root
         if specs:
             tty.msg(f"Updating view at {self.root}")
 
+        # When only a few specs changed, it's much faster to update the current view in place,
+        # but processes using the view may see it while it's being updated, so it's opt-in
+        if old_root and self.update_in_place and self._update_in_place(old_root, new_root, specs):
+            return
+
+        # The current view was updated in place, and its directory is named after other specs
+        if new_root == old_root:
+            new_root = tempfile.mkdtemp(prefix=f"{content_hash}-", dir=os.path.dirname(new_root))
+
         view = self.view(new=new_root)
 
         root_dirname = os.path.dirname(self.root)
@@ -810,6 +829,7 @@ def regenerate(self, concrete_roots: List[Spec]) -> None:
         try:
             fs.mkdirp(new_root)
             view.add_specs(*specs)
+            self._write_content_hash(new_root, content_hash)
 
             # create symlink from tmp_symlink_name to new_root
             if os.path.exists(tmp_symlink_name):
@@ -822,6 +842,7 @@ def regenerate(self, concrete_roots: List[Spec]) -> None:
             # Clean up new view and temporary symlink on any failure.
             try:
                 shutil.rmtree(new_root, ignore_errors=True)
+                self._remove_metadata_files(new_root)
                 os.unlink(tmp_symlink_name)
             except OSError:
                 pass
@@ -854,11 +875,74 @@ def regenerate(self, concrete_roots: List[Spec]) -> None:
         ):
             try:
                 shutil.rmtree(old_root)
+                self._remove_metadata_files(old_root)
             except (IOError, OSError) as e:
                 msg = "Failed to remove old view at %s\n" % old_root
                 msg += str(e)
                 tty.warn(msg)
 
+    @staticmethod
+    def _state_path(root: str) -> str:
+        """Path of the file recording how the prefixes of specs were merged into the view in
+        root, which is next to the view, so that the view only contains files of its specs."""
+        return os.path.join(os.path.dirname(root), f".{os.path.basename(root)}.json")
+
+    @staticmethod
+    def _content_hash_path(root: str) -> str:
+        return os.path.join(os.path.dirname(root), f".{os.path.basename(root)}.content_hash")
+
+    def _content_hash_of_root(self, root: str) -> Optional[str]:
+        """Content hash of the specs in the view in root, or None if it's unknown because an
+        update of the view was interrupted. Views created from scratch are named after their
+        content hash, but views updated in place are not."""
+        try:
+            with open(self._content_hash_path(root), "r") as f:
+                content_hash = f.read().strip()
+        except OSError:
+            # Views created by older versions of Spack
+            return os.path.basename(root)
+        # The state of the view is removed while the view is updated
+        return content_hash if os.path.exists(self._state_path(root)) else None
+
+    def _write_content_hash(self, root: str, content_hash: str) -> None:
+        with fs.write_tmp_and_move(self._content_hash_path(root)) as f:
+            f.write(content_hash)
+
+    def _remove_metadata_files(self, root: str) -> None:
+        for path in (self._state_path(root), self._content_hash_path(root)):
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+    def _update_in_place(self, old_root: str, new_root: str, specs: List[Spec]) -> bool:
+        """Updates the view in old_root to contain the given specs, touching only the files of
+        specs that were added or removed. Returns False if the view has to be created from
+        scratch instead.
+
+        Processes using the view may see it while it's being updated. If the update is
+        interrupted, the view is created from scratch the next time it's regenerated."""
+        # Copy views contain files relocated to the projections of other specs, which may change
+        # even when the spec itself does not.
+        if self.link_type == "copy":
+            return False
+
+        # Only update views created by the environment
+        if not os.path.isdir(old_root) or os.path.realpath(
+            os.path.dirname(new_root)
+        ) != os.path.realpath(os.path.dirname(old_root)):
+            return False
+
+        try:
+            if not self.view(new=old_root).update_specs(*specs):
+                return False
+            self._write_content_hash(old_root, os.path.basename(new_root))
+        except Exception as e:
+            # The view is regenerated from scratch, which also reports errors like conflicts
+            tty.debug(f"Cannot update view at {old_root} in place: {e}")
+            return False
+        return True
+
     def _exclude_duplicate_runtimes(self, nodes):
         all_runtimes = spack.repo.PATH.packages_with_tags("runtime")
         runtimes_by_name = {}
@@ -1673,41 +1757,40 @@ def _concretize_separately(self, tests=False):
             msg += f" pool with {num_procs} processes"
         tty.msg(msg)
 
+        # Workers are reused for many specs, so that package modules, the store and the
+        # buildcache indexes are loaded once per worker rather than once per spec
         batch = []
-        for j, (i, concrete, duration) in enumerate(
+        for j, (i, result, duration) in enumerate(
             spack.util.parallel.imap_unordered(
-                _concretize_task,
-                args,
-                processes=num_procs,
-                debug=tty.is_debug(),
-                maxtaskperchild=1,
+                _concretize_task, args, processes=num_procs, debug=tty.is_debug()
             )
         ):
-            batch.append((i, concrete))
+            batch.append((i, result))
             percentage = (j + 1) / len(args) * 100
+            short_hash = clr.colorize(f"{spack.spec.HASH_COLOR}{{{result['hash'][:7]}}}")
             tty.verbose(
-                f"{duration:6.1f}s [{percentage:3.0f}%] {concrete.cformat('{hash:7}')} "
-                f"{root_specs[i].colored_str}"
+                f"{duration:6.1f}s [{percentage:3.0f}%] {short_hash} {root_specs[i].colored_str}"
             )
             sys.stdout.flush()
 
-        # Add specs in original order
+        # Add specs in original order, and unify the specs objects, so we get correct
+        # references to all parents
         batch.sort(key=lambda x: x[0])
-        by_hash = {}  # for attaching information on test dependencies
-        for root, (_, concrete) in zip(root_specs, batch):
-            self._add_concrete_spec(root, concrete)
-            by_hash[concrete.dag_hash()] = concrete
+        lockfile = self._to_lockfile_dict()
+        for root, (_, result) in zip(root_specs, batch):
+            lockfile["roots"].append({"hash": result["hash"], "spec": str(root)})
+            lockfile["concrete_specs"].update(result["concrete_specs"])
+        self._read_lockfile_dict(lockfile)
+        self.new_specs.extend(self.specs_by_hash[result["hash"]] for _, result in batch)
 
         finish = time.time()
         tty.msg(f"Environment concretized in {finish - start:.2f} seconds")
 
-        # Unify the specs objects, so we get correct references to all parents
-        self._read_lockfile_dict(self._to_lockfile_dict())
-
         # Re-attach information on test dependencies
         if tests:
             # This is slow, but the information on test dependency is lost
             # after unification or when reading from a lockfile.
+            by_hash = {result["hash"]: result["spec"] for _, result in batch}
             for h in self.specs_by_hash:
                 current_spec, computed_spec = self.specs_by_hash[h], by_hash[h]
                 for node in computed_spec.traverse():
@@ -1827,7 +1910,7 @@ def _env_modifications_for_view(
         try:
             with spack.store.STORE.db.read_transaction():
                 installed_roots = [s for s in self.concrete_roots() if s.installed]
-            mods = uenv.environment_modifications_for_specs(*installed_roots, view=view)
+            mods = uenv.cached_environment_modifications_for_specs(*installed_roots, view=view)
         except Exception as e:
             # Failing to setup spec-specific changes shouldn't be a hard error.
             tty.warn(
@@ -2176,12 +2259,7 @@ def _get_environment_specs(self, recurse_dependencies=True):
 
     def _to_lockfile_dict(self):
         """Create a dictionary to store a lockfile for this environment."""
-        concrete_specs = {}
-        for s in traverse.traverse_nodes(self.specs_by_hash.values(), key=traverse.by_dag_hash):
-            spec_dict = s.node_dict_with_hashes(hash=ht.dag_hash)
-            # Assumes no legacy formats, since this was just created.
-            spec_dict[ht.dag_hash.name] = s.dag_hash()
-            concrete_specs[s.dag_hash()] = spec_dict
+        concrete_specs = _lockfile_concrete_specs(self.specs_by_hash.values())
 
         hash_spec_list = zip(self.concretized_order, self.concretized_user_specs)
 
@@ -2554,13 +2632,34 @@ def _concretize_from_constraints(spec_constraints, tests=False):
             invalid_constraints.extend(inv_variant_constraints)
 
 
-def _concretize_task(packed_arguments) -> Tuple[int, Spec, float]:
+def _lockfile_concrete_specs(specs: Iterable[Spec]) -> Dict[str, Dict[str, Any]]:
+    """Returns the nodes of concrete specs as they are stored in the ``concrete_specs``
+    section of a lockfile, keyed by DAG hash."""
+    concrete_specs = {}
+    for s in traverse.traverse_nodes(specs, key=traverse.by_dag_hash):
+        spec_dict = s.node_dict_with_hashes(hash=ht.dag_hash)
+        # Assumes no legacy formats, since this was just created.
+        spec_dict[ht.dag_hash.name] = s.dag_hash()
+        concrete_specs[s.dag_hash()] = spec_dict
+    return concrete_specs
+
+
+def _concretize_task(packed_arguments) -> Tuple[int, Dict[str, Any], float]:
+    """Concretizes a user spec, and returns the result in the same format as a root of a
+    lockfile, which is much cheaper to send across processes than a spec. Test dependencies
+    are not stored in lockfiles, so if they are concretized the spec is returned as well."""
     index, spec_constraints, tests = packed_arguments
     spec_constraints = [Spec(x) for x in spec_constraints]
     with tty.SuppressOutput(msg_enabled=False):
         start = time.time()
         spec = _concretize_from_constraints(spec_constraints, tests)
-        return index, spec, time.time() - start
+        result: Dict[str, Any] = {
+            "hash": spec.dag_hash(),
+            "concrete_specs": _lockfile_concrete_specs([spec]),
+        }
+        if tests:
+            result["spec"] = spec
+        return index, result, time.time() - start
 
 
 def make_repo_path(root):
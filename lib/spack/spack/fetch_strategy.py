@@ -31,7 +31,7 @@
 import urllib.error
 import urllib.parse
 from pathlib import PurePath
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 import llnl.url
 import llnl.util
@@ -58,6 +58,9 @@
 #: List of all fetch strategies, created by FetchStrategy metaclass.
 all_strategies = []
 
+#: Size of the buffers used to write downloaded archives to disk
+_FETCH_BLOCK_SIZE = 2**20
+
 CONTENT_TYPE_MISMATCH_WARNING_TEMPLATE = (
     "The contents of {subject} look like {content_type}.  Either the URL"
     " you are trying to use does not exist or you have an internet gateway"
@@ -85,6 +88,12 @@ def wrapper(self, *args, **kwargs):
     return wrapper
 
 
+def _file_identity(path):
+    """Returns a tuple identifying the current content of a file"""
+    stat_result = os.stat(path)
+    return (stat_result.st_dev, stat_result.st_ino, stat_result.st_size, stat_result.st_mtime_ns)
+
+
 def _ensure_one_stage_entry(stage_path):
     """Ensure there is only one stage entry in the stage path."""
     stage_entries = os.listdir(stage_path)
@@ -267,6 +276,10 @@ def __init__(self, url=None, checksum=None, **kwargs):
 
         self.extension = kwargs.get("extension", None)
 
+        # Checksum of the archive computed while downloading it, together with the
+        # identity of the file it refers to
+        self._fetched_checksum: Optional[Tuple[str, Tuple[int, int, int, int], str]] = None
+
         if not self.url:
             raise ValueError("URLFetchStrategy requires a url for fetching.")
 
@@ -300,13 +313,11 @@ def fetch(self):
             tty.debug("Already downloaded {0}".format(self.archive_file))
             return
 
+        # Candidate urls are not probed for existence, since a failed download costs
+        # the same round trip
         url = None
         errors = []
         for url in self.candidate_urls:
-            if not web_util.url_exists(url):
-                tty.debug("URL does not exist: " + url)
-                continue
-
             try:
                 self._fetch_from_url(url)
                 break
@@ -353,11 +364,44 @@ def _fetch_urllib(self, url):
         if os.path.lexists(save_file):
             os.remove(save_file)
 
-        with open(save_file, "wb") as _open_file:
-            shutil.copyfileobj(response, _open_file)
-
+        self._save_response(response, save_file)
         self._check_headers(str(headers))
 
+    def _save_response(self, response, save_file):
+        """Writes a response to the archive file. If there is a digest, the checksum of the
+        archive is computed from the same buffers, so that the file is not read again by
+        ``check()``."""
+        self._fetched_checksum = None
+        try:
+            hasher = crypto.hash_fun_for_digest(self.digest)() if self.digest else None
+        except ValueError:
+            hasher = None
+
+        with open(save_file, "wb") as f:
+            while True:
+                chunk = response.read(_FETCH_BLOCK_SIZE)
+                if not chunk:
+                    break
+                f.write(chunk)
+                if hasher is not None:
+                    hasher.update(chunk)
+
+        if hasher is not None:
+            self._fetched_checksum = (save_file, _file_identity(save_file), hasher.hexdigest())
+
+    def _checksum_from_fetch(self, filename):
+        """Returns the checksum computed when downloading a file, or None if the file was
+        not downloaded by this fetcher, or it changed since."""
+        if self._fetched_checksum is None:
+            return None
+        path, identity, checksum = self._fetched_checksum
+        try:
+            if path != filename or _file_identity(filename) != identity:
+                return None
+        except OSError:
+            return None
+        return checksum
+
     @_needs_stage
     def _fetch_curl(self, url):
         save_file = None
@@ -390,10 +434,14 @@ def _fetch_curl(self, url):
         base_args = web_util.base_curl_fetch_args(url, timeout)
         curl_args = save_args + base_args + cookie_args
 
-        # Run curl but grab the mime type from the http headers
+        # Run curl but grab the mime type from the http headers. Change the working directory
+        # only when curl names the file, so that stages can be fetched in worker threads.
         curl = self.curl
-        with working_dir(self.stage.path):
+        if partial_file:
             headers = curl(*curl_args, output=str, fail_on_error=False)
+        else:
+            with working_dir(self.stage.path):
+                headers = curl(*curl_args, output=str, fail_on_error=False)
 
         if curl.returncode != 0:
             # clean up archive on failure.
@@ -475,7 +523,9 @@ def check(self):
         if not self.digest:
             raise NoDigestError("Attempt to check URLFetchStrategy with no digest.")
 
-        verify_checksum(self.archive_file, self.digest)
+        verify_checksum(
+            self.archive_file, self.digest, checksum=self._checksum_from_fetch(self.archive_file)
+        )
 
     @_needs_stage
     def reset(self):
@@ -565,8 +615,7 @@ def fetch(self):
         if os.path.lexists(file):
             os.remove(file)
 
-        with open(file, "wb") as f:
-            shutil.copyfileobj(response, f)
+        self._save_response(response, file)
 
 
 class VCSFetchStrategy(FetchStrategy):
@@ -1413,9 +1462,17 @@ def expand(self):
         verify_checksum(os.path.join(src_dir, files[0]), self.expanded_sha256)
 
 
-def verify_checksum(file, digest):
+def verify_checksum(file, digest, checksum=None):
+    """Verifies that a file matches a digest. The checksum of the file is computed, unless
+    it is passed as argument."""
     checker = crypto.Checker(digest)
-    if not checker.check(file):
+    if checksum is not None:
+        checker.sum = checksum
+        matches = checksum == digest
+    else:
+        matches = checker.check(file)
+
+    if not matches:
         # On failure, provide some information about the file size and
         # contents, so that we can quickly see what the issue is (redirect
         # was not followed, empty file, text instead of binary, ...)
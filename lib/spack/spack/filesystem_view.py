@@ -3,6 +3,7 @@
 #
 # SPDX-License-Identifier: (Apache-2.0 OR MIT)
 
+import concurrent.futures
 import functools as ft
 import itertools
 import os
@@ -10,7 +11,7 @@
 import shutil
 import stat
 import sys
-from typing import Callable, Dict, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from llnl.string import comma_or
 from llnl.util import tty
@@ -19,6 +20,7 @@
     remove_dead_links,
     remove_empty_directories,
     visit_directory_tree,
+    write_tmp_and_move,
 )
 from llnl.util.lang import index_by, match_predicate
 from llnl.util.link_tree import (
@@ -28,17 +30,21 @@
     MergeConflictSummary,
     SingleMergeConflictError,
     SourceMergeVisitor,
+    replay_visit,
+    scan_source_trees,
 )
 from llnl.util.symlink import symlink
 from llnl.util.tty.color import colorize
 
 import spack.config
+import spack.object_store
 import spack.paths
 import spack.projections
 import spack.relocate
 import spack.schema.projections
 import spack.spec
 import spack.store
+import spack.util.cpus
 import spack.util.spack_json as s_json
 import spack.util.spack_yaml as s_yaml
 from spack.error import SpackError
@@ -69,7 +75,11 @@ def view_copy(
 
     Use spec and view to generate relocations
     """
-    shutil.copy2(src, dst, follow_symlinks=False)
+    if spack.store.STORE.deduplicate:
+        # Deduplicated files are read-only, but copies have to be relocated
+        spack.object_store.copy_unshared(src, dst, follow_symlinks=False)
+    else:
+        shutil.copy2(src, dst, follow_symlinks=False)
 
     # No need to relocate if no metadata or external.
     if not spec or spec.external:
@@ -673,9 +683,29 @@ def unlink_meta_folder(self, spec):
         shutil.rmtree(path)
 
 
+#: Version of the file recording how the prefixes of specs were merged into a view
+VIEW_STATE_VERSION = 1
+
+
+def _adds_custom_files(spec: spack.spec.Spec) -> bool:
+    """Whether the package of a spec overrides how its files are added to views, and may add
+    files that depend on other specs in the view, or that are not in its prefix."""
+    method = type(spec.package).add_files_to_view
+    return method.__qualname__ != "PackageViewMixin.add_files_to_view"
+
+
 class SimpleFilesystemView(FilesystemView):
     """A simple and partial implementation of FilesystemView focused on performance and immutable
-    views, where specs cannot be removed after they were added."""
+    views, where specs cannot be removed after they were added.
+
+    If ``state_file`` is given, the view records there how the prefixes of its specs were merged,
+    so that it can be updated in place to contain a different list of specs with
+    :meth:`update_specs`, as if it was created again. The file is outside of the view, and is
+    removed while the view is being updated, so that an interrupted update can be detected."""
+
+    def __init__(self, root, layout, *, state_file: Optional[str] = None, **kwargs):
+        super().__init__(root, layout, **kwargs)
+        self.state_file = state_file
 
     def _sanity_check_view_projection(self, specs):
         """A very common issue is that we end up with two specs of the same package, that project
@@ -695,6 +725,9 @@ def add_specs(self, *specs: spack.spec.Spec) -> None:
         """Link a root-to-leaf topologically ordered list of specs into the view."""
         assert all((s.concrete for s in specs))
         if len(specs) == 0:
+            # An empty view can still be updated in place later
+            if self._read_state() is None:
+                self._write_state([])
             return
 
         # Drop externals
@@ -702,17 +735,13 @@ def add_specs(self, *specs: spack.spec.Spec) -> None:
 
         self._sanity_check_view_projection(specs)
 
-        # Ignore spack meta data folder.
-        def skip_list(file):
-            return os.path.basename(file) == spack.store.STORE.layout.metadata_dir
-
-        visitor = SourceMergeVisitor(ignore=skip_list)
+        visitor = self._source_merge_visitor()
 
         # Gather all the directories to be made and files to be linked
-        for spec in specs:
-            src_prefix = spec.package.view_source()
-            visitor.set_projection(self.get_relative_projection_for_spec(spec))
-            visit_directory_tree(src_prefix, visitor)
+        records = self._scan_specs(specs)
+        for record in records:
+            visitor.set_projection(record["projection"])
+            replay_visit(visitor, record["root"], record["events"])
 
         # Check for conflicts in destination dir.
         visit_directory_tree(self._root, DestinationMergeVisitor(visitor))
@@ -735,25 +764,253 @@ def skip_list(file):
             os.mkdir(os.path.join(self._root, dst))
 
         # Link the files using a "merge map": full src => full dst
-        merge_map_per_prefix = self._source_merge_visitor_to_merge_map(visitor)
-        for spec in specs:
-            merge_map = merge_map_per_prefix.get(spec.package.view_source(), None)
-            if not merge_map:
-                # Not every spec may have files to contribute.
-                continue
-            spec.package.add_files_to_view(self, merge_map, skip_if_exists=False)
+        self._add_files_to_view(specs, self._source_merge_visitor_to_merge_map(visitor))
 
         # Finally create the metadata dirs.
         self.link_metadata(specs)
 
+        # Keep track of the specs added to the view before, if any
+        state = self._read_state()
+        if state is not None and state["link_type"] == canonicalize_link_type(self.link_type):
+            records = state["specs"] + records
+        self._write_state(records)
+
+    def update_specs(self, *specs: spack.spec.Spec) -> bool:
+        """Update in place a view created by :meth:`add_specs`, so that it contains the given
+        root-to-leaf topologically ordered list of specs, exactly as if it was created again.
+
+        Only the prefixes of specs that are not in the view yet are walked. The visits of the
+        other prefixes are replayed from the state of the view, and only files whose source
+        changed are unlinked or linked.
+
+        Specs whose package overrides ``add_files_to_view`` may write files that depend on other
+        specs in the view, e.g. shebangs pointing to an interpreter. Their files are linked again
+        when any of their dependencies is added to, or removed from, the view.
+
+        Returns:
+            False, without modifying the view, if it has no state to be updated from, if it is
+            empty, or if it cannot be updated in place, e.g. because a removed spec may have
+            added files to the view that were not recorded
+        """
+        assert all((s.concrete for s in specs))
+        state = self._read_state()
+        if state is None or state["link_type"] != canonicalize_link_type(self.link_type):
+            return False
+
+        # Nothing is saved by updating an empty view
+        if not state["specs"]:
+            return False
+
+        # Drop externals
+        specs = [s for s in specs if not s.external]
+
+        self._sanity_check_view_projection(specs)
+
+        # Merge the prefixes currently in the view
+        old_visitor = self._source_merge_visitor()
+        for record in state["specs"]:
+            old_visitor.set_projection(record["projection"])
+            replay_visit(old_visitor, record["root"], record["events"])
+
+        # Merge the new list of prefixes, walking only those not in the view yet
+        key = lambda record: (record["hash"], record["root"], record["projection"])
+        current = {key(record): record for record in state["specs"]}
+        keys = [
+            (s.dag_hash(), s.package.view_source(), self.get_relative_projection_for_spec(s))
+            for s in specs
+        ]
+        old_keys = {record["hash"]: key(record) for record in state["specs"]}
+        new_keys = {s.dag_hash(): k for s, k in zip(specs, keys)}
+
+        # Files added by custom implementations are not recorded, so they can't be removed
+        if any(
+            record["custom_files"] and old_keys[record["hash"]] != new_keys.get(record["hash"])
+            for record in state["specs"]
+        ):
+            return False
+
+        # Link again the files of specs adding custom files, whose dependencies changed
+        relinked = {
+            s.package.view_source()
+            for s, k in zip(specs, keys)
+            if k in current
+            and _adds_custom_files(s)
+            and any(
+                old_keys.get(h) != new_keys.get(h)
+                for h in (d.dag_hash() for d in s.traverse(root=False))
+            )
+        }
+
+        added = [spec for spec, k in zip(specs, keys) if k not in current]
+        scanned = iter(self._scan_specs(added))
+        records = [current[k] if k in current else next(scanned) for k in keys]
+        visitor = self._source_merge_visitor()
+        for record in records:
+            visitor.set_projection(record["projection"])
+            replay_visit(visitor, record["root"], record["events"])
+
+        # Throw on fatal dir-file conflicts.
+        if visitor.fatal_conflicts:
+            raise MergeConflictSummary(visitor.fatal_conflicts)
+
+        # Inform about file-file conflicts.
+        if visitor.file_conflicts:
+            if self.ignore_conflicts:
+                tty.debug(f"{len(visitor.file_conflicts)} file conflicts")
+            else:
+                raise MergeConflictSummary(visitor.file_conflicts)
+
+        kept = {key(record) for record in records}
+        removed = [record for record in state["specs"] if key(record) not in kept]
+        unlinked = {
+            dst: src
+            for dst, src in old_visitor.files.items()
+            if visitor.files.get(dst) != src or src[0] in relinked
+        }
+        linked = {
+            dst: src
+            for dst, src in visitor.files.items()
+            if old_visitor.files.get(dst) != src or src[0] in relinked
+        }
+        tty.debug(
+            f"Updating view: {len(added)} specs added, {len(removed)} removed, "
+            f"{len(relinked)} linked again, {len(unlinked)} files unlinked, {len(linked)} linked"
+        )
+
+        # Without a state, an interrupted update is detected, and the view is created again
+        self._remove_state()
+
+        # Remove the metadata dirs and files of removed specs, and files from other sources
+        for record in removed:
+            metadata_dir = os.path.join(self._root, record["metadata_dir"])
+            shutil.rmtree(metadata_dir, ignore_errors=True)
+            try:
+                os.rmdir(os.path.dirname(metadata_dir))
+            except OSError:
+                pass
+        for dst in unlinked:
+            try:
+                os.unlink(os.path.join(self._root, dst))
+            except FileNotFoundError:
+                pass
+
+        # Remove the directories that are not needed anymore, children first
+        for dst in sorted(
+            old_visitor.directories.keys() - visitor.directories.keys(),
+            key=lambda d: d.count(os.sep),
+            reverse=True,
+        ):
+            try:
+                os.rmdir(os.path.join(self._root, dst))
+            except OSError:
+                pass
+
+        # Make the new directories, parents first
+        for dst in visitor.directories:
+            if dst not in old_visitor.directories:
+                os.mkdir(os.path.join(self._root, dst))
+
+        self._add_files_to_view(specs, self._files_to_merge_map(linked))
+
+        self.link_metadata(added, check_destination=False)
+
+        self._write_state(records)
+        return True
+
+    @staticmethod
+    def _skip_list(file: str) -> bool:
+        # Ignore spack meta data folder.
+        return os.path.basename(file) == spack.store.STORE.layout.metadata_dir
+
+    def _source_merge_visitor(self) -> SourceMergeVisitor:
+        return SourceMergeVisitor(ignore=self._skip_list)
+
+    def _scan_specs(self, specs: List[spack.spec.Spec]) -> List[Dict[str, Any]]:
+        """Walks the prefixes of specs concurrently, and returns records of the visits, which are
+        replayed in order on the merge visitor."""
+        roots = [spec.package.view_source() for spec in specs]
+        jobs = spack.util.cpus.determine_number_of_jobs(parallel=True)
+        visits = scan_source_trees(roots, ignore=self._skip_list, jobs=jobs)
+        return [
+            {
+                "hash": spec.dag_hash(),
+                "root": root,
+                "projection": self.get_relative_projection_for_spec(spec),
+                "metadata_dir": self.relative_metadata_dir_for_spec(spec),
+                "custom_files": _adds_custom_files(spec),
+                "events": events,
+            }
+            for spec, root, events in zip(specs, roots, visits)
+        ]
+
+    def _add_files_to_view(
+        self, specs: List[spack.spec.Spec], merge_map_per_prefix: Dict[str, Dict[str, str]]
+    ) -> None:
+        """Links the files of specs into the view, using one thread per spec. Directories must
+        exist already, and destinations of different specs are distinct, so the order in which
+        specs are linked does not matter."""
+        tasks = [
+            (spec, merge_map_per_prefix[spec.package.view_source()])
+            for spec in specs
+            if merge_map_per_prefix.get(spec.package.view_source())
+        ]
+        if len(tasks) < 2:
+            for spec, merge_map in tasks:
+                spec.package.add_files_to_view(self, merge_map, skip_if_exists=False)
+            return
+
+        jobs = min(len(tasks), spack.util.cpus.determine_number_of_jobs(parallel=True))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+            futures = [
+                executor.submit(spec.package.add_files_to_view, self, merge_map, False)
+                for spec, merge_map in tasks
+            ]
+            # Raise the first error, in the order of the specs
+            for future in futures:
+                future.result()
+
+    def _read_state(self) -> Optional[Dict[str, Any]]:
+        if self.state_file is None:
+            return None
+        try:
+            with open(self.state_file, "r") as f:
+                state = s_json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(state, dict) or state.get("version") != VIEW_STATE_VERSION:
+            return None
+        return state
+
+    def _remove_state(self) -> None:
+        if self.state_file is None:
+            return
+        try:
+            os.unlink(self.state_file)
+        except FileNotFoundError:
+            pass
+
+    def _write_state(self, records: List[Dict[str, Any]]) -> None:
+        if self.state_file is None:
+            return
+        with write_tmp_and_move(self.state_file) as f:
+            state = {
+                "version": VIEW_STATE_VERSION,
+                "link_type": canonicalize_link_type(self.link_type),
+                "specs": records,
+            }
+            s_json.dump(state, f)
+
     def _source_merge_visitor_to_merge_map(self, visitor: SourceMergeVisitor):
+        return self._files_to_merge_map(visitor.files)
+
+    def _files_to_merge_map(self, files: Dict[str, Tuple[str, str]]):
         # For compatibility with add_files_to_view, we have to create a
         # merge_map of the form join(src_root, src_rel) => join(dst_root, dst_rel),
         # but our visitor.files format is dst_rel => (src_root, src_rel).
         # We exploit that visitor.files is an ordered dict, and files per source
         # prefix are contiguous.
         source_root = lambda item: item[1][0]
-        per_source = itertools.groupby(visitor.files.items(), key=source_root)
+        per_source = itertools.groupby(files.items(), key=source_root)
         return {
             src_root: {
                 os.path.join(src_root, src_rel): os.path.join(self._root, dst_rel)
@@ -769,7 +1026,9 @@ def relative_metadata_dir_for_spec(self, spec):
             spec.name,
         )
 
-    def link_metadata(self, specs):
+    def link_metadata(self, specs, check_destination=True):
+        """Links the metadata dirs of specs into the view. Without ``check_destination``, the
+        view is not walked to find conflicts, and existing directories are reused."""
         metadata_visitor = SourceMergeVisitor()
 
         for spec in specs:
@@ -781,7 +1040,12 @@ def link_metadata(self, specs):
             visit_directory_tree(src_prefix, metadata_visitor)
 
         # Check for conflicts in destination dir.
-        visit_directory_tree(self._root, DestinationMergeVisitor(metadata_visitor))
+        if check_destination:
+            visit_directory_tree(self._root, DestinationMergeVisitor(metadata_visitor))
+        else:
+            for dst in list(metadata_visitor.directories):
+                if os.path.isdir(os.path.join(self._root, dst)):
+                    del metadata_visitor.directories[dst]
 
         # Throw on dir-file conflicts -- unlikely, but who knows.
         if metadata_visitor.fatal_conflicts:
@@ -41,8 +41,11 @@ def _populate_hooks(cls):
 
         relative_names = list(list_modules(spack.paths.hooks_path))
 
-        # Ensure that write_install_manifest comes last
-        ensure_last(relative_names, "absolutify_elf_sonames", "write_install_manifest")
+        # Ensure that write_install_manifest comes last, and that files are deduplicated only
+        # after all the other hooks modified them
+        ensure_last(
+            relative_names, "absolutify_elf_sonames", "deduplicate_files", "write_install_manifest"
+        )
 
         for name in relative_names:
             module_name = __name__ + "." + name
@@ -0,0 +1,20 @@
+# Copyright 2013-2024 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+
+import llnl.util.tty as tty
+
+import spack.store
+
+
+def post_install(spec, explicit=None):
+    store = spack.store.STORE
+    if spec.external or not store.deduplicate:
+        return
+
+    # Configuration files and state are often modified after installation, so they are not
+    # shared with other prefixes
+    skip = (store.layout.metadata_dir, "etc", "var")
+    count, size = store.objects.add_prefix(spec.prefix, skip=skip)
+    tty.debug(f"Deduplicated {count} files ({size} bytes) in {spec.prefix}")
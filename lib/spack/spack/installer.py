@@ -26,6 +26,7 @@
 installations of packages in a Spack instance.
 """
 
+import concurrent.futures
 import copy
 import glob
 import heapq
@@ -381,8 +382,73 @@ def _print_timer(pre: str, pkg_id: str, timer: timer.BaseTimer) -> None:
     tty.msg(f"{pre} Successfully installed {pkg_id}", "  ".join(phases))
 
 
+class BinaryDownloads:
+    """Downloads binary tarballs in a bounded thread pool, ahead of their installation, so
+    that packages are extracted and relocated while the tarballs of the packages installed
+    after them are being downloaded.
+    """
+
+    def __init__(self, jobs: int) -> None:
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=jobs)
+        # Pending and completed downloads, keyed on the DAG hash of the spec
+        self.downloads: Dict[str, concurrent.futures.Future] = {}
+
+    def __contains__(self, spec: "spack.spec.Spec") -> bool:
+        return spec.dag_hash() in self.downloads
+
+    def submit(self, spec: "spack.spec.Spec", unsigned: Optional[bool] = None) -> None:
+        """Starts downloading the binary tarball of a spec, if not started already, and if the
+        indices of the buildcaches have it.
+
+        Args:
+            spec: concrete spec whose tarball is downloaded
+            unsigned: if ``True`` or ``False`` override the mirror signature verification
+                defaults
+        """
+        dag_hash = spec.dag_hash()
+        if dag_hash in self.downloads:
+            return
+        # Search in the main thread, since it may update the local copy of buildcache indices
+        matches = binary_distribution.get_mirrors_for_spec(spec, index_only=True)
+        if not matches:
+            return
+        self.downloads[dag_hash] = self.executor.submit(
+            binary_distribution.download_tarball, spec, unsigned, matches
+        )
+
+    def pop(self, spec: "spack.spec.Spec") -> Optional[dict]:
+        """Waits for the download of the tarball of a spec, and returns the result of
+        ``binary_distribution.download_tarball``. The caller owns the downloaded files.
+        """
+        return self.downloads.pop(spec.dag_hash()).result()
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Cancels pending downloads, and removes the tarballs that were not installed.
+
+        Args:
+            wait: whether to wait for the downloads in progress. Otherwise their tarballs are
+                removed when they complete.
+        """
+        for future in self.downloads.values():
+            if not future.cancel():
+                future.add_done_callback(self._discard)
+        self.downloads.clear()
+        self.executor.shutdown(wait=wait)
+
+    @staticmethod
+    def _discard(future: concurrent.futures.Future) -> None:
+        if future.exception() is not None:
+            return
+        download_result = future.result()
+        if download_result is not None:
+            binary_distribution._delete_staged_downloads(download_result)
+
+
 def _install_from_cache(
-    pkg: "spack.package_base.PackageBase", explicit: bool, unsigned: Optional[bool] = False
+    pkg: "spack.package_base.PackageBase",
+    explicit: bool,
+    unsigned: Optional[bool] = False,
+    downloads: Optional[BinaryDownloads] = None,
 ) -> bool:
     """
     Install the package from binary cache
@@ -392,12 +458,13 @@ def _install_from_cache(
         explicit: ``True`` if installing the package was explicitly
             requested by the user, otherwise, ``False``
         unsigned: if ``True`` or ``False`` override the mirror signature verification defaults
+        downloads: tarballs being downloaded ahead of their installation, if any
 
     Return: ``True`` if the package was extract from binary cache, ``False`` otherwise
     """
     t = timer.Timer()
     installed_from_cache = _try_install_from_binary_cache(
-        pkg, explicit, unsigned=unsigned, timer=t
+        pkg, explicit, unsigned=unsigned, timer=t, downloads=downloads
     )
     if not installed_from_cache:
         return False
@@ -460,6 +527,7 @@ def _process_binary_cache_tarball(
     unsigned: Optional[bool],
     mirrors_for_spec: Optional[list] = None,
     timer: timer.BaseTimer = timer.NULL_TIMER,
+    downloads: Optional[BinaryDownloads] = None,
 ) -> bool:
     """
     Process the binary cache tarball.
@@ -471,15 +539,19 @@ def _process_binary_cache_tarball(
         mirrors_for_spec: Optional list of concrete specs and mirrors
         obtained by calling binary_distribution.get_mirrors_for_spec().
         timer: timer to keep track of binary install phases.
+        downloads: tarballs being downloaded ahead of their installation, if any
 
     Return:
         bool: ``True`` if the package was extracted from binary cache,
             else ``False``
     """
     with timer.measure("fetch"):
-        download_result = binary_distribution.download_tarball(
-            pkg.spec, unsigned, mirrors_for_spec
-        )
+        if downloads is not None and pkg.spec in downloads:
+            download_result = downloads.pop(pkg.spec)
+        else:
+            download_result = binary_distribution.download_tarball(
+                pkg.spec, unsigned, mirrors_for_spec
+            )
 
         if download_result is None:
             return False
@@ -503,6 +575,7 @@ def _try_install_from_binary_cache(
     explicit: bool,
     unsigned: Optional[bool] = None,
     timer: timer.BaseTimer = timer.NULL_TIMER,
+    downloads: Optional[BinaryDownloads] = None,
 ) -> bool:
     """
     Try to extract the package from binary cache.
@@ -512,7 +585,14 @@ def _try_install_from_binary_cache(
         explicit: the package was explicitly requested by the user
         unsigned: if ``True`` or ``False`` override the mirror signature verification defaults
         timer: timer to keep track of binary install phases.
+        downloads: tarballs being downloaded ahead of their installation, if any
     """
+    # The tarball is already being downloaded
+    if downloads is not None and pkg.spec in downloads:
+        return _process_binary_cache_tarball(
+            pkg, explicit, unsigned, timer=timer, downloads=downloads
+        )
+
     # Early exit if no binary mirrors are configured.
     if not spack.mirror.MirrorCollection(binary=True):
         return False
@@ -1151,6 +1231,9 @@ def __init__(
         # fast then that option applies to all build requests.
         self.fail_fast = False
 
+        # Binary tarballs downloaded ahead of their installation
+        self.binary_downloads: Optional[BinaryDownloads] = None
+
     def __repr__(self) -> str:
         """Returns a formal representation of the package installer."""
         rep = f"{self.__class__.__name__}("
@@ -1640,7 +1723,7 @@ def _install_task(self, task: BuildTask, install_status: InstallStatus) -> None:
 
         # Use the binary cache if requested
         if use_cache:
-            if _install_from_cache(pkg, explicit, unsigned):
+            if _install_from_cache(pkg, explicit, unsigned, downloads=self.binary_downloads):
                 self._update_installed(task)
                 if task.compiler:
                     self._add_compiler_package_to_config(pkg)
@@ -1963,10 +2046,51 @@ def _install_action(self, task: BuildTask) -> int:
         # back on failure
         return InstallAction.OVERWRITE
 
+    def _start_binary_downloads(self) -> Optional[BinaryDownloads]:
+        """Starts downloading the binary tarballs of the packages that can be installed from
+        a buildcache, in the order in which they are expected to be installed.
+
+        Returns ``None`` if tarballs are downloaded only when the package is installed."""
+        jobs = spack.config.get("config:binary_download_jobs", 8)
+        if jobs < 2 or not spack.mirror.MirrorCollection(binary=True):
+            return None
+
+        downloads = BinaryDownloads(jobs)
+        for _, task in sorted(self.build_pq, key=lambda x: x[0]):
+            spec = task.pkg.spec
+            if (
+                task.status == STATUS_REMOVED
+                or not task.use_cache
+                or task.request.install_args.get("fake")
+                or spec.external
+                or spec.installed_upstream
+            ):
+                continue
+
+            # Packages that are already installed are not downloaded, unless overwritten
+            if spec.dag_hash() not in task.request.overwrite and self._check_db(spec)[1]:
+                continue
+
+            downloads.submit(spec, task.request.install_args.get("unsigned"))
+        return downloads
+
     def install(self) -> None:
         """Install the requested package(s) and or associated dependencies."""
 
         self._init_queue()
+        self.binary_downloads = self._start_binary_downloads()
+        succeeded = False
+        try:
+            self._install_queued_tasks()
+            succeeded = True
+        finally:
+            # Don't wait for downloads that are not needed anymore on failures and interrupts
+            if self.binary_downloads is not None:
+                self.binary_downloads.shutdown(wait=succeeded)
+                self.binary_downloads = None
+
+    def _install_queued_tasks(self) -> None:
+        """Install the packages of the tasks in the build queue, in dependency order."""
         fail_fast_err = "Terminating after first install failure"
         single_requested_spec = len(self.build_requests) == 1
         failed_build_requests = []
@@ -0,0 +1,60 @@
+# Copyright 2013-2024 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+"""Interface of the indexes whose install records are decoded only when they are accessed.
+
+A database reading a lazy index materializes only the install records of the DAG hashes
+that are looked up. ``spack.database.LazyIndex`` reads the ``index.json`` file of a
+database, and ``spack.binary_index.BinaryIndex`` reads binary buildcache indexes.
+"""
+import abc
+import mmap
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+
+class LazyIndexBase(metaclass=abc.ABCMeta):
+    """Base class for the install records of an index, decoded only when they are accessed.
+
+    Install records materialized by a database are stored in ``records``, keyed by DAG
+    hash. Changes in ``updates`` take precedence over the records in the index.
+
+    Args:
+        buffer: content of the index
+        stat: identity of the file the index was read from
+        journal_id: id of the journal entries that apply to the index, if any
+    """
+
+    def __init__(
+        self,
+        buffer: Union[bytes, mmap.mmap],
+        stat: Tuple[int, int, int],
+        journal_id: Optional[str],
+    ) -> None:
+        self.buffer = buffer
+        self.stat = stat
+        self.journal_id = journal_id
+        #: Changes to the records in the index, where removed records are mapped to None
+        self.updates: Dict[str, Any] = {}
+        #: Install records that have been materialized, keyed by DAG hash
+        self.records: Dict[str, Any] = {}
+
+    @abc.abstractmethod
+    def keys(self) -> List[str]:
+        """Returns the DAG hashes of all the install records."""
+
+    @abc.abstractmethod
+    def raw(self, key: str) -> Optional[Dict[str, Any]]:
+        """Returns the dictionary of an install record, or None if there is no record for
+        the DAG hash passed as argument.
+        """
+
+    @abc.abstractmethod
+    def all_raw(self) -> Dict[str, Any]:
+        """Returns the dictionaries of all the install records, keyed by DAG hash. Records
+        that were already materialized are mapped to None.
+        """
+
+    def close(self) -> None:
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
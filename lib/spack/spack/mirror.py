@@ -20,6 +20,7 @@
 import urllib.parse
 from typing import List, Optional, Union
 
+import llnl.string
 import llnl.url
 import llnl.util.tty as tty
 from llnl.util.filesystem import mkdirp
@@ -592,9 +593,7 @@ def create(path, specs, skip_unstable_versions=False):
     specs = [s if isinstance(s, spack.spec.Spec) else spack.spec.Spec(s) for s in specs]
 
     mirror_cache, mirror_stats = mirror_cache_and_stats(path, skip_unstable_versions)
-    for spec in specs:
-        mirror_stats.next_spec(spec)
-        create_mirror_from_package_object(spec.package, mirror_cache, mirror_stats)
+    create_mirror_from_package_objects([s.package for s in specs], mirror_cache, mirror_stats)
 
     return mirror_stats.stats()
 
@@ -689,6 +688,14 @@ def added(self, resource):
     def error(self):
         self.errors.add(self.current_spec)
 
+    def merge(self, other):
+        """Adds the statistics of another object to these ones"""
+        self._tally_current_spec()
+        other._tally_current_spec()
+        self.present.update(other.present)
+        self.new.update(other.new)
+        self.errors.update(other.errors)
+
 
 def create_mirror_from_package_object(pkg_obj, mirror_cache, mirror_stats):
     """Add a single package object to a mirror.
@@ -730,6 +737,39 @@ def create_mirror_from_package_object(pkg_obj, mirror_cache, mirror_stats):
     return True
 
 
+def create_mirror_from_package_objects(pkg_objs, mirror_cache, mirror_stats):
+    """Add many package objects to a mirror, fetching their sources concurrently.
+
+    Args:
+        pkg_objs (list): package objects to be added, with concrete versions
+        mirror_cache (spack.caches.MirrorCache): mirror where to add the specs
+        mirror_stats (spack.mirror.MirrorStats): statistics on the current mirror
+    """
+    import spack.stage  # circular import
+
+    # Each package has its own statistics while it is being fetched, which are then merged
+    # in the order of the input
+    stats = {}
+    for pkg_obj in pkg_objs:
+        stats[id(pkg_obj)] = MirrorStats()
+        stats[id(pkg_obj)].next_spec(pkg_obj.spec)
+
+    def cache_mirror(pkg_obj):
+        # Includes patches and resources
+        with pkg_obj.stage as pkg_stage:
+            pkg_stage.cache_mirror(mirror_cache, stats[id(pkg_obj)])
+
+    tty.msg(f"Adding {llnl.string.plural(len(pkg_objs), 'package')} to mirror")
+    for pkg_obj, error in spack.stage.FetchScheduler().run(pkg_objs, cache_mirror):
+        if error is not None:
+            if spack.config.get("config:debug"):
+                traceback.print_exception(type(error), error, error.__traceback__)
+            stats[id(pkg_obj)].error()
+
+    for pkg_obj in pkg_objs:
+        mirror_stats.merge(stats[id(pkg_obj)])
+
+
 def require_mirror_name(mirror_name):
     """Find a mirror by name and raise if it does not exist"""
     mirror = spack.mirror.MirrorCollection().get(mirror_name)
@@ -0,0 +1,192 @@
+# Copyright 2013-2024 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+"""Content-addressed store of the files of installed packages.
+
+When ``config:install_tree:deduplicate`` is set, the regular files of each new installation
+are replaced by hard links to objects named after the sha256 digest of their contents. Identical
+files in different prefixes then share the same inode, so they are stored on disk, and cached in
+memory, only once.
+
+Since a file modified in place would change in all the prefixes sharing it, objects are made
+read-only, and the contents of an object are checked again before another file is linked to it.
+
+The number of links of an object is the number of files sharing it, plus one. Objects with a
+single link are not used by any installation anymore, and are removed by :meth:`prune`.
+"""
+import hashlib
+import os
+import shutil
+import stat
+from typing import Optional, Tuple
+
+import llnl.util.tty as tty
+from llnl.util.filesystem import mkdirp
+
+
+def _file_digest(path: str, block_size: int = 1048576) -> str:
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            data = f.read(block_size)
+            if not data:
+                break
+            hasher.update(data)
+    return hasher.hexdigest()
+
+
+def _read_only_mode(mode: int) -> int:
+    return stat.S_IMODE(mode) & ~(stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH)
+
+
+def copy_unshared(src: str, dst: str, *, follow_symlinks: bool = True) -> str:
+    """Copies a file like ``shutil.copy2``, but makes the copy writable by its owner, since the
+    source may be a read-only object shared with other prefixes."""
+    shutil.copy2(src, dst, follow_symlinks=follow_symlinks)
+    s = os.lstat(dst)
+    if stat.S_ISREG(s.st_mode) and not s.st_mode & stat.S_IWUSR:
+        os.chmod(dst, stat.S_IMODE(s.st_mode) | stat.S_IWUSR)
+    return dst
+
+
+class ObjectStore:
+    """Directory of files named after their contents, which are hard linked from the prefixes
+    of installed packages.
+
+    Args:
+        root: directory containing the objects. It must be on the same filesystem as the files
+            to be deduplicated, since hard links cannot cross filesystems.
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+        self._device: Optional[int] = None
+
+    @property
+    def device(self) -> int:
+        """Device of the filesystem containing the objects"""
+        if self._device is None:
+            mkdirp(self.root)
+            self._device = os.stat(self.root).st_dev
+        return self._device
+
+    def object_path(self, digest: str, stat_result: os.stat_result) -> str:
+        """Returns the path of the object for a file with the given digest and status."""
+        # Permissions and ownership are attributes of the inode, so files are shared only when
+        # they agree on those too.
+        name = "{}-{:o}-{}-{}".format(
+            digest[2:], stat.S_IMODE(stat_result.st_mode), stat_result.st_uid, stat_result.st_gid
+        )
+        return os.path.join(self.root, digest[:2], name)
+
+    def add(self, path: str) -> bool:
+        """Replaces a regular file with a hard link to the object with the same contents, or
+        makes the file itself the object when there is none yet. In both cases the file becomes
+        read-only.
+
+        Empty files, and files that already have other hard links, are left untouched.
+
+        Returns:
+            True if the file was replaced by a link to an existing object
+        """
+        s = os.lstat(path)
+        if (
+            not stat.S_ISREG(s.st_mode)
+            or s.st_nlink > 1
+            or s.st_size == 0
+            or s.st_dev != self.device
+        ):
+            return False
+
+        # Make the file read-only before hashing it, so that it can't be modified afterwards
+        # without changing its permissions
+        mode = _read_only_mode(s.st_mode)
+        if mode != stat.S_IMODE(s.st_mode):
+            os.chmod(path, mode)
+            s = os.lstat(path)
+
+        digest = _file_digest(path)
+        object_path = self.object_path(digest, s)
+        mkdirp(os.path.dirname(object_path))
+        try:
+            os.link(path, object_path)
+            return False
+        except FileExistsError:
+            pass
+
+        # An object that was made writable may have been modified in place, in which case the
+        # file replaces it, so that the prefixes linked to it later are not affected
+        if not self._is_intact(object_path, digest, mode):
+            tty.debug(f"Replacing modified object {object_path}")
+            tmp_path = f"{object_path}.dedup-{os.getpid()}"
+            os.link(path, tmp_path)
+            try:
+                os.replace(tmp_path, object_path)
+            except OSError:
+                os.unlink(tmp_path)
+                raise
+            return False
+
+        # Replace the file atomically, so that it is never missing from the prefix
+        tmp_path = f"{path}.dedup-{os.getpid()}"
+        os.link(object_path, tmp_path)
+        try:
+            os.replace(tmp_path, path)
+        except OSError:
+            os.unlink(tmp_path)
+            raise
+        return True
+
+    def _is_intact(self, object_path: str, digest: str, mode: int) -> bool:
+        """Whether an object is still read-only and has the contents it's named after."""
+        try:
+            s = os.lstat(object_path)
+            if not stat.S_ISREG(s.st_mode) or stat.S_IMODE(s.st_mode) != mode:
+                return False
+            return _file_digest(object_path) == digest
+        except OSError:
+            return False
+
+    def add_prefix(self, prefix: str, skip: Tuple[str, ...] = ()) -> Tuple[int, int]:
+        """Deduplicates all the regular files in a prefix, except those in the ``skip``
+        subdirectories of the prefix.
+
+        Returns:
+            The number of files replaced by links to existing objects, and their total size
+        """
+        count, size = 0, 0
+        for root, dirs, files in os.walk(prefix):
+            if root == prefix:
+                dirs[:] = [d for d in dirs if d not in skip]
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    if self.add(path):
+                        count += 1
+                        size += os.lstat(path).st_size
+                except OSError as e:
+                    tty.debug(f"Cannot deduplicate {path}: {e}")
+        return count, size
+
+    def prune(self) -> Tuple[int, int]:
+        """Removes the objects that are not linked from any prefix.
+
+        Returns:
+            The number of objects removed, and their total size
+        """
+        count, size = 0, 0
+        if not os.path.isdir(self.root):
+            return count, size
+        for root, _, files in os.walk(self.root):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    s = os.lstat(path)
+                    if s.st_nlink == 1:
+                        os.unlink(path)
+                        count += 1
+                        size += s.st_size
+                except OSError as e:
+                    tty.debug(f"Cannot remove object {path}: {e}")
+        return count, size
@@ -3,6 +3,7 @@
 #
 # SPDX-License-Identifier: (Apache-2.0 OR MIT)
 
+import concurrent.futures
 import hashlib
 import json
 import os
@@ -11,7 +12,7 @@
 import urllib.parse
 import urllib.request
 from http.client import HTTPResponse
-from typing import List, NamedTuple, Tuple
+from typing import BinaryIO, List, NamedTuple, Optional, Tuple
 from urllib.request import Request
 
 import llnl.util.tty as tty
@@ -48,6 +49,11 @@ def _log_upload_progress(digest: Digest, size: int, elapsed: float):
     tty.info(f"Uploaded {digest} ({elapsed:.2f}s, {size / elapsed / 1024 / 1024:.2f} MB/s)")
 
 
+def transfer_jobs() -> int:
+    """Maximum number of concurrent requests to an OCI registry"""
+    return spack.config.get("config:oci_transfer_jobs", 8)
+
+
 def with_query_param(url: str, param: str, value: str) -> str:
     """Add a query parameter to a URL
 
@@ -112,14 +118,16 @@ def upload_blob(
     digest: Digest,
     force: bool = False,
     small_file_size: int = 0,
+    chunk_size: Optional[int] = None,
     _urlopen: spack.oci.opener.MaybeOpen = None,
 ) -> bool:
     """Uploads a blob to an OCI registry
 
-    We only do monolithic uploads, even though it's very simple to do chunked.
-    Observed problems with chunked uploads:
+    By default we only do monolithic uploads. Observed problems with chunked uploads:
     (1) it's slow, many sequential requests, (2) some registries set an *unknown*
-    max chunk size, and the spec doesn't say how to obtain it
+    max chunk size, and the spec doesn't say how to obtain it. Still, chunked uploads
+    can be enabled for large blobs, for registries or proxies that limit the size of
+    a single request.
 
     Args:
         ref: The image reference.
@@ -131,12 +139,18 @@ def upload_blob(
             Some registries do no support single requests, and others
             do not specify what size they support in single POST.
             For now this feature is disabled by default (0KB)
+        chunk_size: Files larger than this are uploaded in chunks of this size,
+            with PATCH requests in a single upload session. Defaults to
+            ``config:oci_upload_chunk_size``, where 0 disables chunked uploads.
 
     Returns:
         True if the blob was uploaded, False if it already existed.
     """
     _urlopen = _urlopen or spack.oci.opener.urlopen
 
+    if chunk_size is None:
+        chunk_size = spack.config.get("config:oci_upload_chunk_size", 0)
+
     # Test if the blob already exists, if so, early exit.
     if not force and blob_exists(ref, digest, _urlopen):
         return False
@@ -170,21 +184,33 @@ def upload_blob(
             _log_upload_progress(digest, file_size, time.time() - start)
             return True
 
-        # Otherwise, do another PUT request.
+        # Otherwise, upload to the session, and close it with a PUT request.
         spack.oci.opener.ensure_status(request, response, 202)
         assert "Location" in response.headers
 
         # Can be absolute or relative, joining handles both
-        upload_url = with_query_param(
-            ref.endpoint(response.headers["Location"]), "digest", str(digest)
-        )
-        f.seek(0)
+        location = ref.endpoint(response.headers["Location"])
+
+        if 0 < chunk_size < file_size:
+            # Registries may require a minimum chunk size
+            min_chunk_size = int(response.headers.get("OCI-Chunk-Min-Length") or 0)
+            location = _upload_chunks(
+                ref, f, location, max(chunk_size, min_chunk_size), _urlopen=_urlopen
+            )
+            data, headers = None, {"Content-Length": "0"}
+        else:
+            f.seek(0)
+            data = f
+            headers = {
+                "Content-Type": "application/octet-stream",
+                "Content-Length": str(file_size),
+            }
 
         request = Request(
-            url=upload_url,
+            url=with_query_param(location, "digest", str(digest)),
             method="PUT",
-            data=f,
-            headers={"Content-Type": "application/octet-stream", "Content-Length": str(file_size)},
+            data=data,
+            headers=headers,
         )
 
         response = _urlopen(request)
@@ -196,6 +222,40 @@ def upload_blob(
     return True
 
 
+def _upload_chunks(
+    ref: ImageReference,
+    f: BinaryIO,
+    location: str,
+    chunk_size: int,
+    _urlopen: spack.oci.opener.OpenType,
+) -> str:
+    """Uploads a file in chunks to an upload session, and returns the location where the
+    session is closed."""
+    f.seek(0)
+    offset = 0
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            return location
+        request = Request(
+            url=location,
+            method="PATCH",
+            data=chunk,
+            headers={
+                "Content-Type": "application/octet-stream",
+                "Content-Length": str(len(chunk)),
+                "Content-Range": f"{offset}-{offset + len(chunk) - 1}",
+            },
+        )
+        response = _urlopen(request)
+        spack.oci.opener.ensure_status(request, response, 202)
+        response.close()
+
+        # The session may continue at a different location
+        location = ref.endpoint(response.headers["Location"])
+        offset += len(chunk)
+
+
 def upload_manifest(
     ref: ImageReference,
     manifest: dict,
@@ -280,32 +340,36 @@ def copy_missing_layers(
     # Get layer digests
     digests = [Digest.from_string(layer["digest"]) for layer in manifest["layers"]]
 
-    # Filter digests that are don't exist in the registry
-    missing_digests = [
-        digest for digest in digests if not blob_exists(dst, digest, _urlopen=_urlopen)
-    ]
-
-    if not missing_digests:
-        return manifest, config
-
-    # Pull missing blobs, push them to the registry
-    with spack.stage.StageComposite.from_iterable(
-        make_stage(url=src.blob_url(digest), digest=digest, _urlopen=_urlopen)
-        for digest in missing_digests
-    ) as stages:
-        stages.fetch()
-        stages.check()
-        stages.cache_local()
-
-        for stage, digest in zip(stages, missing_digests):
-            # No need to check existince again, force=True.
-            upload_blob(
-                dst, file=stage.save_filename, force=True, digest=digest, _urlopen=_urlopen
-            )
+    with concurrent.futures.ThreadPoolExecutor(max_workers=transfer_jobs()) as executor:
+        # Filter digests that are don't exist in the registry
+        exists = executor.map(lambda digest: blob_exists(dst, digest, _urlopen=_urlopen), digests)
+        missing_digests = [digest for digest, found in zip(digests, exists) if not found]
+
+        # Pull missing blobs, push them to the registry
+        for _ in executor.map(
+            lambda digest: _copy_blob(src, dst, digest, _urlopen=_urlopen), missing_digests
+        ):
+            pass
 
     return manifest, config
 
 
+def _copy_blob(
+    src: ImageReference,
+    dst: ImageReference,
+    digest: Digest,
+    _urlopen: spack.oci.opener.MaybeOpen = None,
+) -> None:
+    """Copies a blob from one registry to another, through the local cache"""
+    with make_stage(url=src.blob_url(digest), digest=digest, _urlopen=_urlopen) as stage:
+        stage.fetch()
+        stage.check()
+        stage.cache_local()
+
+        # No need to check existince again, force=True.
+        upload_blob(dst, file=stage.save_filename, force=True, digest=digest, _urlopen=_urlopen)
+
+
 #: OCI manifest content types (including docker type)
 manifest_content_type = [
     "application/vnd.oci.image.manifest.v1+json",
@@ -8,6 +8,7 @@
 import base64
 import json
 import re
+import threading
 import time
 import urllib.error
 import urllib.parse
@@ -242,6 +243,10 @@ def __init__(self, credentials_provider: Callable[[str], Optional[UsernamePasswo
         # Cached bearer tokens for a given domain.
         self.cached_tokens: Dict[str, str] = {}
 
+        # Serializes logins, so that concurrent requests that are unauthorized at the
+        # same time share a single bearer token.
+        self._login_lock = threading.Lock()
+
     def obtain_bearer_token(self, registry: str, challenge: RealmServiceScope, timeout) -> str:
         # See https://docs.docker.com/registry/spec/auth/token/
 
@@ -344,25 +349,33 @@ def http_error_401(self, req: Request, fp, code, msg, headers):
                 fp,
             )
 
-        # Get the token from the auth handler
-        try:
-            token = self.obtain_bearer_token(
-                registry=urllib.parse.urlparse(req.get_full_url()).netloc,
-                challenge=challenge,
-                timeout=req.timeout,
-            )
-        except ValueError as e:
-            raise spack.util.web.DetailedHTTPError(
-                req,
-                code,
-                f"Cannot login to registry, failed to obtain bearer token: {e}",
-                headers,
-                fp,
-            ) from e
+        registry = urllib.parse.urlparse(req.get_full_url()).netloc
+
+        with self._login_lock:
+            # Another thread may have obtained a new token in the meantime, try that first
+            token = self.cached_tokens.get(registry)
+            sent = req.unredirected_hdrs.get("Authorization")
+            fresh_token = token is not None and sent != f"Bearer {token}"
+
+            # Get the token from the auth handler
+            if not fresh_token:
+                try:
+                    token = self.obtain_bearer_token(
+                        registry=registry, challenge=challenge, timeout=req.timeout
+                    )
+                except ValueError as e:
+                    raise spack.util.web.DetailedHTTPError(
+                        req,
+                        code,
+                        f"Cannot login to registry, failed to obtain bearer token: {e}",
+                        headers,
+                        fp,
+                    ) from e
 
         # Add the token to the request
         req.add_unredirected_header("Authorization", f"Bearer {token}")
-        setattr(req, "login_attempted", True)
+        if not fresh_token:
+            setattr(req, "login_attempted", True)
 
         return self.parent.open(req, timeout=req.timeout)
 
@@ -398,7 +411,7 @@ def create_opener():
     opener = urllib.request.OpenerDirector()
     for handler in [
         urllib.request.UnknownHandler(),
-        urllib.request.HTTPSHandler(context=spack.util.web.ssl_create_default_context()),
+        spack.util.web.KeepAliveHTTPSHandler(context=spack.util.web.ssl_create_default_context()),
         spack.util.web.SpackHTTPDefaultErrorHandler(),
         urllib.request.HTTPRedirectHandler(),
         urllib.request.HTTPErrorProcessor(),
@@ -2,12 +2,18 @@
 # Spack Project Developers. See the top-level COPYRIGHT file for details.
 #
 # SPDX-License-Identifier: (Apache-2.0 OR MIT)
+import atexit
 import collections
+import functools
 import itertools
+import multiprocessing
+import multiprocessing.pool
 import os
+import pickle
 import re
+import sys
 from collections import OrderedDict
-from typing import List, Optional
+from typing import Any, Callable, List, Optional, Tuple
 
 import macholib.mach_o
 import macholib.MachO
@@ -18,13 +24,16 @@
 from llnl.util.lang import memoized
 from llnl.util.symlink import readlink, symlink
 
+import spack.config
 import spack.paths
 import spack.platforms
 import spack.repo
 import spack.spec
 import spack.store
+import spack.util.cpus
 import spack.util.elf as elf
 import spack.util.executable as executable
+import spack.util.parallel
 import spack.util.path
 
 from .relocate_text import BinaryFilePrefixReplacer, TextFilePrefixReplacer
@@ -48,6 +57,101 @@ def __init__(self, file_path, root_path):
         )
 
 
+#: Minimum number of files relocated by each worker, since starting workers has a cost
+MIN_FILES_PER_RELOCATION_JOB = 32
+
+
+def _relocate_batch(relocate_fn: Callable[[str], bool], files: List[str]):
+    """Relocates files one after the other, and returns the files that were changed, and
+    the files that failed together with their error.
+    """
+    changed, errors = [], []
+    for path in files:
+        try:
+            if relocate_fn(path):
+                changed.append(path)
+        except Exception as e:
+            try:
+                # Errors are sent back from worker processes
+                pickle.loads(pickle.dumps(e))
+            except Exception:
+                e = RuntimeError(str(spack.util.parallel.ErrorFromWorker(*sys.exc_info())))
+            errors.append((path, e))
+    return changed, errors
+
+
+def _init_relocation_worker(configuration) -> None:
+    spack.config.CONFIG = configuration
+
+
+#: Pool of worker processes relocating files, with the process that owns it, its number of
+#: workers and the configuration they use. Starting workers is expensive, since they are not
+#: forked from this process, so the pool is reused as long as the configuration doesn't change.
+_RELOCATION_POOL: Optional[Tuple[int, int, Any, multiprocessing.pool.Pool]] = None
+
+
+def _terminate_relocation_pool() -> None:
+    global _RELOCATION_POOL
+    if _RELOCATION_POOL is not None and _RELOCATION_POOL[0] == os.getpid():
+        _RELOCATION_POOL[3].terminate()
+    _RELOCATION_POOL = None
+
+
+atexit.register(_terminate_relocation_pool)
+
+
+def _relocation_pool(jobs: int) -> multiprocessing.pool.Pool:
+    """Returns a pool of worker processes relocating files.
+
+    Workers are not forked from the current process, which may have other threads, e.g. the
+    ones downloading binary packages during an installation, so they use the configuration of
+    the current process passed at startup.
+    """
+    global _RELOCATION_POOL
+    configuration = spack.config.CONFIG
+    if _RELOCATION_POOL is not None:
+        pid, pool_jobs, pool_configuration, pool = _RELOCATION_POOL
+        if pid == os.getpid() and pool_jobs == jobs and pool_configuration is configuration:
+            return pool
+        _terminate_relocation_pool()
+
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    pool = multiprocessing.get_context(method).Pool(
+        jobs, initializer=_init_relocation_worker, initargs=(configuration,)
+    )
+    _RELOCATION_POOL = (os.getpid(), jobs, configuration, pool)
+    return pool
+
+
+def _relocate_files(relocate_fn: Callable[[str], bool], files: List[str]) -> List[str]:
+    """Calls ``relocate_fn`` on each file, and returns the files for which it returned True.
+
+    When there are enough files, they are relocated in batches by a bounded pool of worker
+    processes. All the files are processed before raising the error of the first file that
+    failed.
+    """
+    max_jobs = spack.util.cpus.determine_number_of_jobs(parallel=True)
+    jobs = min(max_jobs, len(files) // MIN_FILES_PER_RELOCATION_JOB)
+    if jobs <= 1:
+        changed, errors = _relocate_batch(relocate_fn, files)
+    else:
+        # A few batches per worker, to balance files of different sizes
+        size = -(-len(files) // (4 * jobs))
+        batches = [(relocate_fn, files[i : i + size]) for i in range(0, len(files), size)]
+        changed, errors = [], []
+        for batch_changed, batch_errors in _relocation_pool(max_jobs).starmap(
+            _relocate_batch, batches
+        ):
+            changed.extend(batch_changed)
+            errors.extend(batch_errors)
+
+    for path, error in errors[1:]:
+        tty.debug(f"Failed to relocate {path}: {error}")
+    if errors:
+        raise errors[0][1]
+    return changed
+
+
 @memoized
 def _patchelf() -> Optional[executable.Executable]:
     """Return the full path to the patchelf binary, if available, else None."""
@@ -243,10 +347,12 @@ def modify_macho_object(cur_path, rpaths, deps, idpath, paths_to_paths):
     original dependency paths
     original id path if a mach-o library
     dictionary mapping paths in old install layout to new install layout
+    Output
+    whether the binary was modified
     """
     # avoid error message for libgcc_s
     if "libgcc_" in cur_path:
-        return
+        return False
     args = []
 
     if idpath:
@@ -275,7 +381,7 @@ def modify_macho_object(cur_path, rpaths, deps, idpath, paths_to_paths):
         install_name_tool = executable.Executable("install_name_tool")
         install_name_tool(*args)
 
-    return
+    return bool(args)
 
 
 def modify_object_macholib(cur_path, paths_to_paths):
@@ -287,6 +393,8 @@ def modify_object_macholib(cur_path, paths_to_paths):
     Inputs
     mach-o binary to be modified
     dictionary mapping paths in old install layout to new install layout
+    Output
+    whether the binary was modified
     """
 
     dll = macholib.MachO.MachO(cur_path)
@@ -301,9 +409,9 @@ def modify_object_macholib(cur_path, paths_to_paths):
         f.flush()
         f.close()
     except Exception:
-        pass
+        return False
 
-    return
+    return True
 
 
 def macholib_get_paths(cur_path):
@@ -405,12 +513,15 @@ def relocate_macho_binaries(
     with the replacement paths queried from the dictionary mapping old layout
     prefixes to hashes and the dictionary mapping hashes to the new layout
     prefixes.
-    """
 
+    Returns the binaries that were modified.
+    """
+    modified = []
     for path_name in path_names:
         # Corner case where macho object file ended up in the path name list
         if path_name.endswith(".o"):
             continue
+        changed = False
         if rel:
             # get the relativized paths
             rpaths, deps, idpath = macholib_get_paths(path_name)
@@ -421,9 +532,9 @@ def relocate_macho_binaries(
             rel_to_orig = macho_make_paths_normal(orig_path_name, rpaths, deps, idpath)
             # replace the relativized paths with normalized paths
             if is_macos:
-                modify_macho_object(path_name, rpaths, deps, idpath, rel_to_orig)
+                changed |= modify_macho_object(path_name, rpaths, deps, idpath, rel_to_orig)
             else:
-                modify_object_macholib(path_name, rel_to_orig)
+                changed |= modify_object_macholib(path_name, rel_to_orig)
             # get the normalized paths in the mach-o binary
             rpaths, deps, idpath = macholib_get_paths(path_name)
             # get the mapping of paths in old prefix to path in new prefix
@@ -432,9 +543,9 @@ def relocate_macho_binaries(
             )
             # replace the old paths with new paths
             if is_macos:
-                modify_macho_object(path_name, rpaths, deps, idpath, paths_to_paths)
+                changed |= modify_macho_object(path_name, rpaths, deps, idpath, paths_to_paths)
             else:
-                modify_object_macholib(path_name, paths_to_paths)
+                changed |= modify_object_macholib(path_name, paths_to_paths)
             # get the new normalized path in the mach-o binary
             rpaths, deps, idpath = macholib_get_paths(path_name)
             # get the mapping of paths to relative paths in the new prefix
@@ -443,9 +554,9 @@ def relocate_macho_binaries(
             )
             # replace the new paths with relativized paths in the new prefix
             if is_macos:
-                modify_macho_object(path_name, rpaths, deps, idpath, paths_to_paths)
+                changed |= modify_macho_object(path_name, rpaths, deps, idpath, paths_to_paths)
             else:
-                modify_object_macholib(path_name, paths_to_paths)
+                changed |= modify_object_macholib(path_name, paths_to_paths)
         else:
             # get the paths in the old prefix
             rpaths, deps, idpath = macholib_get_paths(path_name)
@@ -455,9 +566,12 @@ def relocate_macho_binaries(
             )
             # replace the old paths with new paths
             if is_macos:
-                modify_macho_object(path_name, rpaths, deps, idpath, paths_to_paths)
+                changed |= modify_macho_object(path_name, rpaths, deps, idpath, paths_to_paths)
             else:
-                modify_object_macholib(path_name, paths_to_paths)
+                changed |= modify_object_macholib(path_name, paths_to_paths)
+        if changed:
+            modified.append(path_name)
+    return modified
 
 
 def _transform_rpaths(orig_rpaths, orig_root, new_prefixes):
@@ -495,21 +609,31 @@ def _transform_rpaths(orig_rpaths, orig_root, new_prefixes):
 
 def new_relocate_elf_binaries(binaries, prefix_to_prefix):
     """Take a list of binaries, and an ordered dictionary of
-    prefix to prefix mapping, and update the rpaths accordingly."""
+    prefix to prefix mapping, and update the rpaths accordingly.
+
+    Returns the binaries that could not be updated in place, and were
+    rewritten by patchelf instead."""
 
     # Transform to binary string
     prefix_to_prefix = OrderedDict(
         (k.encode("utf-8"), v.encode("utf-8")) for (k, v) in prefix_to_prefix.items()
     )
 
-    for path in binaries:
-        try:
-            elf.substitute_rpath_and_pt_interp_in_place_or_raise(path, prefix_to_prefix)
-        except elf.ElfCStringUpdatesFailed as e:
-            # Fall back to `patchelf --set-rpath ... --set-interpreter ...`
-            rpaths = e.rpath.new_value.decode("utf-8").split(":") if e.rpath else []
-            interpreter = e.pt_interp.new_value.decode("utf-8") if e.pt_interp else None
-            _set_elf_rpaths_and_interpreter(path, rpaths=rpaths, interpreter=interpreter)
+    return _relocate_files(
+        functools.partial(_relocate_elf_binary, prefix_to_prefix=prefix_to_prefix), binaries
+    )
+
+
+def _relocate_elf_binary(path, prefix_to_prefix):
+    try:
+        elf.substitute_rpath_and_pt_interp_in_place_or_raise(path, prefix_to_prefix)
+        return False
+    except elf.ElfCStringUpdatesFailed as e:
+        # Fall back to `patchelf --set-rpath ... --set-interpreter ...`
+        rpaths = e.rpath.new_value.decode("utf-8").split(":") if e.rpath else []
+        interpreter = e.pt_interp.new_value.decode("utf-8") if e.pt_interp else None
+        _set_elf_rpaths_and_interpreter(path, rpaths=rpaths, interpreter=interpreter)
+        return True
 
 
 def relocate_elf_binaries(
@@ -637,10 +761,12 @@ def relocate_text(files, prefixes):
         files (list): Text files to be relocated
         prefixes (OrderedDict): String prefixes which need to be changed
     """
-    TextFilePrefixReplacer.from_strings_or_bytes(prefixes).apply(files)
+    replacer = TextFilePrefixReplacer.from_strings_or_bytes(prefixes)
+    if not replacer.is_noop:
+        _relocate_files(replacer.apply_to_filename, files)
 
 
-def relocate_text_bin(binaries, prefixes):
+def relocate_text_bin(binaries, prefixes, offsets=None):
     """Replace null terminated path strings hard-coded into binaries.
 
     The new install prefix must be shorter than the original one.
@@ -648,11 +774,27 @@ def relocate_text_bin(binaries, prefixes):
     Args:
         binaries (list): binaries to be relocated
         prefixes (OrderedDict): String prefixes which need to be changed.
+        offsets (dict): optional mapping from some of the binaries to the offsets of all the
+            occurrences of the prefixes in them. Those binaries are only patched at these
+            offsets, instead of being scanned entirely.
 
     Raises:
       spack.relocate_text.BinaryTextReplaceError: when the new path is longer than the old path
     """
-    return BinaryFilePrefixReplacer.from_strings_or_bytes(prefixes).apply(binaries)
+    replacer = BinaryFilePrefixReplacer.from_strings_or_bytes(prefixes)
+    if replacer.is_noop:
+        return []
+    if not offsets:
+        return _relocate_files(replacer.apply_to_filename, binaries)
+    return _relocate_files(
+        functools.partial(_relocate_binary_text, replacer=replacer, offsets=offsets), binaries
+    )
+
+
+def _relocate_binary_text(path, replacer, offsets):
+    if path in offsets:
+        return replacer.apply_at_offsets(path, offsets[path])
+    return replacer.apply_to_filename(path)
 
 
 def is_binary(filename):
@@ -8,7 +8,7 @@
 
 import re
 from collections import OrderedDict
-from typing import Dict, Union
+from typing import Dict, Iterable, List, Union
 
 import spack.error
 
@@ -39,6 +39,32 @@ def utf8_paths_to_single_binary_regex(prefixes):
     return _byte_strings_to_single_binary_regex(p.encode("utf-8") for p in prefixes)
 
 
+def find_prefix_offsets(filename: str, prefixes: Iterable[Prefix], chunk_size=2**22) -> List[int]:
+    """Returns the offsets in a file of all the occurrences of the given prefixes, including
+    those that overlap, reading the file in chunks of ``chunk_size`` bytes."""
+    byte_prefixes = [encode_path(p) for p in prefixes]
+    if not byte_prefixes:
+        return []
+    regex = re.compile(b"(?=%s)" % b"|".join(re.escape(p) for p in byte_prefixes))
+    overlap = max(len(p) for p in byte_prefixes) - 1
+    offsets = []
+    with open(filename, "rb") as f:
+        offset, data, eof = 0, b"", False
+        while not eof:
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            data += chunk
+
+            # Occurrences starting at or after this position may extend into the next chunk
+            limit = len(data) if eof else max(len(data) - overlap, 0)
+            for match in regex.finditer(data):
+                if match.start() >= limit:
+                    break
+                offsets.append(offset + match.start())
+            offset, data = offset + limit, data[limit:]
+    return offsets
+
+
 def filter_identity_mappings(prefix_to_prefix):
     """Drop mappings that are not changed."""
     # NOTE: we don't guard against the following case:
@@ -134,17 +160,24 @@ def _apply_to_file(self, f):
 
 
 class BinaryFilePrefixReplacer(PrefixReplacer):
-    def __init__(self, prefix_to_prefix, suffix_safety_size=7):
+    def __init__(self, prefix_to_prefix, suffix_safety_size=7, chunk_size=2**22):
         """
         prefix_to_prefix (OrderedDict): OrderedDictionary where the keys are
             bytes representing the old prefixes and the values are the new
         suffix_safety_size (int): in case of null terminated strings, what size
             of the suffix should remain to avoid aliasing issues?
+        chunk_size (int): number of bytes read from the file at a time
         """
         assert suffix_safety_size >= 0
+        assert chunk_size > 0
         super().__init__(prefix_to_prefix)
         self.suffix_safety_size = suffix_safety_size
+        self.chunk_size = chunk_size
         self.regex = self.binary_text_regex(self.prefix_to_prefix.keys(), suffix_safety_size)
+        # Longest possible match: a prefix followed by the lookahead for a null terminator
+        self.max_match_size = (
+            max((len(p) for p in self.prefix_to_prefix), default=0) + suffix_safety_size + 1
+        )
 
     @classmethod
     def binary_text_regex(cls, binary_prefixes, suffix_safety_size=7):
@@ -205,58 +238,118 @@ def _apply_to_file(self, f):
         """
         assert f.tell() == 0
 
-        # We *could* read binary data in chunks to avoid loading all in memory,
-        # but it's nasty to deal with matches across boundaries, so let's stick to
-        # something simple.
-
-        modified = True
-
-        for match in self.regex.finditer(f.read()):
-            # The matching prefix (old) and its replacement (new)
-            old = match.group(1)
-            new = self.prefix_to_prefix[old]
-
-            # Did we find a trailing null within a N + 1 bytes window after the prefix?
-            null_terminated = match.end(0) > match.end(1)
-
-            # Suffix string length, excluding the null byte
-            # Only makes sense if null_terminated
-            suffix_strlen = match.end(0) - match.end(1) - 1
-
-            # How many bytes are we shrinking our string?
-            bytes_shorter = len(old) - len(new)
-
-            # We can't make strings larger.
-            if bytes_shorter < 0:
-                raise CannotGrowString(old, new)
-
-            # If we don't know whether this is a null terminated C-string (we're looking
-            # only N + 1 bytes ahead), or if it is and we have a common suffix, we can
-            # simply pad with leading dir separators.
-            elif (
-                not null_terminated
-                or suffix_strlen >= self.suffix_safety_size  # == is enough, but let's be defensive
-                or old[-self.suffix_safety_size + suffix_strlen :]
-                == new[-self.suffix_safety_size + suffix_strlen :]
-            ):
-                replacement = b"/" * bytes_shorter + new
-
-            # If it *was* null terminated, all that matters is that we can leave N bytes
-            # of old suffix in place. Note that > is required since we also insert an
-            # additional null terminator.
-            elif bytes_shorter > self.suffix_safety_size:
-                replacement = new + match.group(2)  # includes the trailing null
-
-            # Otherwise... we can't :(
-            else:
-                raise CannotShrinkCString(old, new, match.group()[:-1])
-
-            f.seek(match.start())
-            f.write(replacement)
+        modified = False
+
+        for offset, match in self._matches(f):
+            f.seek(offset + match.start())
+            f.write(self._replacement(match))
             modified = True
 
         return modified
 
+    def _replacement(self, match):
+        """Returns the bytes that replace a match of the regex, or raises if the prefix
+        cannot be replaced without changing the size of the file."""
+        # The matching prefix (old) and its replacement (new)
+        old = match.group(1)
+        new = self.prefix_to_prefix[old]
+
+        # Did we find a trailing null within a N + 1 bytes window after the prefix?
+        null_terminated = match.end(0) > match.end(1)
+
+        # Suffix string length, excluding the null byte
+        # Only makes sense if null_terminated
+        suffix_strlen = match.end(0) - match.end(1) - 1
+
+        # How many bytes are we shrinking our string?
+        bytes_shorter = len(old) - len(new)
+
+        # We can't make strings larger.
+        if bytes_shorter < 0:
+            raise CannotGrowString(old, new)
+
+        # If we don't know whether this is a null terminated C-string (we're looking
+        # only N + 1 bytes ahead), or if it is and we have a common suffix, we can
+        # simply pad with leading dir separators.
+        elif (
+            not null_terminated
+            or suffix_strlen >= self.suffix_safety_size  # == is enough, but let's be defensive
+            or old[-self.suffix_safety_size + suffix_strlen :]
+            == new[-self.suffix_safety_size + suffix_strlen :]
+        ):
+            replacement = b"/" * bytes_shorter + new
+
+        # If it *was* null terminated, all that matters is that we can leave N bytes
+        # of old suffix in place. Note that > is required since we also insert an
+        # additional null terminator.
+        elif bytes_shorter > self.suffix_safety_size:
+            replacement = new + match.group(2)  # includes the trailing null
+
+        # Otherwise... we can't :(
+        else:
+            raise CannotShrinkCString(old, new, match.group()[:-1])
+
+        return replacement
+
+    def _matches(self, f):
+        """Yields the matches of the regex in a file, together with the offset in the file
+        of the buffer they refer to, reading the file in chunks.
+
+        Whether the regex matches at some position depends only on the following
+        ``max_match_size`` bytes, so matches starting farther than that from the end of the
+        buffer are the same as in the entire file. The last ``max_match_size`` bytes, or
+        what follows the last match if that is longer, are carried over to the next chunk.
+        The file position is restored after each match, so that the caller can write
+        replacements, which never extend past the end of the match.
+        """
+        offset, data, eof = 0, b"", False
+        while not eof:
+            chunk = f.read(self.chunk_size)
+            eof = not chunk
+            data += chunk
+            position = f.tell()
+
+            # Matches starting after this position may extend into the next chunk
+            limit = len(data) if eof else len(data) - self.max_match_size
+            start = 0
+            for match in self.regex.finditer(data):
+                if match.start() > limit:
+                    break
+                yield offset, match
+                start = match.end()
+            f.seek(position)
+
+            start = max(start, limit + 1) if not eof else len(data)
+            offset, data = offset + start, data[start:]
+
+    def apply_at_offsets(self, filename: str, offsets: List[int]) -> bool:
+        """Like ``apply_to_filename``, but the regex is only matched at the given offsets in
+        the file, so that only the bytes around them are read. The offsets must include the
+        start of every occurrence of the prefixes in the file, as computed by
+        :func:`find_prefix_offsets`, otherwise some occurrences are not replaced.
+
+        Returns:
+            bool: True if file was modified
+        """
+        if self.is_noop:
+            return False
+
+        modified, end = False, 0
+        with open(filename, "rb+") as f:
+            for offset in sorted(offsets):
+                # Matches do not overlap, as when scanning the entire file
+                if offset < end:
+                    continue
+                f.seek(offset)
+                match = self.regex.match(f.read(self.max_match_size))
+                if not match:
+                    continue
+                f.seek(offset)
+                f.write(self._replacement(match))
+                end = offset + match.end()
+                modified = True
+        return modified
+
 
 class BinaryStringReplacementError(spack.error.SpackError):
     def __init__(self, file_path, old_len, new_len):
@@ -287,6 +380,10 @@ class CannotGrowString(BinaryTextReplaceError):
     def __init__(self, old, new):
         msg = "Cannot replace {!r} with {!r} because the new prefix is longer.".format(old, new)
         super().__init__(msg)
+        self.old, self.new = old, new
+
+    def __reduce__(self):
+        return CannotGrowString, (self.old, self.new)
 
 
 class CannotShrinkCString(BinaryTextReplaceError):
@@ -299,3 +396,7 @@ def __init__(self, old, new, full_old_string):
             old, new, full_old_string
         )
         super().__init__(msg)
+        self.old, self.new, self.full_old_string = old, new, full_old_string
+
+    def __reduce__(self):
+        return CannotShrinkCString, (self.old, self.new, self.full_old_string)
@@ -14,6 +14,7 @@
 import spack.binary_distribution as bindist
 import spack.error
 import spack.hooks
+import spack.object_store
 import spack.paths
 import spack.relocate as relocate
 import spack.stage
@@ -53,7 +54,13 @@ def rewire_node(spec, explicit):
     the splice. The resulting package is then 'installed.'"""
     tempdir = tempfile.mkdtemp()
     # copy anything installed to a temporary directory
-    shutil.copytree(spec.build_spec.prefix, os.path.join(tempdir, spec.dag_hash()))
+    # deduplicated files are read-only, but the copies are relocated
+    copy_function = (
+        spack.object_store.copy_unshared if spack.store.STORE.deduplicate else shutil.copy2
+    )
+    shutil.copytree(
+        spec.build_spec.prefix, os.path.join(tempdir, spec.dag_hash()), copy_function=copy_function
+    )
 
     spack.hooks.pre_install(spec)
     # compute prefix-to-prefix for every node from the build spec to the spliced
@@ -62,6 +62,14 @@
                 },
             },
             "os_compatible": {"type": "object", "additionalProperties": {"type": "array"}},
+            "cache": {
+                "type": "object",
+                "properties": {
+                    "facts": {"type": "boolean"},
+                    "results": {"type": "boolean"},
+                    "max_results": {"type": "integer", "minimum": 1},
+                },
+            },
         },
     }
 }
@@ -42,7 +42,7 @@
                     {
                         "type": "object",
                         "properties": union_dicts(
-                            {"root": {"type": "string"}},
+                            {"root": {"type": "string"}, "deduplicate": {"type": "boolean"}},
                             {
                                 "padded_length": {
                                     "oneOf": [
@@ -70,6 +70,13 @@
             "license_dir": {"type": "string"},
             "source_cache": {"type": "string"},
             "misc_cache": {"type": "string"},
+            "activation_cache": {
+                "type": "object",
+                "properties": {
+                    "enable": {"type": "boolean"},
+                    "max_entries": {"type": "integer", "minimum": 1},
+                },
+            },
             "environments_root": {"type": "string"},
             "connect_timeout": {"type": "integer", "minimum": 0},
             "verify_ssl": {"type": "boolean"},
@@ -83,9 +90,15 @@
             "dirty": {"type": "boolean"},
             "build_language": {"type": "string"},
             "build_jobs": {"type": "integer", "minimum": 1},
+            "binary_download_jobs": {"type": "integer", "minimum": 1},
+            "fetch_jobs": {"type": "integer", "minimum": 1},
+            "fetch_jobs_per_host": {"type": "integer", "minimum": 1},
+            "oci_transfer_jobs": {"type": "integer", "minimum": 1},
+            "oci_upload_chunk_size": {"type": "integer", "minimum": 0},
             "ccache": {"type": "boolean"},
             "concretizer": {"type": "string", "enum": ["original", "clingo"]},
             "db_lock_timeout": {"type": "integer", "minimum": 1},
+            "db_journal": {"type": "boolean"},
             "package_lock_timeout": {
                 "anyOf": [{"type": "integer", "minimum": 1}, {"type": "null"}]
             },
@@ -95,6 +108,7 @@
             "url_fetch_method": {"type": "string", "enum": ["urllib", "curl"]},
             "additional_external_search_paths": {"type": "array", "items": {"type": "string"}},
             "binary_index_ttl": {"type": "integer", "minimum": 0},
+            "binary_index_format": {"type": "string", "enum": ["json", "binary"]},
             "aliases": {"type": "object", "patternProperties": {r"\w[\w-]*": {"type": "string"}}},
         },
         "deprecatedProperties": {
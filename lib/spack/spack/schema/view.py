@@ -33,6 +33,7 @@
                             "select": {"type": "array", "items": {"type": "string"}},
                             "exclude": {"type": "array", "items": {"type": "string"}},
                             "projections": projections_scheme,
+                            "update_in_place": {"type": "boolean"},
                         },
                     }
                 },
@@ -8,6 +8,7 @@
 import enum
 import functools
 import itertools
+import json
 import os
 import pathlib
 import pprint
@@ -27,6 +28,7 @@
 
 import spack
 import spack.binary_distribution
+import spack.caches
 import spack.cmd
 import spack.compilers
 import spack.config
@@ -35,6 +37,7 @@
 import spack.directives
 import spack.environment as ev
 import spack.error
+import spack.hash_types as ht
 import spack.package_base
 import spack.package_prefs
 import spack.parser
@@ -42,6 +45,7 @@
 import spack.repo
 import spack.spec
 import spack.store
+import spack.target
 import spack.util.crypto
 import spack.util.elf
 import spack.util.libc
@@ -52,6 +56,7 @@
 import spack.version.git_ref_lookup
 from spack import traverse
 
+from . import cache as solver_cache
 from .core import (
     AspFunction,
     NodeArgument,
@@ -64,7 +69,7 @@
     parse_files,
     parse_term,
 )
-from .counter import FullDuplicatesCounter, MinimalDuplicatesCounter, NoDuplicatesCounter
+from .counter import Counter, FullDuplicatesCounter, MinimalDuplicatesCounter, NoDuplicatesCounter
 
 GitOrStandardVersion = Union[spack.version.GitVersion, spack.version.StandardVersion]
 
@@ -371,6 +376,9 @@ def __init__(self, specs, asp=None):
         # names of optimization criteria
         self.criteria = []
 
+        # names of the packages that could be part of the solution
+        self.possible_dependencies: Set[str] = set()
+
         # Abstract user requests
         self.abstract_specs = specs
 
@@ -789,6 +797,20 @@ def __hash__(self):
         return hash(self._key())
 
 
+def logic_program_files(setup: "SpackSolverSetup") -> List[str]:
+    """Returns the names of the logic program files needed to solve a problem."""
+    result = ["concretize.lp", "heuristic.lp", "display.lp"]
+    if not setup.concretize_everything:
+        result.append("when_possible.lp")
+
+    # Binary compatibility is based on libc on Linux, and on the os tag elsewhere
+    if using_libc_compatibility():
+        result.append("libc_compatibility.lp")
+    else:
+        result.append("os_compatibility.lp")
+    return result
+
+
 class PyclingoDriver:
     def __init__(self, cores=True):
         """Driver for the Python clingo interface.
@@ -834,8 +856,34 @@ def solve(self, setup, specs, reuse=None, output=None, control=None, allow_depre
             tty.debug("Ensuring basic dependencies {win-sdk, wgl} available")
             spack.bootstrap.core.ensure_winsdk_external_or_raise()
 
+        # The cache is keyed on inputs known before setup, so that a hit skips it entirely
+        cache, digest, node_counter = None, None, None
+        use_cache = output.out is None and not output.setup_only
+        if use_cache and spack.config.get("concretizer:cache:results", False):
+            timer.start("cache")
+            check_packages_exist(specs)
+            node_counter = _create_counter(specs, tests=setup.tests)
+            cache = result_cache()
+            digest = _solve_inputs_digest(
+                setup, specs, reuse or [], node_counter.possible_dependencies(), allow_deprecated
+            )
+            entry = cache.get(digest)
+            cached_result = None
+            if entry is not None:
+                cached_result = _result_from_cache_entry(specs, entry, reuse or [])
+            timer.stop("cache")
+
+            if cached_result is not None:
+                tty.debug(f"[RESULT CACHE] reusing the result of a previous solve: {digest}")
+                if output.timers:
+                    timer.write_tty()
+                    print()
+                return cached_result, timer, None
+
         timer.start("setup")
-        asp_problem = setup.setup(specs, reuse=reuse, allow_deprecated=allow_deprecated)
+        asp_problem = setup.setup(
+            specs, reuse=reuse, allow_deprecated=allow_deprecated, node_counter=node_counter
+        )
         if output.out is not None:
             output.out.write(asp_problem)
         if output.setup_only:
@@ -845,19 +893,10 @@ def solve(self, setup, specs, reuse=None, output=None, control=None, allow_depre
         timer.start("load")
         # Add the problem instance
         self.control.add("base", [], asp_problem)
-        # Load the file itself
+        # Load the files of the logic program
         parent_dir = os.path.dirname(__file__)
-        self.control.load(os.path.join(parent_dir, "concretize.lp"))
-        self.control.load(os.path.join(parent_dir, "heuristic.lp"))
-        self.control.load(os.path.join(parent_dir, "display.lp"))
-        if not setup.concretize_everything:
-            self.control.load(os.path.join(parent_dir, "when_possible.lp"))
-
-        # Binary compatibility is based on libc on Linux, and on the os tag elsewhere
-        if using_libc_compatibility():
-            self.control.load(os.path.join(parent_dir, "libc_compatibility.lp"))
-        else:
-            self.control.load(os.path.join(parent_dir, "os_compatibility.lp"))
+        for lp_file in logic_program_files(setup):
+            self.control.load(os.path.join(parent_dir, lp_file))
 
         timer.stop("load")
 
@@ -939,9 +978,158 @@ def on_model(model):
                 f"https://github.com/spack/spack/issues\n\t{unsolved_str}"
             )
 
+        if cache is not None and digest is not None:
+            cache.put(digest, _result_to_cache_entry(result, setup.reusable_and_possible))
+
         return result, timer, self.control.statistics
 
 
+#: Configuration sections used when building specs from an answer set
+_CACHE_SECTIONS = ("compilers", "concretizer", "packages")
+
+
+def result_cache() -> solver_cache.ResultCache:
+    """Returns the cache of solve results, configured according to the current configuration"""
+    max_entries = spack.config.get("concretizer:cache:max_results", 256)
+    return solver_cache.ResultCache(spack.caches.MISC_CACHE, max_entries=max_entries)
+
+
+def _solve_inputs_digest(
+    setup: "SpackSolverSetup",
+    specs: List[spack.spec.Spec],
+    reuse: List[spack.spec.Spec],
+    possible_dependencies: Set[str],
+    allow_deprecated: bool,
+) -> str:
+    """Returns a digest of all the inputs determining the result of a solve.
+
+    Only inputs that are known before setup are used: the input specs, the hashes of the
+    reusable specs, the logic program, the relevant configuration and host properties, and
+    the files in the directories of all the possible dependencies (which are used to compute
+    package hashes and patches).
+    """
+    parent_dir = os.path.dirname(__file__)
+    env = ev.active_environment()
+    dev_specs = env.dev_specs if env else {}
+    namespaces = {x.name: x.namespace for x in traverse.traverse_nodes(specs) if x.namespace}
+    platform = spack.platforms.host()
+    return solver_cache.inputs_digest(
+        spack.spack_version,
+        solver_cache.file_digest(__file__),
+        *(
+            solver_cache.file_digest(os.path.join(parent_dir, x))
+            for x in logic_program_files(setup)
+        ),
+        *(json.dumps(spack.config.get(x), sort_keys=True, default=str) for x in _CACHE_SECTIONS),
+        json.dumps(dev_specs, sort_keys=True, default=str),
+        platform,
+        platform.default,
+        platform.default_os,
+        sorted(platform.operating_sys),
+        archspec.cpu.host(),
+        spack.concretize.Concretizer().check_for_compiler_existence,
+        sorted(str(x) for x in all_libcs()),
+        setup.tests,
+        setup.concretize_everything,
+        allow_deprecated,
+        *(
+            solver_cache.package_files_digest(
+                spack.repo.PATH.get_pkg_class(f"{namespaces[x]}.{x}" if x in namespaces else x)
+            )
+            for x in sorted(possible_dependencies)
+            if spack.repo.PATH.exists(x)
+        ),
+        *(
+            [
+                str(spec),
+                [(x.namespace, x.dag_hash() if x.concrete else None) for x in spec.traverse()],
+            ]
+            for spec in specs
+        ),
+        sorted(set(x.dag_hash() for x in reuse)),
+    )
+
+
+def _result_to_cache_entry(
+    result: Result, reusable: "ConcreteSpecsByHash"
+) -> Dict[str, typing.Any]:
+    """Returns a JSON serializable representation of the best answer of a result.
+
+    Nodes that were reused are stored by hash only, since they are taken from the reusable
+    specs of the solve when the entry is read back.
+    """
+    cost, _, answers = min(result.answers)
+    nodes, reused = {}, set()
+    for s in traverse.traverse_nodes(answers.values(), key=traverse.by_dag_hash):
+        if s.dag_hash() in reusable:
+            reused.add(s.dag_hash())
+            continue
+        node_dict = s.node_dict_with_hashes(hash=ht.dag_hash)
+        node_dict[ht.dag_hash.name] = s.dag_hash()
+        nodes[s.dag_hash()] = node_dict
+
+    return {
+        "cost": list(cost),
+        "criteria": [list(x) for x in result.criteria],
+        "nmodels": result.nmodels,
+        "possible_dependencies": sorted(result.possible_dependencies),
+        "answers": [[node.id, node.pkg, spec.dag_hash()] for node, spec in answers.items()],
+        "specs": nodes,
+        "reused": sorted(reused),
+    }
+
+
+def _result_from_cache_entry(
+    specs: List[spack.spec.Spec], entry: Dict[str, typing.Any], reuse: List[spack.spec.Spec]
+) -> Optional[Result]:
+    """Reconstructs a result for the input specs, from an entry of the result cache.
+
+    Reused nodes are taken from the reusable specs, so that they retain their identity (e.g.
+    their build spec, if they were spliced). Returns None if any of them is not available.
+    """
+    reusable_by_hash: Dict[str, spack.spec.Spec] = {}
+    for s in reuse:
+        reusable_by_hash.setdefault(s.dag_hash(), s)
+
+    # Same container used in setup, so that reused nodes are copied the same way
+    # Dependencies of a reused node are added together with it
+    reused = ConcreteSpecsByHash()
+    for dag_hash in entry["reused"]:
+        if dag_hash not in reused and dag_hash in reusable_by_hash:
+            reused.add(reusable_by_hash[dag_hash])
+
+    if any(x not in reused for x in entry["reused"]):
+        return None
+
+    reader = spack.spec.SpecfileV4
+    specs_by_hash = {h: reader.from_node_dict(d) for h, d in entry["specs"].items()}
+    for dag_hash, node_dict in entry["specs"].items():
+        _, data = reader.name_and_data(node_dict)
+        for _, dep_hash, deptypes, _, virtuals in reader.dependencies_from_node_dict(data):
+            dependency = specs_by_hash[dep_hash] if dep_hash in specs_by_hash else reused[dep_hash]
+            specs_by_hash[dag_hash]._add_dependency(
+                dependency, depflag=dt.canonicalize(deptypes), virtuals=virtuals
+            )
+
+    for spec in specs_by_hash.values():
+        if isinstance(spec.version, vn.GitVersion):
+            spec.version.attach_lookup(spack.version.git_ref_lookup.GitRefLookup(spec.fullname))
+
+    answers = {
+        NodeArgument(id=node_id, pkg=pkg): (
+            specs_by_hash[dag_hash] if dag_hash in specs_by_hash else reused[dag_hash]
+        )
+        for node_id, pkg, dag_hash in entry["answers"]
+    }
+    result = Result(specs)
+    result.satisfiable = True
+    result.answers.append((entry["cost"], 0, answers))
+    result.criteria = [tuple(x) for x in entry["criteria"]]
+    result.nmodels = entry["nmodels"]
+    result.possible_dependencies = set(entry["possible_dependencies"])
+    return result
+
+
 class ConcreteSpecsByHash(collections.abc.Mapping):
     """Mapping containing concrete specs keyed by DAG hash.
 
@@ -1071,6 +1259,9 @@ def __init__(self, tests: bool = False):
         # list of unique libc specs targeted by compilers (or an educated guess if no compiler)
         self.libcs: List[spack.spec.Spec] = []
 
+        # On-disk cache of facts derived from package directives, if enabled
+        self.fact_cache: Optional[solver_cache.PackageFactsCache] = None
+
     def pkg_version_rules(self, pkg):
         """Output declared versions of a package.
 
@@ -1223,6 +1414,39 @@ def pkg_rules(self, pkg, tests):
         self.pkg_version_rules(pkg)
         self.gen.newline()
 
+        # languages, variants, conflicts, virtuals and dependencies
+        self.package_directive_rules(pkg)
+
+        # virtual preferences
+        self.virtual_preferences(
+            pkg.name,
+            lambda v, p, i: self.gen.fact(fn.pkg_fact(pkg.name, fn.provider_preference(v, p, i))),
+        )
+
+        self.package_requirement_rules(pkg)
+
+        # trigger and effect tables
+        self.trigger_rules()
+        self.effect_rules()
+
+    def package_directive_rules(self, pkg):
+        """Emit the facts derived from the directives of a package.
+
+        These facts depend only on the package class and on a few inputs of the solve, so,
+        if the fact cache is enabled, they are retrieved from disk when possible.
+        """
+        if self.fact_cache is None:
+            self._package_directive_rules(pkg)
+            return
+
+        digest = self._package_directive_rules_digest(pkg)
+        entry = self.fact_cache.get(pkg, digest)
+        if entry is None:
+            entry = self._record_package_directive_rules(pkg)
+            self.fact_cache.put(pkg, digest, entry)
+        self._replay_package_directive_rules(entry)
+
+    def _package_directive_rules(self, pkg):
         # languages
         self.package_languages(pkg)
 
@@ -1238,18 +1462,96 @@ def pkg_rules(self, pkg, tests):
         # dependencies
         self.package_dependencies_rules(pkg)
 
-        # virtual preferences
-        self.virtual_preferences(
-            pkg.name,
-            lambda v, p, i: self.gen.fact(fn.pkg_fact(pkg.name, fn.provider_preference(v, p, i))),
-        )
-
-        self.package_requirement_rules(pkg)
-
         # trigger and effect tables
         self.trigger_rules()
         self.effect_rules()
 
+    def _package_directive_rules_digest(self, pkg) -> str:
+        """Returns a digest of all the inputs used to compute the directive rules of pkg"""
+        tests = bool(self.tests) and (isinstance(self.tests, bool) or pkg.name in self.tests)
+        virtuals = sorted(x for x in pkg.provided_virtual_names() if x in self.possible_virtuals)
+        return solver_cache.inputs_digest(
+            spack.spack_version,
+            solver_cache.file_digest(__file__),
+            solver_cache.package_class_digest(pkg),
+            pkg.fullname,
+            tests,
+            virtuals,
+            sorted(self.explicitly_required_namespaces.items()),
+        )
+
+    def _record_package_directive_rules(self, pkg) -> Dict[str, typing.Any]:
+        """Computes the directive rules of pkg, and returns them in a form that can be
+        stored in the fact cache.
+
+        Condition ids are local to the entry, and the sets of constraints collected by
+        ``spec_clauses()`` as a side effect are recorded along with the facts.
+        """
+        saved = (
+            self.gen,
+            self._id_counter,
+            self.version_constraints,
+            self.target_constraints,
+            self.compiler_version_constraints,
+            self.variant_values_from_specs,
+        )
+        recorder = FactsRecorder()
+        self.gen = recorder
+        self._id_counter = map(solver_cache.ConditionId, itertools.count())
+        self.version_constraints = set()
+        self.target_constraints = set()
+        self.compiler_version_constraints = set()
+        self.variant_values_from_specs = set()
+        try:
+            self._package_directive_rules(pkg)
+            return {
+                "conditions": next(self._id_counter),
+                "facts": [
+                    x if isinstance(x, str) else solver_cache.dump_function(x)
+                    for x in recorder.asp_problem
+                ],
+                "version_constraints": sorted(
+                    [name, str(versions)] for name, versions in self.version_constraints
+                ),
+                "target_constraints": sorted(str(x) for x in self.target_constraints),
+                "compiler_version_constraints": sorted(
+                    str(x) for x in self.compiler_version_constraints
+                ),
+                "variant_values": sorted(
+                    (list(x) for x in self.variant_values_from_specs), key=str
+                ),
+            }
+        finally:
+            (
+                self.gen,
+                self._id_counter,
+                self.version_constraints,
+                self.target_constraints,
+                self.compiler_version_constraints,
+                self.variant_values_from_specs,
+            ) = saved
+
+    def _replay_package_directive_rules(self, entry: Dict[str, typing.Any]) -> None:
+        """Emits the facts recorded in an entry of the fact cache, shifting the local
+        condition ids so that they are unique in this solve.
+        """
+        offset = next(self._id_counter)
+        self._id_counter = itertools.count(offset + entry["conditions"])
+        for item in entry["facts"]:
+            if isinstance(item, str):
+                self.gen.append(item)
+            else:
+                self.gen.fact(solver_cache.load_function(item, offset))
+
+        self.version_constraints.update(
+            (name, vn.VersionList(versions)) for name, versions in entry["version_constraints"]
+        )
+        self.target_constraints.update(spack.target.Target(x) for x in entry["target_constraints"])
+        self.compiler_version_constraints.update(
+            spack.spec.CompilerSpec(x) for x in entry["compiler_version_constraints"]
+        )
+        self.variant_values_from_specs.update(tuple(x) for x in entry["variant_values"])
+
     def trigger_rules(self):
         """Flushes all the trigger rules collected so far, and clears the cache."""
         if not self._trigger_cache:
@@ -2414,6 +2716,7 @@ def setup(
         *,
         reuse: Optional[List[spack.spec.Spec]] = None,
         allow_deprecated: bool = False,
+        node_counter: Optional[Counter] = None,
     ) -> str:
         """Generate an ASP program with relevant constraints for specs.
 
@@ -2425,10 +2728,12 @@ def setup(
             specs: list of Specs to solve
             reuse: list of concrete specs that can be reused
             allow_deprecated: if True adds deprecated versions into the solve
+            node_counter: counter of the possible nodes for the input specs. If None, it is
+                created here.
         """
         check_packages_exist(specs)
 
-        node_counter = _create_counter(specs, tests=self.tests)
+        node_counter = node_counter or _create_counter(specs, tests=self.tests)
         self.possible_virtuals = node_counter.possible_virtuals()
         self.pkgs = node_counter.possible_dependencies()
         self.libcs = sorted(all_libcs())  # type: ignore[type-var]
@@ -2448,6 +2753,9 @@ def setup(
         self.gen = ProblemInstanceBuilder()
         compiler_parser = CompilerParser(configuration=spack.config.CONFIG).with_input_specs(specs)
 
+        if spack.config.get("concretizer:cache:facts", False):
+            self.fact_cache = solver_cache.PackageFactsCache(spack.caches.MISC_CACHE)
+
         if using_libc_compatibility():
             for libc in self.libcs:
                 self.gen.fact(fn.host_libc(libc.name, libc.version))
@@ -2808,6 +3116,18 @@ def value(self) -> str:
         return "".join(self.asp_problem)
 
 
+class FactsRecorder(ProblemInstanceBuilder):
+    """Records facts as ASP functions, instead of turning them into text, so that they
+    can be stored in the fact cache and replayed later.
+    """
+
+    def fact(self, atom: AspFunction) -> None:
+        self.asp_problem.append(atom)
+
+    def value(self) -> str:
+        raise RuntimeError("cannot turn recorded facts into a problem instance")
+
+
 class RequirementParser:
     """Parses requirements from package.py files and configuration, and returns rules."""
 
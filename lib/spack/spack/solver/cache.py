@@ -0,0 +1,305 @@
+# Copyright 2013-2024 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+"""On-disk caches used to speed-up the concretizer."""
+import hashlib
+import json
+import os
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+import llnl.util.lang
+import llnl.util.tty as tty
+
+import spack.caches
+import spack.repo
+import spack.util.file_cache
+
+from .core import AspFunction
+
+#: Version of the format used to store package facts. Bump it whenever the
+#: layout of the cached entries, or the facts they contain, change.
+FACT_CACHE_VERSION = 1
+
+#: Version of the format used to store solve results
+RESULT_CACHE_VERSION = 2
+
+#: Digests of files, keyed by (path, mtime, size)
+_FILE_DIGESTS: Dict[Tuple[str, int, int], str] = {}
+
+
+class ConditionId(int):
+    """Id of a condition, local to a block of facts that is being recorded for the cache.
+
+    Being a subclass of ``int``, it is transparent to the code emitting facts. When the
+    facts are stored, instances of this class are marked so that they can be shifted to
+    globally unique ids when the facts are replayed in another solve.
+    """
+
+
+def file_digest(path: str) -> Optional[str]:
+    """Returns the sha256 of a file, or None if the file cannot be read. Digests are
+    memoized in-process, and recomputed only if the modification time or size change.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    if key not in _FILE_DIGESTS:
+        with open(path, "rb") as f:
+            _FILE_DIGESTS[key] = hashlib.sha256(f.read()).hexdigest()
+    return _FILE_DIGESTS[key]
+
+
+def package_class_digest(pkg_cls) -> str:
+    """Returns a digest of all the source files defining a package class.
+
+    This accounts for the ``package.py`` file, and for the files defining its base classes
+    (e.g. build systems, or other packages it derives from), since directives may be
+    inherited from any of them.
+    """
+    sha = hashlib.sha256()
+    seen = set()
+    for cls in pkg_cls.__mro__:
+        path = getattr(sys.modules.get(cls.__module__), "__file__", None)
+        if not path or path in seen:
+            continue
+        seen.add(path)
+        sha.update(f"{path}:{file_digest(path)}\n".encode())
+    return sha.hexdigest()
+
+
+@llnl.util.lang.memoized
+def package_files_digest(pkg_cls) -> str:
+    """Returns a digest of the source files defining a package class, and of all the other
+    files in its package directory (e.g. patches).
+
+    The result is memoized for each package class, so package directories are walked only
+    once per process. Package classes are created anew when repositories are reloaded.
+    """
+    sha = hashlib.sha256(package_class_digest(pkg_cls).encode())
+    package_dir = pkg_cls.package_dir
+    for root, dirs, files in os.walk(package_dir):
+        dirs[:] = sorted(x for x in dirs if x != "__pycache__")
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            sha.update(f"{os.path.relpath(path, package_dir)}:{file_digest(path)}\n".encode())
+    return sha.hexdigest()
+
+
+def inputs_digest(*parts: Any) -> str:
+    """Returns a digest of the string representation of the arguments."""
+    sha = hashlib.sha256()
+    for part in parts:
+        sha.update(f"{part}\n".encode())
+    return sha.hexdigest()
+
+
+def _dump_argument(arg: Any) -> Any:
+    if isinstance(arg, ConditionId):
+        return {"id": int(arg)}
+    elif isinstance(arg, AspFunction):
+        return dump_function(arg)
+    elif isinstance(arg, (bool, int)):
+        return arg
+    # Any other object is converted to a string when turned into a clingo symbol
+    return str(arg)
+
+
+def _load_argument(arg: Any, offset: int) -> Any:
+    if isinstance(arg, dict):
+        return arg["id"] + offset
+    elif isinstance(arg, list):
+        return load_function(arg, offset)
+    return arg
+
+
+def dump_function(function: AspFunction) -> List[Any]:
+    """Returns a JSON serializable representation of an ASP function."""
+    return [function.name, [_dump_argument(x) for x in function.args]]
+
+
+def load_function(data: List[Any], offset: int) -> AspFunction:
+    """Reconstructs an ASP function from its JSON representation.
+
+    Args:
+        data: serialized function
+        offset: offset added to the local ids of conditions
+    """
+    name, args = data
+    return AspFunction(name, tuple(_load_argument(x, offset) for x in args))
+
+
+class PackageFactsCache:
+    """Stores the facts derived from package directives, so that they don't need to be
+    recomputed at each solve.
+
+    Each package has a single entry in the underlying file cache, which is overwritten
+    whenever the inputs used to compute the facts change.
+    """
+
+    def __init__(self, file_cache: "spack.caches.FileCacheType") -> None:
+        self.file_cache = file_cache
+
+    @staticmethod
+    def _key(pkg_cls) -> str:
+        return os.path.join("solver", "facts", pkg_cls.namespace, f"{pkg_cls.name}.json")
+
+    @staticmethod
+    def _references(variant_values: List[List[Any]], pkg_name: str) -> Dict[str, str]:
+        """Returns the digests of the other packages whose variants were validated when
+        computing the facts.
+        """
+        result = {}
+        for name, _, _ in variant_values:
+            if name == pkg_name or name in result or not spack.repo.PATH.exists(name):
+                continue
+            result[name] = package_class_digest(spack.repo.PATH.get_pkg_class(name))
+        return result
+
+    def get(self, pkg_cls, digest: str) -> Optional[Dict[str, Any]]:
+        """Returns the cached entry for a package, or None if there is no valid entry.
+
+        Args:
+            pkg_cls: package class
+            digest: digest of all the inputs used to compute the facts
+        """
+        key = self._key(pkg_cls)
+        try:
+            if not self.file_cache.init_entry(key):
+                return None
+            with self.file_cache.read_transaction(key) as f:
+                entry = json.load(f)
+        except (OSError, ValueError, spack.util.file_cache.CacheError) as e:
+            tty.debug(f"[FACT CACHE] cannot read the entry for {pkg_cls.fullname}: {e}")
+            return None
+
+        if entry.get("version") != FACT_CACHE_VERSION or entry.get("digest") != digest:
+            return None
+
+        for name, expected in entry["references"].items():
+            if not spack.repo.PATH.exists(name):
+                return None
+            if package_class_digest(spack.repo.PATH.get_pkg_class(name)) != expected:
+                return None
+
+        return entry
+
+    def put(self, pkg_cls, digest: str, entry: Dict[str, Any]) -> None:
+        """Stores an entry for a package. Errors are reported, but not raised.
+
+        Args:
+            pkg_cls: package class
+            digest: digest of all the inputs used to compute the facts
+            entry: entry to be stored
+        """
+        entry["version"] = FACT_CACHE_VERSION
+        entry["digest"] = digest
+        entry["references"] = self._references(entry["variant_values"], pkg_cls.name)
+        key = self._key(pkg_cls)
+        try:
+            self.file_cache.init_entry(key)
+            with self.file_cache.write_transaction(key) as (_, new):
+                json.dump(entry, new)
+        except (OSError, spack.util.file_cache.CacheError) as e:
+            tty.debug(f"[FACT CACHE] cannot write the entry for {pkg_cls.fullname}: {e}")
+
+
+class ResultCache:
+    """Size-bounded cache of solve results, keyed by a digest of all the inputs of a solve.
+
+    Entries are stored in separate files, and the least recently used ones are evicted when
+    the number of entries exceeds the maximum allowed. The number of hits and misses is
+    recorded, to monitor the effectiveness of the cache.
+    """
+
+    #: Key of the file storing the statistics of the cache
+    STATS_KEY = os.path.join("solver", "results-stats.json")
+
+    def __init__(self, file_cache: "spack.caches.FileCacheType", max_entries: int) -> None:
+        self.file_cache = file_cache
+        self.max_entries = max_entries
+
+    @staticmethod
+    def _key(digest: str) -> str:
+        return os.path.join("solver", "results", f"{digest}.json")
+
+    def _results_dir(self) -> str:
+        return self.file_cache.cache_path(os.path.join("solver", "results"))
+
+    def get(self, digest: str) -> Optional[Dict[str, Any]]:
+        """Returns the cached entry for a digest, or None if there is no valid entry. The
+        lookup is recorded in the statistics of the cache.
+        """
+        key, entry = self._key(digest), None
+        try:
+            if self.file_cache.init_entry(key):
+                with self.file_cache.read_transaction(key) as f:
+                    entry = json.load(f)
+                # Mark the entry as recently used
+                os.utime(self.file_cache.cache_path(key))
+        except (OSError, ValueError, spack.util.file_cache.CacheError) as e:
+            tty.debug(f"[RESULT CACHE] cannot read the entry {digest}: {e}")
+            entry = None
+
+        if entry is not None and entry.get("version") != RESULT_CACHE_VERSION:
+            entry = None
+
+        self._record(hit=entry is not None)
+        return entry
+
+    def put(self, digest: str, entry: Dict[str, Any]) -> None:
+        """Stores an entry, and evicts the least recently used entries if needed. Errors are
+        reported, but not raised.
+        """
+        entry["version"] = RESULT_CACHE_VERSION
+        key = self._key(digest)
+        try:
+            self.file_cache.init_entry(key)
+            with self.file_cache.write_transaction(key) as (_, new):
+                json.dump(entry, new)
+            self._evict()
+        except (OSError, spack.util.file_cache.CacheError) as e:
+            tty.debug(f"[RESULT CACHE] cannot write the entry {digest}: {e}")
+
+    def _entries(self) -> List[os.DirEntry]:
+        try:
+            with os.scandir(self._results_dir()) as it:
+                return [x for x in it if x.name.endswith(".json") and x.is_file()]
+        except OSError:
+            return []
+
+    def _evict(self) -> None:
+        entries = sorted(self._entries(), key=lambda x: x.stat().st_mtime)
+        for entry in entries[: max(len(entries) - self.max_entries, 0)]:
+            self.file_cache.remove(os.path.join("solver", "results", entry.name))
+
+    def _record(self, *, hit: bool) -> None:
+        try:
+            self.file_cache.init_entry(self.STATS_KEY)
+            with self.file_cache.write_transaction(self.STATS_KEY) as (old, new):
+                stats = json.load(old) if old else {"hits": 0, "misses": 0}
+                stats["hits" if hit else "misses"] += 1
+                json.dump(stats, new)
+        except (OSError, ValueError, spack.util.file_cache.CacheError) as e:
+            tty.debug(f"[RESULT CACHE] cannot update statistics: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the number of hits and misses, the number of entries and their total size
+        in bytes.
+        """
+        stats = {"hits": 0, "misses": 0}
+        try:
+            if self.file_cache.init_entry(self.STATS_KEY):
+                with self.file_cache.read_transaction(self.STATS_KEY) as f:
+                    stats.update(json.load(f))
+        except (OSError, ValueError, spack.util.file_cache.CacheError) as e:
+            tty.debug(f"[RESULT CACHE] cannot read statistics: {e}")
+
+        entries = self._entries()
+        stats["entries"] = len(entries)
+        stats["size"] = sum(x.stat().st_size for x in entries)
+        return stats
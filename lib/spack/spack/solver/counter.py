@@ -60,7 +60,7 @@ def ensure_cache_values(self) -> None:
             return
         self._compute_cache_values()
 
-    def possible_packages_facts(self, gen: "spack.solver.asp.PyclingoDriver", fn) -> None:
+    def possible_packages_facts(self, gen: "spack.solver.asp.ProblemInstanceBuilder", fn) -> None:
         """Emit facts associated with the possible packages"""
         raise NotImplementedError("must be implemented by derived classes")
 
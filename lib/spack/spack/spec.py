@@ -48,6 +48,7 @@
 6. The architecture to build with.  This is needed on machines where
    cross-compilation is required
 """
+import abc
 import collections
 import collections.abc
 import enum
@@ -5032,7 +5033,7 @@ def reconstruct_virtuals_on_edges(spec):
             edge.update_virtuals([vspec])
 
 
-class SpecfileReaderBase:
+class SpecfileReaderBase(metaclass=abc.ABCMeta):
     @classmethod
     def from_node_dict(cls, node):
         spec = Spec()
@@ -5098,6 +5099,12 @@ def from_node_dict(cls, node):
 
         return spec
 
+    @classmethod
+    @abc.abstractmethod
+    def read_specfile_dep_specs(cls, deps, hash_type=ht.dag_hash.name):
+        """Yields (name, hash, deptypes, hash type, virtuals) for each dependency in the
+        dependency portion of a node."""
+
     @classmethod
     def _load(cls, data):
         """Construct a spec from JSON/YAML using the format version 2.
@@ -2,6 +2,7 @@
 # Spack Project Developers. See the top-level COPYRIGHT file for details.
 #
 # SPDX-License-Identifier: (Apache-2.0 OR MIT)
+import collections
 import concurrent.futures
 import errno
 import getpass
@@ -13,7 +14,9 @@
 import stat
 import sys
 import tempfile
-from typing import Callable, Dict, Iterable, Optional, Set
+import time
+import urllib.parse
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
 
 import llnl.string
 import llnl.util.lang
@@ -46,7 +49,7 @@
 import spack.util.url as url_util
 from spack.util.crypto import bit_length, prefix_bits
 from spack.util.editor import editor, executable
-from spack.version import StandardVersion, VersionList
+from spack.version import GitVersion, StandardVersion, VersionList
 
 # The well-known stage source subdirectory name.
 _source_path_subdir = "spack-src"
@@ -557,7 +560,7 @@ def print_errors(errors):
 
             self.fetcher = self.default_fetcher
             default_msg = "All fetchers failed for {0}".format(self.name)
-            raise spack.error.FetchError(err_msg or default_msg, None)
+            raise FetchersFailedError(err_msg or default_msg, None)
 
         print_errors(errors)
 
@@ -884,6 +887,180 @@ def cache_local(self):
         tty.debug("Sources for Develop stages are not cached")
 
 
+#: Fetchers that can run in a worker thread, because they never change the working directory
+CONCURRENT_FETCHERS = (fs.URLFetchStrategy, fs.BundleFetchStrategy)
+
+
+def _package_stages(pkg: "spack.package_base.PackageBase") -> List[Stage]:
+    stage = pkg.stage
+    return list(stage) if isinstance(stage, StageComposite) else [stage]
+
+
+def _fetches_concurrently(pkg: "spack.package_base.PackageBase") -> bool:
+    return all(
+        isinstance(getattr(stage, "default_fetcher", None), CONCURRENT_FETCHERS)
+        for stage in _package_stages(pkg)
+    )
+
+
+def _asks_for_confirmation(pkg: "spack.package_base.PackageBase") -> bool:
+    """Returns whether fetching a package may ask the user to confirm the fetch, because the
+    version has no checksum or is deprecated, like ``PackageBase.do_fetch`` does.
+    """
+    if not sys.stdout.isatty() or not pkg.has_code or pkg.spec.external:
+        return False
+    if (
+        spack.config.get("config:checksum")
+        and pkg.version not in pkg.versions
+        and not isinstance(pkg.version, GitVersion)
+    ):
+        return True
+    return not spack.config.get("config:deprecated") and pkg.versions.get(pkg.version, {}).get(
+        "deprecated", False
+    )
+
+
+def _fetch_host(pkg: "spack.package_base.PackageBase") -> str:
+    """Returns the host from which the sources of a package are downloaded, or an empty
+    string if they are not downloaded from a url.
+    """
+    fetcher = getattr(_package_stages(pkg)[0], "default_fetcher", None)
+    return urllib.parse.urlparse(getattr(fetcher, "url", None) or "").netloc
+
+
+class FetchScheduler:
+    """Fetches the sources of many packages concurrently, in a thread pool.
+
+    Packages are grouped by name and version, and the packages in a group are fetched one
+    after the other, so that different specs sharing the same archives never write them to
+    a cache at the same time. Groups are started only while the number of groups fetching
+    from the same host is below a limit. Fetches that failed because of download errors are
+    retried with an exponential backoff.
+
+    Packages with fetchers that need to change the working directory, like the ones for
+    version control systems, and packages for which the user may be asked to confirm the
+    fetch, are fetched in the main thread after all the others.
+    """
+
+    def __init__(
+        self,
+        jobs: Optional[int] = None,
+        jobs_per_host: Optional[int] = None,
+        retries: int = 3,
+        backoff: float = 1.0,
+    ) -> None:
+        """
+        Args:
+            jobs: maximum number of concurrent fetches, defaults to ``config:fetch_jobs``
+            jobs_per_host: maximum number of concurrent fetches from the same host, defaults
+                to ``config:fetch_jobs_per_host``
+            retries: number of attempts to fetch each package
+            backoff: seconds to wait before the second attempt, doubled at each attempt
+        """
+        self.jobs = jobs or spack.config.get("config:fetch_jobs", 16)
+        self.jobs_per_host = jobs_per_host or spack.config.get("config:fetch_jobs_per_host", 4)
+        self.retries = max(retries, 1)
+        self.backoff = backoff
+        self._total = 0
+        self._done = 0
+
+    def run(
+        self, pkgs: Iterable["spack.package_base.PackageBase"], fetch_fn: Callable
+    ) -> List[Tuple["spack.package_base.PackageBase", Optional[Exception]]]:
+        """Calls ``fetch_fn`` on each package, and returns each package together with the
+        exception raised by its last attempt, or ``None`` if it succeeded. Results are in
+        the order in which the fetches completed.
+
+        Args:
+            pkgs: packages to be fetched
+            fetch_fn: function taking a package, and fetching its sources
+        """
+        groups: Dict[str, List["spack.package_base.PackageBase"]] = {}
+        for pkg in pkgs:
+            groups.setdefault(pkg.spec.format("{name}{@version}"), []).append(pkg)
+
+        # Stages are constructed lazily, so access them before starting any thread
+        concurrent_groups, serial_groups = llnl.util.lang.stable_partition(
+            groups.values(),
+            lambda group: all(
+                _fetches_concurrently(pkg) and not _asks_for_confirmation(pkg) for pkg in group
+            ),
+        )
+
+        self._total = sum(len(group) for group in groups.values())
+        self._done = 0
+        results: List[Tuple["spack.package_base.PackageBase", Optional[Exception]]] = []
+
+        pending: Dict[str, collections.deque] = collections.defaultdict(collections.deque)
+        for group in concurrent_groups:
+            pending[_fetch_host(group[0])].append(group)
+
+        running: Dict[concurrent.futures.Future, str] = {}
+        active: Dict[str, int] = collections.Counter()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            while pending or running:
+                for host in list(pending):
+                    queue = pending[host]
+                    while queue and active[host] < self.jobs_per_host and len(running) < self.jobs:
+                        future = executor.submit(self._fetch_group, queue.popleft(), fetch_fn)
+                        running[future] = host
+                        active[host] += 1
+                    if not queue:
+                        del pending[host]
+
+                done, _ = concurrent.futures.wait(
+                    running, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    active[running.pop(future)] -= 1
+                    results.extend(self._report(future.result()))
+
+        for group in serial_groups:
+            results.extend(self._report(self._fetch_group(group, fetch_fn)))
+
+        return results
+
+    def _fetch_group(self, group, fetch_fn):
+        return [(pkg, self._fetch(pkg, fetch_fn)) for pkg in group]
+
+    def _fetch(self, pkg, fetch_fn) -> Optional[Exception]:
+        for attempt in range(self.retries):
+            try:
+                fetch_fn(pkg)
+                return None
+            except (
+                FetchersFailedError,
+                fs.FailedDownloadError,
+                ConnectionError,
+                TimeoutError,
+            ) as e:
+                # Downloads may succeed if attempted again
+                error = e
+            except Exception as e:
+                # Fetching again won't fix checksums, missing digests, or fetches declined by
+                # the user
+                return e
+            if attempt + 1 < self.retries:
+                delay = self.backoff * 2**attempt
+                tty.debug(f"Fetching {pkg.spec.format('{name}{@version}')} failed: {error}")
+                tty.debug(f"Retrying in {delay:.1f} s")
+                time.sleep(delay)
+        return error
+
+    def _report(self, results):
+        for pkg, error in results:
+            self._done += 1
+            progress = f"[{self._done}/{self._total}]"
+            if error is None:
+                tty.msg(f"{progress} Fetched {pkg.spec.cformat('{name}{@version}{/hash:7}')}")
+            else:
+                tty.warn(
+                    f"{progress} Error while fetching {pkg.spec.cformat('{name}{@version}')}",
+                    getattr(error, "message", error),
+                )
+        return results
+
+
 def ensure_access(file):
     """Ensure we can access a directory and die with an error if we can't."""
     if not can_access(file):
@@ -1198,6 +1375,10 @@ class StageError(spack.error.SpackError):
     """ "Superclass for all errors encountered during staging."""
 
 
+class FetchersFailedError(spack.error.FetchError):
+    """Raised when all the fetchers of a stage failed to download its sources."""
+
+
 class StagePathError(StageError):
     """ "Error encountered with stage path."""
 
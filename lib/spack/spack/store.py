@@ -31,6 +31,7 @@
 import spack.database
 import spack.directory_layout
 import spack.error
+import spack.object_store
 import spack.paths
 import spack.spec
 import spack.util.path
@@ -156,6 +157,10 @@ class Store:
             truncated to this length
         upstreams: optional list of upstream databases
         lock_cfg: lock configuration for the database
+        journal: whether the database appends changes to a journal, instead of rewriting its
+            whole index at each write
+        deduplicate: whether identical files in the prefixes of new installations are hard
+            linked to a shared object store
     """
 
     def __init__(
@@ -166,6 +171,8 @@ def __init__(
         hash_length: Optional[int] = None,
         upstreams: Optional[List[spack.database.Database]] = None,
         lock_cfg: spack.database.LockConfiguration = spack.database.NO_LOCK,
+        journal: bool = False,
+        deduplicate: bool = False,
     ) -> None:
         self.root = root
         self.unpadded_root = unpadded_root or root
@@ -173,7 +180,14 @@ def __init__(
         self.hash_length = hash_length
         self.upstreams = upstreams
         self.lock_cfg = lock_cfg
-        self.db = spack.database.Database(root, upstream_dbs=upstreams, lock_cfg=lock_cfg)
+        self.journal = journal
+        self.deduplicate = deduplicate
+        self.db = spack.database.Database(
+            root, upstream_dbs=upstreams, lock_cfg=lock_cfg, journal=journal
+        )
+        self.objects = spack.object_store.ObjectStore(
+            os.path.join(self.db.database_directory, "objects")
+        )
 
         timeout_format_str = (
             f"{str(lock_cfg.package_timeout)}s" if lock_cfg.package_timeout else "No timeout"
@@ -203,6 +217,8 @@ def __reduce__(self):
             self.hash_length,
             self.upstreams,
             self.lock_cfg,
+            self.journal,
+            self.deduplicate,
         )
 
 
@@ -216,6 +232,8 @@ def create(configuration: ConfigurationType) -> Store:
     config_dict = configuration.get("config")
     root, unpadded_root, projections = parse_install_tree(config_dict)
     hash_length = configuration.get("config:install_hash_length")
+    install_tree = config_dict.get("install_tree", {})
+    deduplicate = isinstance(install_tree, dict) and install_tree.get("deduplicate", False)
 
     install_roots = [
         install_properties["install_tree"]
@@ -230,6 +248,8 @@ def create(configuration: ConfigurationType) -> Store:
         hash_length=hash_length,
         upstreams=upstreams,
         lock_cfg=spack.database.lock_configuration(configuration),
+        journal=configuration.get("config:db_journal", False),
+        deduplicate=deduplicate,
     )
 
 
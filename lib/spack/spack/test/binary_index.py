@@ -0,0 +1,135 @@
+# Copyright 2013-2024 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+import io
+
+import pytest
+
+import spack.binary_distribution as bindist
+import spack.binary_index
+import spack.database
+import spack.deptypes as dt
+import spack.util.spack_json as sjson
+from spack.spec import Spec
+
+
+def _concrete_spec(name, version, dependencies=()):
+    spec = Spec(f"{name}@={version} arch=linux-ubuntu22.04-x86_64")
+    for dependency in dependencies:
+        spec._add_dependency(dependency, depflag=dt.LINK | dt.RUN, virtuals=())
+    return spec
+
+
+@pytest.fixture()
+def index_json(tmp_path):
+    """Returns the content of a buildcache index.json, with a few concrete specs"""
+    zlib = _concrete_spec("zlib", "1.3")
+    bzip2 = _concrete_spec("bzip2", "1.0.8")
+    cmake = _concrete_spec("cmake", "3.27.7", [zlib, bzip2])
+    cmake._mark_concrete()
+
+    db = bindist.BuildCacheDatabase(str(tmp_path))
+    for spec in (zlib, bzip2, cmake):
+        db.add(spec, None)
+        db.mark(spec, "in_buildcache", spec is not bzip2)
+
+    stream = io.StringIO()
+    db._write_to_file(stream)
+    return sjson.load(stream.getvalue())["database"]
+
+
+def _binary_index(index_json, **kwargs):
+    stream = io.BytesIO()
+    spack.binary_index.write(
+        index_json["installs"], stream, database_version=index_json["version"], **kwargs
+    )
+    return spack.binary_index.BinaryIndex.from_buffer(stream.getvalue())
+
+
+def test_binary_index_round_trip(index_json):
+    """Tests that the records of a binary index are the same as those in index.json"""
+    installs = index_json["installs"]
+    index = _binary_index(index_json, index_hash="abcdef")
+
+    assert index.index_hash == "abcdef"
+    assert sorted(index.keys()) == sorted(installs)
+    for dag_hash, record in installs.items():
+        assert index.raw(dag_hash) == record
+        assert index.name(dag_hash) == record["spec"]["name"]
+    assert index.raw("a" * 32) is None
+    assert index.name("a" * 32) is None
+
+
+def test_binary_index_select(index_json):
+    """Tests that records are selected using only the columns of the index"""
+    installs = index_json["installs"]
+    index = _binary_index(index_json)
+    by_name = {record["spec"]["name"]: dag_hash for dag_hash, record in installs.items()}
+
+    assert index.select(name="zlib") == [by_name["zlib"]]
+    assert index.select(name="not-there") == []
+    assert index.select(hash_prefix=by_name["cmake"][:4]) == [by_name["cmake"]]
+    assert index.select(hash_prefix=by_name["cmake"], name="zlib") == []
+    assert sorted(index.select(available=True)) == sorted([by_name["zlib"], by_name["cmake"]])
+    assert index.select(available=False) == [by_name["bzip2"]]
+    assert sorted(index.select()) == sorted(installs)
+    # Nothing was decoded
+    assert not index.records
+
+
+def test_binary_index_materializes_only_lookups(index_json, tmp_path):
+    """Tests that a database reading a binary index decodes only the records that are looked
+    up, together with their dependencies.
+    """
+    installs = index_json["installs"]
+    by_name = {record["spec"]["name"]: dag_hash for dag_hash, record in installs.items()}
+    db = bindist.BuildCacheDatabase(str(tmp_path))
+    db.read_binary_index(_binary_index(index_json))
+
+    record = db.query_local_by_spec_hash(by_name["zlib"])
+    assert record.spec.name == "zlib" and record.in_buildcache
+    assert set(db.binary_index.records) == {by_name["zlib"]}
+
+    record = db.query_local_by_spec_hash(by_name["cmake"])
+    assert record.spec.dag_hash() == by_name["cmake"]
+    assert record.spec["bzip2"].dag_hash() == by_name["bzip2"]
+    assert set(db.binary_index.records) == set(installs)
+
+    specs = db.query_local(installed=any, in_buildcache=any)
+    assert sorted(s.dag_hash() for s in specs) == sorted(installs)
+
+
+def test_binary_index_with_no_records():
+    index = _binary_index({"version": str(spack.database._DB_VERSION), "installs": {}})
+    assert index.keys() == []
+    assert index.select(name="zlib") == []
+    assert index.select(hash_prefix="abc") == []
+
+
+@pytest.mark.parametrize(
+    "corrupt",
+    [
+        # Different magic bytes
+        lambda x: b"NOTANIDX" + x[8:],
+        # Newer format
+        lambda x: x[:8] + b"\xff" + x[9:],
+        # Truncated file
+        lambda x: x[: len(x) // 2],
+        lambda x: x[:10],
+    ],
+)
+def test_invalid_binary_index(index_json, corrupt):
+    stream = io.BytesIO()
+    spack.binary_index.write(
+        index_json["installs"], stream, database_version=index_json["version"]
+    )
+    assert spack.binary_index.BinaryIndex.from_buffer(corrupt(stream.getvalue())) is None
+
+
+def test_binary_index_of_other_database_version(index_json, tmp_path):
+    """Tests that binary indexes with a different database version are not read"""
+    index = _binary_index(dict(index_json, version="1"))
+    assert index.database_version == "1"
+    with pytest.raises(spack.database.InvalidDatabaseVersionError):
+        bindist.BuildCacheDatabase(str(tmp_path)).read_binary_index(index)
@@ -9,6 +9,7 @@
 import json
 import os
 import platform
+import shutil
 import sys
 import tarfile
 import urllib.error
@@ -25,8 +26,11 @@
 from llnl.util.symlink import readlink
 
 import spack.binary_distribution as bindist
+import spack.binary_index
 import spack.caches
 import spack.config
+import spack.database
+import spack.deptypes as dt
 import spack.fetch_strategy
 import spack.hooks.sbang as sbang
 import spack.main
@@ -427,6 +431,32 @@ def test_spec_needs_rebuild(monkeypatch, tmpdir):
     assert rebuild
 
 
+@pytest.mark.usefixtures("install_mockery", "mock_packages", "mock_fetch")
+def test_get_mirrors_for_specs_without_index(tmp_path, mutable_config):
+    """Specs pushed without updating the buildcache index are found by looking for their spec
+    files directly on all the mirrors, and are added to the local cache."""
+    first, second = tmp_path / "first", tmp_path / "second"
+    first_url, second_url = (url_util.path_to_file_url(str(x)) for x in (first, second))
+    spack.config.set("mirrors", {"first": first_url, "second": second_url})
+
+    libdwarf, libelf = Spec("libdwarf").concretized(), Spec("libelf").concretized()
+    install_cmd("--no-cache", libdwarf.name)
+    buildcache_cmd("push", "-u", "--only=package", str(first), libdwarf.name)
+    buildcache_cmd("push", "-u", "--only=package", str(second), libdwarf.name, libelf.name)
+
+    results = bindist.get_mirrors_for_specs([libdwarf, libelf], index_only=True)
+    assert results == {libdwarf.dag_hash(): [], libelf.dag_hash(): []}
+
+    results = bindist.get_mirrors_for_specs([libdwarf, libelf])
+    assert [r["mirror_url"] for r in results[libdwarf.dag_hash()]] == [first_url, second_url]
+    assert [r["spec"] for r in results[libelf.dag_hash()]] == [libelf]
+
+    # The specs found are now in the local cache
+    assert bindist.get_mirrors_for_specs([libelf], index_only=True) == {
+        libelf.dag_hash(): results[libelf.dag_hash()]
+    }
+
+
 @pytest.mark.usefixtures("install_mockery", "mock_packages", "mock_fetch")
 def test_generate_index_missing(monkeypatch, tmpdir, mutable_config):
     """Ensure spack buildcache index only reports available packages"""
@@ -905,6 +935,274 @@ def urlopen(request: urllib.request.Request):
         fetcher.conditional_fetch()
 
 
+def _binary_index_urlopen(index_json_hash, index_bin):
+    def urlopen(request: urllib.request.Request):
+        url = request.get_full_url()
+        if url.endswith("index.json.hash"):
+            data = index_json_hash.encode()
+        elif url.endswith("index.bin"):
+            data = index_bin
+        else:
+            assert False, "Unexpected fetch {}".format(url)
+        return urllib.response.addinfourl(
+            io.BytesIO(data), headers={}, url=url, code=200  # type: ignore[arg-type]
+        )
+
+    return urlopen
+
+
+def test_binary_index_fetcher():
+    index_json_hash = bindist.compute_hash('{"Hello": "World"}')
+    stream = io.BytesIO()
+    spack.binary_index.write(
+        {}, stream, database_version=str(spack.database._DB_VERSION), index_hash=index_json_hash
+    )
+    urlopen = _binary_index_urlopen(index_json_hash, stream.getvalue())
+
+    fetcher = bindist.BinaryIndexFetcher("https://www.example.com", None, urlopen=urlopen)
+    result = fetcher.conditional_fetch()
+    assert not result.fresh
+    assert result.data == stream.getvalue()
+    # The hash is the one of index.json, so that it can be compared with index.json.hash
+    assert result.hash == index_json_hash
+
+    fetcher = bindist.BinaryIndexFetcher(
+        "https://www.example.com", index_json_hash, urlopen=urlopen
+    )
+    assert fetcher.conditional_fetch().fresh
+
+
+@pytest.mark.parametrize("index_bin", [b"", b"not a binary index"])
+def test_binary_index_fetcher_invalid_index(index_bin):
+    urlopen = _binary_index_urlopen(bindist.compute_hash("index"), index_bin)
+    fetcher = bindist.BinaryIndexFetcher("https://www.example.com", None, urlopen=urlopen)
+    with pytest.raises(bindist.FetchIndexError, match="cannot be read"):
+        fetcher.conditional_fetch()
+
+
+def test_binary_index_fetcher_out_of_date_index():
+    """Tests that a binary index is not used if index.json was regenerated after it"""
+    stream = io.BytesIO()
+    spack.binary_index.write(
+        {}, stream, database_version=str(spack.database._DB_VERSION), index_hash="old"
+    )
+    urlopen = _binary_index_urlopen(bindist.compute_hash("new"), stream.getvalue())
+    fetcher = bindist.BinaryIndexFetcher("https://www.example.com", None, urlopen=urlopen)
+    with pytest.raises(bindist.FetchIndexError, match="out of date"):
+        fetcher.conditional_fetch()
+
+
+def _generate_index_with_specs(mirror_dir, specs):
+    """Adds spec files for the specs passed as argument to a mirror, and regenerates its
+    index. Returns the url of the mirror.
+    """
+    build_cache = mirror_dir / bindist.BUILD_CACHE_RELATIVE_PATH
+    build_cache.mkdir(parents=True, exist_ok=True)
+    for spec in specs:
+        (build_cache / f"{spec.name}-{spec.dag_hash()}.spec.json").write_text(spec.to_json())
+
+    mirror_url = url_util.path_to_file_url(str(mirror_dir))
+    bindist.generate_package_index(url_util.join(mirror_url, bindist.BUILD_CACHE_RELATIVE_PATH))
+    return mirror_url
+
+
+def test_binary_cache_index_with_binary_format(mutable_config, tmp_path):
+    """Tests that specs in a binary index are decoded only when they are looked up"""
+    specs = {
+        name: Spec(f"{name}@=1.0 arch=linux-ubuntu22.04-x86_64")
+        for name in ("zlib", "bzip2", "cmake")
+    }
+    for name in ("zlib", "bzip2"):
+        specs["cmake"]._add_dependency(specs[name], depflag=dt.LINK, virtuals=())
+    specs["cmake"]._mark_concrete()
+
+    mirror_url = _generate_index_with_specs(tmp_path / "mirror", specs.values())
+    build_cache = tmp_path / "mirror" / bindist.BUILD_CACHE_RELATIVE_PATH
+    assert (build_cache / "index.json").exists() and (build_cache / "index.bin").exists()
+
+    mutable_config.set("mirrors", {"test": mirror_url})
+    mutable_config.set("config:binary_index_format", "binary")
+    index = bindist.BinaryCacheIndex(str(tmp_path / "cache"))
+    index.update()
+    assert index._local_index_cache[mirror_url]["index_format"] == "binary"
+    assert not index._mirrors_for_spec
+    # The database reading the index lazily lives in the cache directory
+    assert os.path.isdir(index._binary_index_dbs[mirror_url].root)
+
+    cmake_hash = specs["cmake"].dag_hash()
+    (result,) = index.find_by_hash(cmake_hash)
+    assert result["mirror_url"] == mirror_url
+    assert result["spec"].dag_hash() == cmake_hash
+    assert list(index._mirrors_for_spec) == [cmake_hash]
+
+    (zlib,) = index.find_built_specs(name="zlib")
+    assert zlib.dag_hash() == specs["zlib"].dag_hash()
+    assert len(index._mirrors_for_spec) == 2
+
+    all_hashes = sorted(s.dag_hash() for s in index.get_all_built_specs())
+    assert all_hashes == sorted(s.dag_hash() for s in specs.values())
+
+
+@pytest.fixture()
+def mirror_with_index_deltas(tmp_path):
+    """Returns a mirror whose index was regenerated after pushing each of three specs,
+    together with the content of its first index.
+    """
+    mirror_dir = tmp_path / "mirror"
+    first_index = None
+    for name in ("zlib", "bzip2", "cmake"):
+        spec = Spec(f"{name}@=1.0 arch=linux-ubuntu22.04-x86_64")
+        spec._mark_concrete()
+        mirror_url = _generate_index_with_specs(mirror_dir, [spec])
+        if first_index is None:
+            first_index = (mirror_dir / "build_cache" / "index.json").read_text()
+    return mirror_url, first_index
+
+
+def _recording_urlopen(urls):
+    def urlopen(request, *args, **kwargs):
+        urls.append(request.get_full_url())
+        return web_util.urlopen(request, *args, **kwargs)
+
+    return urlopen
+
+
+def test_index_deltas_are_applied(mirror_with_index_deltas, tmp_path):
+    """Tests that clients update their copy of the index with the deltas published since,
+    instead of downloading the whole index.
+    """
+    mirror_url, first_index = mirror_with_index_deltas
+    build_cache = tmp_path / "mirror" / "build_cache"
+    deltas = list((build_cache / bindist.INDEX_DELTAS_RELATIVE_PATH).iterdir())
+    assert len(deltas) == 2
+
+    urls = []
+    fetcher = bindist.DefaultIndexFetcher(
+        mirror_url,
+        bindist.compute_hash(first_index),
+        urlopen=_recording_urlopen(urls),
+        read_local_index=lambda: first_index,
+    )
+    result = fetcher.conditional_fetch()
+
+    assert not result.fresh
+    assert result.data == (build_cache / "index.json").read_text()
+    assert result.hash == (build_cache / "index.json.hash").read_text()
+    assert not any(url.endswith("index.json") for url in urls)
+    assert sum(f"/{bindist.INDEX_DELTAS_RELATIVE_PATH}/" in url for url in urls) == 2
+
+
+def test_index_deltas_fall_back_to_index(mirror_with_index_deltas, tmp_path):
+    """Tests that the whole index is downloaded if the chain of deltas is broken"""
+    mirror_url, first_index = mirror_with_index_deltas
+    build_cache = tmp_path / "mirror" / "build_cache"
+    first_hash = bindist.compute_hash(first_index)
+    (build_cache / bindist.INDEX_DELTAS_RELATIVE_PATH / f"{first_hash}.json").unlink()
+
+    urls = []
+    fetcher = bindist.EtagIndexFetcher(
+        mirror_url,
+        "some-etag",
+        urlopen=_recording_urlopen(urls),
+        local_hash=first_hash,
+        read_local_index=lambda: first_index,
+    )
+    result = fetcher.conditional_fetch()
+
+    assert result.data == (build_cache / "index.json").read_text()
+    assert any(url.endswith("index.json") for url in urls)
+
+
+def test_large_index_deltas_are_not_published(tmp_path):
+    specs = []
+    for name in ("zlib", "bzip2", "cmake"):
+        spec = Spec(f"{name}@=1.0 arch=linux-ubuntu22.04-x86_64")
+        spec._mark_concrete()
+        specs.append(spec)
+
+    _generate_index_with_specs(tmp_path / "mirror", specs[:1])
+    _generate_index_with_specs(tmp_path / "mirror", specs[1:])
+    assert not (tmp_path / "mirror" / "build_cache" / bindist.INDEX_DELTAS_RELATIVE_PATH).exists()
+
+
+def test_index_delta():
+    old = {"a": {"ref_count": 0}, "b": {"ref_count": 1}, "c": {"ref_count": 0}}
+    new = {"a": {"ref_count": 0}, "b": {"ref_count": 0}, "d": {"ref_count": 0}}
+    delta = bindist.index_delta(old, new)
+    assert delta == {"b": {"ref_count": 0}, "c": None, "d": {"ref_count": 0}}
+
+    index_data = {"database": {"installs": old}}
+    bindist.apply_index_delta(index_data, delta)
+    assert index_data["database"]["installs"] == new
+
+
+def _index_names(build_cache):
+    index = json.loads((build_cache / "index.json").read_text())
+    return sorted(r["spec"]["name"] for r in index["database"]["installs"].values())
+
+
+def test_incremental_index_update(tmp_path, monkeypatch):
+    """Tests that an incremental update of the index reads only the spec files in the push
+    log, and that entries are removed from the log only after the retention period.
+    """
+    zlib, bzip2, cmake = (
+        Spec(f"{name}@=1.0 arch=linux-ubuntu22.04-x86_64") for name in ("zlib", "bzip2", "cmake")
+    )
+    for spec in (zlib, bzip2, cmake):
+        spec._mark_concrete()
+
+    mirror_url = _generate_index_with_specs(tmp_path / "mirror", [zlib])
+    cache_url = url_util.join(mirror_url, bindist.BUILD_CACHE_RELATIVE_PATH)
+    build_cache = tmp_path / "mirror" / bindist.BUILD_CACHE_RELATIVE_PATH
+    push_log = build_cache / bindist.PUSH_LOG_RELATIVE_PATH
+    push_log.mkdir()
+    for spec in (bzip2, cmake):
+        (build_cache / f"{spec.name}-{spec.dag_hash()}.spec.json").write_text(spec.to_json())
+    # Only bzip2 was pushed by this version of Spack
+    entry = push_log / bindist.push_log_entry_name(bzip2, signed=False)
+    entry.write_text(bzip2.to_json())
+
+    bindist.generate_package_index(cache_url, incremental=True)
+    assert _index_names(build_cache) == ["bzip2", "zlib"]
+
+    # Recent entries are kept, so that an index written concurrently without them is fixed
+    # by the next update
+    assert entry.exists()
+    _generate_index_with_specs(tmp_path / "other", [zlib])
+    other_cache = tmp_path / "other" / bindist.BUILD_CACHE_RELATIVE_PATH
+    for name in ("index.json", "index.json.hash"):
+        shutil.copy(other_cache / name, build_cache / name)
+    assert _index_names(build_cache) == ["zlib"]
+    bindist.generate_package_index(cache_url, incremental=True)
+    assert _index_names(build_cache) == ["bzip2", "zlib"]
+
+    # Old entries whose spec is in the index are removed
+    monkeypatch.setattr(bindist, "PUSH_LOG_RETENTION", -1)
+    bindist.generate_package_index(cache_url, incremental=True)
+    assert _index_names(build_cache) == ["bzip2", "zlib"]
+    assert not list(push_log.iterdir())
+
+    # Regenerating the index from scratch reads all the spec files
+    bindist.generate_package_index(cache_url)
+    assert _index_names(build_cache) == ["bzip2", "cmake", "zlib"]
+
+
+def test_incremental_index_update_without_index(tmp_path):
+    """Tests that all the spec files are read, if there is no index to start from"""
+    specs = [Spec(f"{name}@=1.0 arch=linux-ubuntu22.04-x86_64") for name in ("zlib", "bzip2")]
+    build_cache = tmp_path / "mirror" / bindist.BUILD_CACHE_RELATIVE_PATH
+    build_cache.mkdir(parents=True)
+    for spec in specs:
+        spec._mark_concrete()
+        (build_cache / f"{spec.name}-{spec.dag_hash()}.spec.json").write_text(spec.to_json())
+
+    mirror_url = url_util.path_to_file_url(str(tmp_path / "mirror"))
+    bindist.generate_package_index(
+        url_util.join(mirror_url, bindist.BUILD_CACHE_RELATIVE_PATH), incremental=True
+    )
+    assert _index_names(build_cache) == ["bzip2", "zlib"]
+
+
 def _all_parents(prefix):
     parts = [p for p in prefix.split("/")]
     return ["/".join(parts[: i + 1]) for i in range(len(parts))]
@@ -3700,6 +3700,79 @@ def test_failed_view_cleanup(tmp_path, mock_stage, mock_fetch, install_mockery):
     assert view_dir.samefile(resolved_view), view_dir
 
 
+def test_env_view_is_replaced_by_default(tmp_path, mock_stage, mock_fetch, install_mockery):
+    """Unless views are updated in place, a new view replaces the previous one atomically when
+    specs are added to or removed from an environment."""
+    view_dir = tmp_path / "view"
+    with ev.create("env", with_view=str(view_dir)):
+        add("libelf")
+        add("mpich")
+        install("--fake")
+
+    resolved_view = view_dir.resolve(strict=True)
+
+    with ev.read("env"):
+        remove("mpich")
+        concretize()
+        env("view", "regenerate")
+
+    assert not resolved_view.exists()
+    assert (view_dir / "bin" / "libelf").is_symlink()
+    assert not os.path.lexists(view_dir / "bin" / "mpich")
+
+
+def test_env_view_is_updated_in_place(tmp_path, mock_stage, mock_fetch, install_mockery):
+    """When specs are added to or removed from an environment whose view is updated in place,
+    files of the other specs are not linked again."""
+    view_dir = tmp_path / "view"
+    manifest = tmp_path / "spack.yaml"
+    manifest.write_text(
+        f"""\
+spack:
+  specs: [libelf, mpich]
+  view:
+    default:
+      root: {view_dir}
+      update_in_place: true
+"""
+    )
+    ev.create("env", init_file=manifest)
+    with ev.read("env"):
+        install("--fake")
+
+    resolved_view = view_dir.resolve(strict=True)
+    libelf_inode = (view_dir / "bin" / "libelf").lstat().st_ino
+    assert (view_dir / "bin" / "mpich").is_symlink()
+
+    with ev.read("env"):
+        remove("mpich")
+        concretize()
+        env("view", "regenerate")
+
+    assert view_dir.samefile(resolved_view)
+    assert (view_dir / "bin" / "libelf").lstat().st_ino == libelf_inode
+    assert not os.path.lexists(view_dir / "bin" / "mpich")
+    assert not os.path.lexists(view_dir / ".spack" / "mpich")
+
+    with ev.read("env"):
+        add("mpich")
+        install("--fake")
+
+    assert view_dir.samefile(resolved_view)
+    assert (view_dir / "bin" / "mpich").is_symlink()
+    assert (view_dir / ".spack" / "mpich").is_dir()
+
+    # The state of the view is removed when an update starts, so a view whose update was
+    # interrupted is created again from scratch
+    (resolved_view.parent / f".{resolved_view.name}.json").unlink()
+    with ev.read("env"):
+        env("view", "regenerate")
+
+    assert not resolved_view.exists()
+    assert (view_dir / "bin" / "libelf").is_symlink()
+    assert (view_dir / "bin" / "mpich").is_symlink()
+
+
 def test_environment_view_target_already_exists(tmpdir, mock_stage, mock_fetch, install_mockery):
     """When creating a new view, Spack should check whether
     the new view dir already exists. If so, it should not be
@@ -46,9 +46,9 @@ def test_find_gpg(cmd_name, version, tmpdir, mock_gnupghome, monkeypatch):
     monkeypatch.setenv("PATH", str(tmpdir))
     if version == "undetectable" or version.endswith("1.3.4"):
         with pytest.raises(spack.util.gpg.SpackGPGError):
-            spack.util.gpg.init(force=True)
+            spack.util.gpg.init(gnupghome=mock_gnupghome, force=True)
     else:
-        spack.util.gpg.init(force=True)
+        spack.util.gpg.init(gnupghome=mock_gnupghome, force=True)
         assert spack.util.gpg.GPG is not None
         assert spack.util.gpg.GPGCONF is not None
 
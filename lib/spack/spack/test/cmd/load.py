@@ -8,9 +8,12 @@
 
 import pytest
 
+import spack.caches
+import spack.config
 import spack.spec
 import spack.user_environment as uenv
 import spack.util.environment
+import spack.util.file_cache
 from spack.main import SpackCommand
 
 load = SpackCommand("load")
@@ -194,3 +197,32 @@ def test_unload_fails_no_shell(
 
     out = unload("mpileaks", fail_on_error=False)
     assert "To set up shell support" in out
+
+
+@pytest.mark.not_on_windows("The test uses sh syntax")
+def test_load_uses_activation_cache(
+    install_mockery, mock_fetch, mock_archive, mock_packages, mutable_config, tmp_path, monkeypatch
+):
+    """Tests that `spack load` reuses the environment modifications stored in the activation
+    cache, until specs are installed or uninstalled."""
+    monkeypatch.setattr(spack.caches, "MISC_CACHE", spack.util.file_cache.FileCache(str(tmp_path)))
+    spack.config.set("config:activation_cache", {"enable": True})
+    install("mpileaks")
+    expected = load("--sh", "mpileaks")
+    assert "export FOOBAR=mpileaks" in expected
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("environment modifications should come from the cache")
+
+    with monkeypatch.context() as m:
+        m.setattr(uenv, "environment_modifications_for_specs", _fail)
+        assert load("--sh", "mpileaks") == expected
+
+    # Installing a spec invalidates the cache
+    install("libelf@0.8.12")
+    with monkeypatch.context() as m:
+        m.setattr(uenv, "environment_modifications_for_specs", _fail)
+        with pytest.raises(AssertionError):
+            load("--sh", "mpileaks")
+
+    assert load("--sh", "mpileaks") == expected
@@ -4,6 +4,7 @@
 # SPDX-License-Identifier: (Apache-2.0 OR MIT)
 
 import collections
+import contextlib
 import datetime
 import errno
 import functools
@@ -1082,19 +1083,25 @@ def module_configuration(monkeypatch, request, mutable_config):
 
 
 @pytest.fixture()
-def mock_gnupghome(monkeypatch):
+def mock_gnupghome(monkeypatch, tmp_path, request):
     # GNU PGP can't handle paths longer than 108 characters (wtf!@#$) so we
     # have to make our own tmpdir with a shorter name than pytest's.
     # This comes up because tmp paths on macOS are already long-ish, and
     # pytest makes them longer.
-    try:
-        spack.util.gpg.init()
-    except spack.util.gpg.SpackGPGError:
-        if not spack.util.gpg.GPG:
-            pytest.skip("This test requires gpg")
-
+    ensure_configuration_fixture_run_before(request)
     short_name_tmpdir = tempfile.mkdtemp()
-    with spack.util.gpg.gnupghome_override(short_name_tmpdir):
+    with contextlib.ExitStack() as stack:
+        # Initializing gpg creates the store, so unless the test uses a store already, use a
+        # temporary one instead of the default store in the Spack prefix
+        if isinstance(spack.store.STORE, llnl.util.lang.Singleton):
+            stack.enter_context(spack.store.use_store(str(tmp_path / "opt")))
+        try:
+            stack.enter_context(spack.util.gpg.gnupghome_override(short_name_tmpdir))
+        except spack.util.gpg.SpackGPGError:
+            if not spack.util.gpg.GPG:
+                shutil.rmtree(short_name_tmpdir, ignore_errors=True)
+                pytest.skip("This test requires gpg")
+            raise
         yield short_name_tmpdir
 
     # clean up, since we are doing this manually
@@ -1007,6 +1007,29 @@ def test_reindex_removed_prefix_is_not_installed(mutable_database, mock_store, c
     assert mutable_database.query_one("libelf", installed=False)
 
 
+def test_reindex_with_invalid_record(mutable_database, capfd):
+    """Tests that reindexing rebuilds a database whose index has an invalid install record,
+    even if the index is read lazily.
+    """
+    libelf = mutable_database.query_one("libelf")
+    with open(mutable_database._index_path) as f:
+        content = f.read()
+    # Invalidate the record, keeping the layout of the index
+    record = f'"{libelf.dag_hash()}":{{"spec":{{"name":"libelf","version":"0.8.13"'
+    assert record in content
+    with open(mutable_database._index_path, "w") as f:
+        f.write(content.replace(record, record.replace('"0.8.13"', "{}")))
+
+    db = spack.database.Database(mutable_database.root)
+    with pytest.raises(spack.database.CorruptDatabaseError):
+        db.query_local("libelf")
+
+    db = spack.database.Database(mutable_database.root)
+    db.reindex(spack.store.STORE.layout)
+    assert "Spack database was corrupt" in capfd.readouterr()[1]
+    assert db.query_local("libelf") == [libelf]
+
+
 def test_reindex_when_all_prefixes_are_removed(mutable_database, mock_store):
     # Remove all non-external installations from the filesystem
     for spec in spack.store.STORE.db.query_local():
@@ -1140,3 +1163,195 @@ def test_database_errors_with_just_a_version_key(tmp_path):
 
     with pytest.raises(spack.database.InvalidDatabaseVersionError):
         spack.database.Database(root).query_local()
+
+
+def _index_state(index):
+    return index.by_name, index.by_explicit, index.by_date
+
+
+def test_query_index_is_updated_with_records(mutable_database):
+    """Tests that the indexes used by queries are consistent with the records, after the
+    database has been modified in different ways.
+    """
+    mutable_database.update_explicit(mutable_database.query_one("dyninst"), True)
+    mutable_database.mark(mutable_database.query_one("libelf"), "installation_time", 0.0)
+    mutable_database.remove("mpileaks ^mpich")
+    mutable_database.remove("callpath ^mpich")
+
+    with mutable_database.read_transaction():
+        expected = spack.database.QueryIndex.from_records(mutable_database._data)
+        assert _index_state(mutable_database._query_index) == _index_state(expected)
+
+    assert mutable_database.query_local("dyninst", explicit=True)
+    assert not mutable_database.query_local("libelf", start_date=datetime.datetime(2000, 1, 1))
+
+
+@pytest.mark.parametrize("query", ["mpileaks", "mpi", "mpich@1:", "callpath ^mpich2", "%gcc"])
+@pytest.mark.parametrize("explicit", [any, True, False])
+def test_indexed_query_matches_linear_scan(query, explicit, database):
+    """Tests that narrowing down the records with indexes doesn't change query results."""
+    with database.read_transaction():
+        expected = [
+            rec.spec
+            for rec in database._data.values()
+            if rec.spec.satisfies(query) and (explicit is any or explicit == rec.explicit)
+        ]
+    result = database.query_local(query, installed=any, explicit=explicit)
+    assert sorted(result) == sorted(expected)
+
+
+def test_query_index_candidates():
+    """Tests the selection of candidates from the indexes, without a database."""
+    records = {
+        "a": spack.database.InstallRecord(
+            spack.spec.Spec("zlib@=1.2.13"), None, True, explicit=True, installation_time=10.0
+        ),
+        "b": spack.database.InstallRecord(
+            spack.spec.Spec("zlib@=1.3"), None, True, explicit=False, installation_time=1e9
+        ),
+        "c": spack.database.InstallRecord(
+            spack.spec.Spec("mpich@=4.1"), None, True, explicit=True, installation_time=2e9
+        ),
+    }
+    index = spack.database.QueryIndex.from_records(records)
+
+    assert index.candidates() is None
+    assert index.candidates(names=["zlib"]) == {"a", "b"}
+    assert index.candidates(names=["zlib"], versions=vn.VersionList([":1.2"])) == {"a"}
+    assert index.candidates(names=["zlib", "mpich"], explicit=True) == {"a", "c"}
+    assert index.candidates(start_date=datetime.datetime.fromtimestamp(1.5e9)) == {"c"}
+    assert index.candidates(end_date=datetime.datetime.fromtimestamp(1e6)) == {"a"}
+
+    index.remove("a", records["a"])
+    assert index.candidates(names=["zlib"]) == {"b"}
+    assert "a" not in index.by_explicit[True]
+    assert [key for _, key in index.by_date] == ["b", "c"]
+
+
+@pytest.fixture()
+def journaled_database(mutable_database):
+    """Returns a database writing to a journal, on top of the mutable mock database"""
+    db = spack.database.Database(mutable_database.root, journal=True)
+    # The first write creates an index that journal entries can refer to
+    with db.write_transaction():
+        pass
+    assert not os.path.exists(db._journal_path)
+    return db
+
+
+def test_journal_is_replayed_by_readers(journaled_database, monkeypatch):
+    """Tests that writes are appended to the journal, and that readers replay only the
+    entries they haven't seen yet.
+    """
+    reader = spack.database.Database(journaled_database.root)
+    expected = set(reader.query_local(installed=any))
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("the index should not be read again")
+
+    monkeypatch.setattr(reader, "_read_from_file", _fail)
+    index_stat = os.stat(journaled_database._index_path)
+
+    journaled_database.remove("mpileaks ^mpich")
+    journaled_database.update_explicit(journaled_database.query_one("libelf"), True)
+
+    assert os.stat(journaled_database._index_path).st_mtime_ns == index_stat.st_mtime_ns
+    assert os.path.getsize(journaled_database._journal_path) > 0
+
+    result = reader.query_local(installed=any)
+    assert len(result) == len(expected) - 1
+    assert not reader.query_local("mpileaks ^mpich")
+    assert reader.query_local("libelf", explicit=True)
+    with reader.read_transaction():
+        reader._check_ref_counts()
+
+    # A new database reads the index and the whole journal
+    fresh = spack.database.Database(journaled_database.root)
+    assert sorted(fresh.query_local(installed=any)) == sorted(result)
+
+
+def test_journal_is_compacted(journaled_database, monkeypatch):
+    """Tests that the journal is merged into the index once it is too large."""
+    journaled_database.remove("mpileaks ^mpich")
+    assert os.path.exists(journaled_database._journal_path)
+
+    monkeypatch.setattr(spack.database, "_JOURNAL_COMPACTION_RATIO", 0)
+    journaled_database.remove("mpileaks ^mpich2")
+    assert not os.path.exists(journaled_database._journal_path)
+
+    with open(journaled_database._index_path) as f:
+        installs = json.load(f)["database"]["installs"]
+    assert len([x for x in installs.values() if x["spec"]["name"] == "mpileaks"]) == 1
+
+
+def test_journal_ignores_incomplete_entries(journaled_database):
+    """Tests that entries left incomplete by an interrupted write are ignored, and
+    overwritten by the next write.
+    """
+    journaled_database.remove("mpileaks ^mpich")
+    with open(journaled_database._journal_path, "a") as f:
+        f.write('{"journal": "incomplete')
+
+    assert len(spack.database.Database(journaled_database.root).query_local("mpileaks")) == 2
+
+    journaled_database.remove("mpileaks ^mpich2")
+    assert len(spack.database.Database(journaled_database.root).query_local("mpileaks")) == 1
+
+
+def test_journal_of_previous_index_is_ignored(journaled_database, monkeypatch):
+    """Tests that journal entries referring to a previous index are not replayed."""
+    journaled_database.mark("mpileaks ^mpich2", "explicit", False)
+    with open(journaled_database._journal_path) as f:
+        stale_entries = f.read()
+
+    # Compact the journal into a new index, then restore the stale journal
+    monkeypatch.setattr(spack.database, "_JOURNAL_COMPACTION_RATIO", 0)
+    journaled_database.mark("mpileaks ^mpich2", "explicit", True)
+    assert not os.path.exists(journaled_database._journal_path)
+    with open(journaled_database._journal_path, "w") as f:
+        f.write(stale_entries)
+
+    db = spack.database.Database(journaled_database.root)
+    assert db.query_local("mpileaks ^mpich2", explicit=True)
+
+
+def test_lazy_lookup_materializes_only_dependencies(mutable_database):
+    """Tests that looking up a hash in a database that has not been fully loaded only
+    materializes the records in the DAG of the corresponding spec.
+    """
+    dyninst = mutable_database.query_one("dyninst")
+    db = spack.database.Database(mutable_database.root)
+
+    spec = db.get_by_hash_local(dyninst.dag_hash())[0]
+    assert spec == dyninst and spec.concrete
+    expected = set(x.dag_hash() for x in dyninst.traverse())
+    assert set(db._lazy_index.records) == expected
+
+    # Abstract hashes select candidates by prefix
+    assert db.query_local(f"/{dyninst.dag_hash()[:7]}") == [spec]
+    assert set(db._lazy_index.records) == expected
+
+    # Records that were already materialized are reused when loading the others
+    assert len(db.query_local(installed=any)) == len(mutable_database.query_local(installed=any))
+    assert db._lazy_index is None
+    assert db.get_by_hash_local(dyninst.dag_hash())[0] is spec
+
+
+def test_lazy_index_requires_known_layout(mutable_database, tmp_path):
+    """Tests that index files that don't have the layout written by Spack are read
+    eagerly.
+    """
+    assert spack.database.LazyIndex.from_file(mutable_database._index_path) is not None
+
+    with open(mutable_database._index_path) as f:
+        content = json.load(f)
+
+    index_path = tmp_path / "index.json"
+    with open(index_path, "w") as f:
+        json.dump(content, f, indent=2)
+    assert spack.database.LazyIndex.from_file(str(index_path)) is None
+
+    db = spack.database.Database(str(tmp_path))
+    db._read_from_file(str(index_path))
+    assert db._lazy_index is None
+    assert len(db.query_local(installed=any)) == len(mutable_database.query_local(installed=any))
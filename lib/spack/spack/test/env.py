@@ -12,7 +12,9 @@
 import llnl.util.filesystem as fs
 
 import spack.environment as ev
+import spack.solver.asp
 import spack.spec
+import spack.util.cpus
 from spack.environment.environment import (
     EnvironmentManifestFile,
     SpackEnvironmentViewError,
@@ -723,6 +725,55 @@ def test_variant_propagation_with_unify_false(tmp_path, mock_packages, config):
         assert node.satisfies("+foo")
 
 
+def test_concretize_separately_reuses_workers(tmp_path, mock_packages, config, monkeypatch):
+    """Tests that roots are concretized separately by a pool of workers that is reused across
+    specs, and that the results are added to the environment with their common dependencies
+    unified.
+    """
+    setups = tmp_path / "setups"
+    solver_setup = spack.solver.asp.SpackSolverSetup.setup
+
+    def _setup(self, *args, **kwargs):
+        # Workers are forked, so record the process running each solver setup in a file
+        with open(setups, "a") as f:
+            f.write(f"{os.getpid()}\n")
+        return solver_setup(self, *args, **kwargs)
+
+    monkeypatch.setattr(spack.solver.asp.SpackSolverSetup, "setup", _setup)
+    # Use a pool of workers even on a single core
+    monkeypatch.setattr(spack.util.cpus, "determine_number_of_jobs", lambda **kwargs: 2)
+    manifest = tmp_path / "spack.yaml"
+    manifest.write_text(
+        """
+    spack:
+      specs:
+      - libelf
+      - libdwarf
+      - zlib
+      - pkg-c
+      concretizer:
+        unify: false
+    """
+    )
+    with ev.Environment(tmp_path) as env:
+        concretized = env.concretize()
+
+    # There is a solver setup per root, and no more processes than workers in the pool
+    pids = setups.read_text().split()
+    assert len(pids) == 4
+    assert len(set(pids)) <= 2
+
+    assert [str(user_spec) for user_spec, _ in concretized] == [
+        "libelf",
+        "libdwarf",
+        "zlib",
+        "pkg-c",
+    ]
+    libelf, libdwarf, _, _ = (concrete for _, concrete in concretized)
+    assert libdwarf.dependencies("libelf")[0] is libelf
+    assert {s.name for s in env.new_specs} == {"libelf", "libdwarf", "zlib", "pkg-c"}
+
+
 def test_env_with_include_defs(mutable_mock_env_path, mock_packages):
     """Test environment with included definitions file."""
     env_path = mutable_mock_env_path
@@ -3,10 +3,12 @@
 #
 # SPDX-License-Identifier: (Apache-2.0 OR MIT)
 
+import concurrent.futures
 import glob
 import os
 import shutil
 import sys
+import threading
 from typing import List, Optional, Union
 
 import py
@@ -206,6 +208,111 @@ def test_try_install_from_binary_cache(install_mockery, mock_packages, monkeypat
     assert not result
 
 
+def _synthetic_concrete_spec(name):
+    spec = spack.spec.Spec(f"{name}@=1.0 arch=linux-ubuntu22.04-x86_64")
+    spec._mark_concrete()
+    return spec
+
+
+def _mirrors_for_spec(names):
+    """Returns a mock of get_mirrors_for_spec, finding only the specs with the given names"""
+
+    def _get_mirrors_for_spec(spec, **kwargs):
+        return [{"spec": spec, "mirror_url": "file:///mirror"}] if spec.name in names else []
+
+    return _get_mirrors_for_spec
+
+
+def test_binary_downloads(monkeypatch):
+    """Tests that tarballs are downloaded in a thread pool, and that the tarballs that were not
+    installed are removed on shutdown."""
+    deleted = []
+    monkeypatch.setattr(
+        spack.binary_distribution, "get_mirrors_for_spec", _mirrors_for_spec(("zlib", "bzip2"))
+    )
+    monkeypatch.setattr(
+        spack.binary_distribution, "download_tarball", lambda spec, *args: {"name": spec.name}
+    )
+    monkeypatch.setattr(
+        spack.binary_distribution, "_delete_staged_downloads", lambda x: deleted.append(x["name"])
+    )
+    zlib, bzip2, cmake = (_synthetic_concrete_spec(x) for x in ("zlib", "bzip2", "cmake"))
+
+    downloads = inst.BinaryDownloads(jobs=2)
+    for spec in (zlib, bzip2, cmake):
+        downloads.submit(spec)
+
+    # Specs that are not in the indices of the buildcaches are not downloaded ahead
+    assert cmake not in downloads
+    assert zlib in downloads
+    assert downloads.pop(zlib) == {"name": "zlib"}
+    assert zlib not in downloads
+
+    # Downloads that are completed are removed, pending ones are cancelled
+    concurrent.futures.wait(downloads.downloads.values())
+    downloads.shutdown()
+    assert deleted == ["bzip2"]
+
+
+def test_binary_downloads_shutdown_without_waiting(monkeypatch):
+    """Tests that shutting down without waiting cancels pending downloads, and removes the
+    tarballs of the downloads in progress when they complete."""
+    deleted = []
+    started, release = threading.Event(), threading.Event()
+
+    def _download_tarball(spec, *args):
+        started.set()
+        release.wait()
+        return {"name": spec.name}
+
+    monkeypatch.setattr(
+        spack.binary_distribution, "get_mirrors_for_spec", _mirrors_for_spec(("zlib", "bzip2"))
+    )
+    monkeypatch.setattr(spack.binary_distribution, "download_tarball", _download_tarball)
+    monkeypatch.setattr(
+        spack.binary_distribution, "_delete_staged_downloads", lambda x: deleted.append(x["name"])
+    )
+    zlib, bzip2 = _synthetic_concrete_spec("zlib"), _synthetic_concrete_spec("bzip2")
+
+    downloads = inst.BinaryDownloads(jobs=1)
+    downloads.submit(zlib)
+    downloads.submit(bzip2)
+    futures = list(downloads.downloads.values())
+    started.wait()
+
+    downloads.shutdown(wait=False)
+    assert not futures[0].done()
+    assert futures[1].cancelled()
+
+    release.set()
+    concurrent.futures.wait(futures)
+    downloads.executor.shutdown(wait=True)
+    assert deleted == ["zlib"]
+
+
+def test_process_binary_cache_tarball_downloaded_ahead(mock_packages, monkeypatch, capfd):
+    """Tests that tarballs downloaded ahead of their installation are not downloaded again"""
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("the tarball was downloaded again")
+
+    spec = _synthetic_concrete_spec("pkg-a")
+    monkeypatch.setattr(
+        spack.binary_distribution, "get_mirrors_for_spec", _mirrors_for_spec(("pkg-a",))
+    )
+    monkeypatch.setattr(spack.binary_distribution, "download_tarball", lambda *args: {})
+    downloads = inst.BinaryDownloads(jobs=2)
+    downloads.submit(spec)
+
+    monkeypatch.setattr(spack.binary_distribution, "download_tarball", _fail)
+    monkeypatch.setattr(spack.binary_distribution, "extract_tarball", _noop)
+    monkeypatch.setattr(spack.database.Database, "add", _noop)
+    assert inst._try_install_from_binary_cache(spec.package, False, False, downloads=downloads)
+    assert spec not in downloads
+    assert "Extracting pkg-a" in capfd.readouterr()[0]
+    downloads.shutdown()
+
+
 def test_installer_repr(install_mockery):
     installer = create_installer(["trivial-install-test-package"])
 
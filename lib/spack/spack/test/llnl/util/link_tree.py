@@ -11,7 +11,13 @@
 
 import llnl.util.symlink
 from llnl.util.filesystem import mkdirp, touchp, visit_directory_tree, working_dir
-from llnl.util.link_tree import DestinationMergeVisitor, LinkTree, SourceMergeVisitor
+from llnl.util.link_tree import (
+    DestinationMergeVisitor,
+    LinkTree,
+    SourceMergeVisitor,
+    replay_visit,
+    scan_source_trees,
+)
 from llnl.util.symlink import _windows_can_symlink, islink, readlink, symlink
 
 from spack.stage import Stage
@@ -397,3 +403,34 @@ def test_source_merge_visitor_does_deals_with_dangling_symlinks(tmp_path: pathli
 
     # The first file encountered should be listed.
     assert visitor.files == {str(tmp_path / "view" / "file"): (str(tmp_path / "dir_a"), "file")}
+
+
+@pytest.mark.parametrize("jobs", [1, 4])
+def test_scan_source_trees_replays_like_sequential_visit(tmp_path: pathlib.Path, jobs):
+    """Concurrent scans of source trees replayed in order give the same merge as visiting the
+    trees one after the other."""
+    for prefix, files in (
+        ("x", ["bin/x", "lib/libx.so", "include/x/x.h", ".spack/spec.json", "LICENSE"]),
+        ("y", ["bin/y", "lib/liby.so", "share/doc/y", "LICENSE"]),
+    ):
+        for f in files:
+            touchp(str(tmp_path / prefix / f))
+    symlink(str(tmp_path / "x" / "bin" / "x"), str(tmp_path / "y" / "bin" / "x"))
+    symlink("lib", str(tmp_path / "y" / "lib64"))
+    symlink("..", str(tmp_path / "y" / "share" / "parent"))
+
+    roots = [str(tmp_path / "x"), str(tmp_path / "y")]
+    ignore = lambda f: f == ".spack"
+
+    expected = SourceMergeVisitor(ignore=ignore)
+    for root in roots:
+        visit_directory_tree(root, expected)
+
+    visitor = SourceMergeVisitor(ignore=ignore)
+    for root, events in zip(roots, scan_source_trees(roots, ignore=ignore, jobs=jobs)):
+        replay_visit(visitor, root, events)
+
+    assert list(visitor.files.items()) == list(expected.files.items())
+    assert list(visitor.directories.items()) == list(expected.directories.items())
+    assert [c.dst for c in visitor.file_conflicts] == [c.dst for c in expected.file_conflicts]
+    assert os.path.join("lib64", "liby.so") in visitor.files
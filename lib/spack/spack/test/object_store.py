@@ -0,0 +1,110 @@
+# Copyright 2013-2024 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+import os
+
+import pytest
+
+import spack.object_store
+
+pytestmark = pytest.mark.not_on_windows("Hard links are not tested on Windows")
+
+
+def _make_prefix(path, files):
+    for rel_path, contents in files.items():
+        file = path / rel_path
+        file.parent.mkdir(parents=True, exist_ok=True)
+        file.write_bytes(contents)
+    return path
+
+
+def test_identical_files_share_objects(tmp_path):
+    objects = spack.object_store.ObjectStore(str(tmp_path / "objects"))
+    files = {
+        "include/a.h": b"header",
+        "share/doc": b"docs",
+        "empty": b"",
+        ".spack/spec.json": b"{}",
+    }
+    first = _make_prefix(tmp_path / "first", files)
+    second = _make_prefix(tmp_path / "second", {**files, "share/doc": b"other docs"})
+
+    # The first prefix populates the store, and doesn't share anything
+    assert objects.add_prefix(str(first), skip=(".spack",)) == (0, 0)
+    assert (first / "include" / "a.h").stat().st_nlink == 2
+
+    # The second prefix shares only the identical, non-empty files
+    assert objects.add_prefix(str(second), skip=(".spack",)) == (1, len(b"header"))
+    assert os.path.samefile(first / "include" / "a.h", second / "include" / "a.h")
+    assert (second / "include" / "a.h").read_bytes() == b"header"
+    assert not os.path.samefile(first / "share" / "doc", second / "share" / "doc")
+    assert (first / "empty").stat().st_nlink == 1
+    assert (second / ".spack" / "spec.json").stat().st_nlink == 1
+
+    # Deduplicating again is a no-op
+    assert objects.add_prefix(str(second), skip=(".spack",)) == (0, 0)
+
+
+def test_files_with_different_permissions_are_not_shared(tmp_path):
+    objects = spack.object_store.ObjectStore(str(tmp_path / "objects"))
+    first = _make_prefix(tmp_path / "first", {"bin/x": b"#!/bin/sh"})
+    second = _make_prefix(tmp_path / "second", {"bin/x": b"#!/bin/sh"})
+    (first / "bin" / "x").chmod(0o755)
+    (second / "bin" / "x").chmod(0o644)
+
+    objects.add_prefix(str(first))
+    assert objects.add_prefix(str(second)) == (0, 0)
+    assert (first / "bin" / "x").stat().st_mode & 0o777 == 0o555
+    assert (second / "bin" / "x").stat().st_mode & 0o777 == 0o444
+
+
+def test_modified_objects_are_not_shared(tmp_path):
+    objects = spack.object_store.ObjectStore(str(tmp_path / "objects"))
+    first = _make_prefix(tmp_path / "first", {"a": b"shared"})
+    second = _make_prefix(tmp_path / "second", {"a": b"shared"})
+    third = _make_prefix(tmp_path / "third", {"a": b"shared"})
+    objects.add_prefix(str(first))
+
+    # A package makes its file writable again, and modifies it in place
+    (first / "a").chmod(0o644)
+    (first / "a").write_bytes(b"modified")
+    (first / "a").chmod(0o444)
+
+    # The modified object is replaced, instead of being shared
+    assert objects.add_prefix(str(second)) == (0, 0)
+    assert (second / "a").read_bytes() == b"shared"
+    assert objects.add_prefix(str(third)) == (1, len(b"shared"))
+    assert os.path.samefile(second / "a", third / "a")
+    assert (first / "a").read_bytes() == b"modified"
+
+
+def test_copies_of_objects_are_writable(tmp_path):
+    objects = spack.object_store.ObjectStore(str(tmp_path / "objects"))
+    prefix = _make_prefix(tmp_path / "prefix", {"a": b"contents"})
+    objects.add_prefix(str(prefix))
+    assert (prefix / "a").stat().st_mode & 0o777 == 0o444
+
+    spack.object_store.copy_unshared(str(prefix / "a"), str(tmp_path / "copy"))
+    assert (tmp_path / "copy").stat().st_mode & 0o777 == 0o644
+    assert (tmp_path / "copy").stat().st_nlink == 1
+
+
+def test_prune_removes_unused_objects(tmp_path):
+    objects = spack.object_store.ObjectStore(str(tmp_path / "objects"))
+    first = _make_prefix(tmp_path / "first", {"a": b"shared", "b": b"unique"})
+    second = _make_prefix(tmp_path / "second", {"a": b"shared"})
+    objects.add_prefix(str(first))
+    objects.add_prefix(str(second))
+
+    # Objects are still used by the second prefix
+    (first / "a").unlink()
+    assert objects.prune() == (0, 0)
+
+    # Now "b" is unused, while "a" is still used
+    (first / "b").unlink()
+    assert objects.prune() == (1, len(b"unique"))
+    assert (second / "a").stat().st_nlink == 2
+
+    (second / "a").unlink()
+    assert objects.prune() == (1, len(b"shared"))
@@ -7,9 +7,14 @@
 import base64
 import email.message
 import hashlib
+import http.server
 import io
 import json
+import os
 import re
+import socketserver
+import ssl
+import threading
 import urllib.error
 import urllib.parse
 import urllib.request
@@ -18,6 +23,7 @@
 from urllib.request import Request
 
 import spack.oci.oci
+import spack.util.executable
 from spack.oci.image import Digest
 from spack.oci.opener import OCIAuthHandler
 
@@ -141,15 +147,14 @@ def clear_log(self):
 class InMemoryOCIRegistry(DummyServer):
     """This implements the basic OCI registry API, but in memory.
 
-    It supports two types of blob uploads:
+    It supports three types of blob uploads:
     1. POST + PUT: the client first starts a session with POST, then does a large PUT request
     2. POST: the client does a single POST request with the whole blob
+    3. POST + PATCH + PUT: the client starts a session with POST, uploads chunks with PATCH
+       requests, and closes the session with an empty PUT request
 
     Option 2 is not supported by all registries, so we allow to disable it,
-    with allow_single_post=False.
-
-    A third option is to use the chunked upload, but this is not implemented here, because
-    it's typically a major performance hit in upload speed, so we're not using it in Spack."""
+    with allow_single_post=False."""
 
     def __init__(
         self, domain: str, allow_single_post: bool = True, tags_per_page: int = 100
@@ -158,6 +163,7 @@ def __init__(
         self.router.register("GET", r"/v2/", self.index)
         self.router.register("HEAD", r"/v2/(?P<name>.+)/blobs/(?P<digest>.+)", self.head_blob)
         self.router.register("POST", r"/v2/(?P<name>.+)/blobs/uploads/", self.start_session)
+        self.router.register("PATCH", r"/upload", self.patch_session)
         self.router.register("PUT", r"/upload", self.put_session)
         self.router.register("PUT", r"/v2/(?P<name>.+)/manifests/(?P<ref>.+)", self.put_manifest)
         self.router.register("GET", r"/v2/(?P<name>.+)/manifests/(?P<ref>.+)", self.get_manifest)
@@ -173,6 +179,9 @@ def __init__(
         # Used for POST + PUT upload. This is a map from session ID to image name
         self.sessions: Dict[str, str] = {}
 
+        # Used for chunked uploads. This is a map from session ID to the data received so far
+        self.chunks: Dict[str, bytes] = {}
+
         # Set of sha256:... digests that are known to the registry
         self.blobs: Dict[str, bytes] = {}
 
@@ -207,6 +216,23 @@ def start_session(self, req: Request, name: str):
 
         return MockHTTPResponse(202, "Accepted", headers={"Location": f"/upload?uuid={id}"})
 
+    def patch_session(self, req: Request):
+        query = urllib.parse.parse_qs(urllib.parse.urlparse(req.full_url).query)
+        id = query["uuid"][0]
+        assert id in self.sessions
+
+        # Chunks must be uploaded in order
+        data = self.chunks.get(id, b"")
+        chunk = self._require_data(req)
+        assert req.get_header("Content-range") == f"{len(data)}-{len(data) + len(chunk) - 1}"
+        self.chunks[id] = data + chunk
+
+        return MockHTTPResponse(
+            202,
+            "Accepted",
+            headers={"Location": f"/upload?uuid={id}", "Range": f"0-{len(self.chunks[id]) - 1}"},
+        )
+
     def put_session(self, req: Request):
         # Do the upload.
         result = urllib.parse.urlparse(req.full_url)
@@ -221,7 +247,9 @@ def put_session(self, req: Request):
 
         name, digest = self.sessions[id], Digest.from_string(query["digest"][0])
 
-        response = self.handle_upload(req, name=name, digest=digest)
+        response = self.handle_upload(
+            req, name=name, digest=digest, prefix=self.chunks.pop(id, b"")
+        )
 
         # End the session
         del self.sessions[id]
@@ -277,9 +305,9 @@ def _require_data(self, req: Request) -> bytes:
 
         raise ValueError("req.data should be bytes or have a read() method")
 
-    def handle_upload(self, req: Request, name: str, digest: Digest):
+    def handle_upload(self, req: Request, name: str, digest: Digest, prefix: bytes = b""):
         """Verify the digest, save the blob, return created status"""
-        data = self._require_data(req)
+        data = prefix + self._require_data(req) if req.data is not None else prefix
         assert hashlib.sha256(data).hexdigest() == digest.digest
         self.blobs[str(digest)] = data
         return MockHTTPResponse(201, "Created", headers={"Location": f"/v2/{name}/blobs/{digest}"})
@@ -422,6 +450,150 @@ def private_auth(self, req: Request):
         return MockHTTPResponse.with_json(200, "OK", body={"token": "private_token"})
 
 
+class TrivialAuthServer(DummyServer):
+    """A trivial auth server that hands out a bearer token at GET /login."""
+
+    def __init__(self, domain: str, token: str) -> None:
+        super().__init__(domain)
+        self.router.register("GET", "/login", self.login)
+        self.token = token
+
+    def login(self, req: Request):
+        return MockHTTPResponse.with_json(200, "OK", body={"token": self.token})
+
+
+def create_self_signed_certificate(directory: str) -> Tuple[str, str]:
+    """Creates a certificate for localhost with openssl, and returns the paths of the
+    certificate and of its private key."""
+    cert, key = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+    openssl = spack.util.executable.which("openssl", required=True)
+    openssl(
+        "req",
+        "-x509",
+        "-newkey",
+        "rsa:2048",
+        "-nodes",
+        "-days",
+        "1",
+        "-subj",
+        "/CN=localhost",
+        "-addext",
+        "subjectAltName=DNS:localhost,IP:127.0.0.1",
+        "-keyout",
+        key,
+        "-out",
+        cert,
+        output=str,
+        error=str,
+    )
+    return cert, key
+
+
+class _ThreadingHTTPServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+
+
+class _LocalhostRequestHandler(http.server.BaseHTTPRequestHandler):
+    """Translates HTTP requests to urllib requests for a DummyServer, and its responses back"""
+
+    protocol_version = "HTTP/1.1"
+    timeout = 30
+
+    # Headers and body are sent separately, which would otherwise stall on delayed ACKs
+    disable_nagle_algorithm = True
+
+    def _dispatch(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        data = self.rfile.read(length) if length else None
+        server = self.server.stand_in
+        req = Request(
+            url=f"https://{server.domain}{self.path}",
+            data=data,
+            headers=dict(self.headers.items()),
+            method=self.command,
+        )
+
+        try:
+            response = server.route(self.path).handle(req)
+            body = response._body.read() if response._body is not None else b""
+        except Exception as e:
+            response = MockHTTPResponse(500, "Internal Server Error")
+            body = f"{e.__class__.__name__}: {e}".encode()
+
+        self.send_response(response.status, response.reason)
+        for key, value in response.headers.items():
+            if key.lower() != "content-length":
+                self.send_header(key, value)
+
+        # Responses to HEAD requests have the length of the body of a GET request
+        if self.command == "HEAD":
+            self.send_header("Content-Length", response.headers.get("Content-Length", "0"))
+            self.end_headers()
+        else:
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    do_GET = do_HEAD = do_POST = do_PUT = do_PATCH = _dispatch
+
+    def log_message(self, format, *args):
+        pass
+
+
+class LocalhostHTTPSServer:
+    """Serves DummyServers over HTTPS on localhost, in a background thread, so that requests
+    go through a real opener, with TLS and persistent connections. Clients must trust the
+    certificate, e.g. through ``config:ssl_certs``.
+
+    Each request is handled in its own thread by the server with the longest path prefix
+    that matches it, see :meth:`add_server`.
+
+    Example::
+
+        with LocalhostHTTPSServer(cert, key) as server:
+            registry = InMemoryOCIRegistry(server.domain)
+            server.add_server(registry)
+            ...
+    """
+
+    def __init__(self, certfile: str, keyfile: str) -> None:
+        self.httpd = _ThreadingHTTPServer(("127.0.0.1", 0), _LocalhostRequestHandler)
+        self.httpd.stand_in = self  # type: ignore[attr-defined]
+
+        # Do the TLS handshake in the thread handling the connection, not in the one accepting
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(certfile, keyfile)
+        self.httpd.socket = context.wrap_socket(
+            self.httpd.socket, server_side=True, do_handshake_on_connect=False
+        )
+
+        #: The domain of the servers, e.g. "localhost:12345"
+        self.domain = f"localhost:{self.httpd.server_address[1]}"
+
+        self.servers: List[Tuple[str, DummyServer]] = []
+        self.thread: Optional[threading.Thread] = None
+
+    def add_server(self, server: DummyServer, prefix: str = "/") -> "LocalhostHTTPSServer":
+        """Handles requests with paths starting with the prefix by the server"""
+        self.servers.append((prefix, server))
+        self.servers.sort(key=lambda x: len(x[0]), reverse=True)
+        return self
+
+    def route(self, path: str) -> DummyServer:
+        return next(server for prefix, server in self.servers if path.startswith(prefix))
+
+    def __enter__(self) -> "LocalhostHTTPSServer":
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.thread is not None:
+            self.thread.join()
+
+
 def create_opener(*servers: DummyServer, credentials_provider=None):
     """Creates a mock opener, that can be used to fake requests to a list
     of servers."""
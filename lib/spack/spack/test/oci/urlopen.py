@@ -15,6 +15,8 @@
 import pytest
 
 import spack.mirror
+import spack.oci.opener
+import spack.util.executable
 from spack.oci.image import Digest, ImageReference, default_config, default_manifest
 from spack.oci.oci import (
     copy_missing_layers,
@@ -38,10 +40,13 @@
     DummyServerUrllibHandler,
     InMemoryOCIRegistry,
     InMemoryOCIRegistryWithAuth,
+    LocalhostHTTPSServer,
     MiddlewareError,
     MockBearerTokenServer,
     MockHTTPResponse,
+    TrivialAuthServer,
     create_opener,
+    create_self_signed_certificate,
 )
 
 
@@ -225,18 +230,6 @@ def test_wrong_bearer_token_returned_by_auth_server():
     assert e.value.getcode() == 401
 
 
-class TrivialAuthServer(DummyServer):
-    """A trivial auth server that hands out a bearer token at GET /login."""
-
-    def __init__(self, domain: str, token: str) -> None:
-        super().__init__(domain)
-        self.router.register("GET", "/login", self.login)
-        self.token = token
-
-    def login(self, req: Request):
-        return MockHTTPResponse.with_json(200, "OK", body={"token": self.token})
-
-
 def test_registry_with_short_lived_bearer_tokens():
     """An issued bearer token is mostly opaque to the client, but typically
     it embeds a short-lived expiration date. To speed up requests to a registry,
@@ -286,6 +279,30 @@ def test_registry_with_short_lived_bearer_tokens():
     ]
 
 
+def test_unauthorized_request_reuses_token_obtained_meanwhile():
+    """When concurrent requests are unauthorized, only the first one should login, and the
+    others should retry with the token it obtained."""
+    image = ImageReference.from_string("private.example.com/image")
+    auth_server = TrivialAuthServer("auth.example.com", token="token")
+    registry_server = InMemoryOCIRegistryWithAuth(
+        image.domain, token="token", realm="https://auth.example.com/login"
+    )
+    urlopen = create_opener(
+        registry_server,
+        auth_server,
+        credentials_provider=lambda domain: UsernamePassword("user", "pass"),
+    ).open
+
+    assert urlopen(image.endpoint()).status == 200
+
+    # A request sent with an outdated token before the login completed
+    request = Request(image.endpoint())
+    request.add_unredirected_header("Authorization", "Bearer outdated")
+    assert urlopen(request).status == 200
+
+    assert auth_server.requests == [("GET", "/login")]
+
+
 class InMemoryRegistryWithUnsupportedAuth(InMemoryOCIRegistry):
     """A registry that does set a WWW-Authenticate header, but
     with a challenge we don't support."""
@@ -388,6 +405,63 @@ def test_oci_registry_upload(tmpdir, client_single_request, server_single_reques
     )
 
 
+@pytest.mark.parametrize("chunk_size,expected_chunks", [(0, 0), (5, 3), (100, 0)])
+def test_oci_registry_chunked_upload(tmpdir, chunk_size, expected_chunks):
+    registry = InMemoryOCIRegistry("example.com", allow_single_post=False)
+    urlopen = create_opener(registry).open
+
+    blob = tmpdir.join("blob")
+    blob.write("Hello world!")
+    image = ImageReference.from_string("example.com/image:latest")
+    digest = Digest.from_sha256(hashlib.sha256(blob.read_binary()).hexdigest())
+
+    assert upload_blob(image, blob.strpath, digest, chunk_size=chunk_size, _urlopen=urlopen)
+    assert registry.blobs[str(digest)] == b"Hello world!"
+    assert not registry.sessions and not registry.chunks
+
+    methods = [method for method, _ in registry.requests]
+    assert methods == ["HEAD", "POST"] + ["PATCH"] * expected_chunks + ["PUT"]
+
+
+@pytest.mark.skipif(not spack.util.executable.which("openssl"), reason="requires openssl")
+def test_localhost_registry_with_default_opener(tmp_path, mutable_config):
+    """Push and pull through the default opener, with TLS and bearer token authentication,
+    to a registry served on localhost."""
+    cert, key = create_self_signed_certificate(str(tmp_path))
+    mutable_config.set("config:ssl_certs", cert)
+
+    with LocalhostHTTPSServer(cert, key) as server:
+        registry = InMemoryOCIRegistryWithAuth(
+            server.domain, token="token", realm=f"https://{server.domain}/login"
+        )
+        auth_server = TrivialAuthServer(server.domain, token="token")
+        server.add_server(registry).add_server(auth_server, prefix="/login")
+        urlopen = spack.oci.opener.create_opener().open
+
+        image = ImageReference.from_string(f"{server.domain}/image:latest")
+        blob = tmp_path / "blob"
+        blob.write_bytes(b"Hello world!")
+        digest = Digest.from_sha256(hashlib.sha256(blob.read_bytes()).hexdigest())
+
+        assert upload_blob(image, str(blob), digest, chunk_size=5, _urlopen=urlopen)
+        assert not upload_blob(image, str(blob), digest, _urlopen=urlopen)
+        assert urlopen(image.blob_url(digest)).read() == b"Hello world!"
+
+        manifest = default_manifest()
+        manifest["layers"].append(
+            {
+                "mediaType": "application/vnd.oci.image.layer.v1.tar+gzip",
+                "digest": str(digest),
+                "size": 12,
+            }
+        )
+        upload_manifest(image, manifest, _urlopen=urlopen)
+        assert list_tags(image, _urlopen=urlopen) == ["latest"]
+
+    # Logged in once
+    assert auth_server.requests == [("GET", "/login")]
+
+
 def test_copy_missing_layers(tmpdir, config):
     """Test copying layers from one registry to another.
     Creates 3 blobs, 1 config and 1 manifest in registry A
@@ -6,6 +6,7 @@
 import os.path
 import re
 import shutil
+import threading
 
 import pytest
 
@@ -17,6 +18,7 @@
 import spack.spec
 import spack.store
 import spack.tengine
+import spack.util.cpus
 import spack.util.executable
 
 pytestmark = pytest.mark.not_on_windows("Tests fail on Windows")
@@ -281,6 +283,72 @@ def test_relocate_text_bin_raise_if_new_prefix_is_longer(tmpdir):
         spack.relocate.relocate_text_bin([fpath], {short_prefix: long_prefix})
 
 
+@pytest.mark.parametrize("jobs", [1, 4])
+def test_relocate_files_in_parallel(jobs, tmp_path, monkeypatch):
+    """Tests that files are relocated by a pool of workers, and that the changed files are
+    returned in order."""
+    monkeypatch.setattr(spack.relocate, "MIN_FILES_PER_RELOCATION_JOB", 2)
+    monkeypatch.setattr(spack.util.cpus, "determine_number_of_jobs", lambda **kwargs: jobs)
+    files = []
+    for i in range(20):
+        path = tmp_path / f"file-{i}"
+        path.write_bytes(b"/old/prefix/bin/executable\0" if i % 2 else b"/other/prefix\0")
+        files.append(str(path))
+
+    changed = spack.relocate.relocate_text_bin(files, {b"/old/prefix": b"/new/pref"})
+    assert changed == files[1::2]
+    for path in files[1::2]:
+        with open(path, "rb") as f:
+            assert f.read() == b"///new/pref/bin/executable\0"
+
+
+def _write_pid(path):
+    with open(path, "w") as f:
+        f.write(str(os.getpid()))
+    return True
+
+
+def test_relocate_files_in_processes_with_other_threads(tmp_path, monkeypatch):
+    """Tests that files are relocated by worker processes even if the current process has
+    other threads, like the ones downloading binary packages during an installation."""
+    monkeypatch.setattr(spack.relocate, "MIN_FILES_PER_RELOCATION_JOB", 2)
+    monkeypatch.setattr(spack.util.cpus, "determine_number_of_jobs", lambda **kwargs: 2)
+    files = [str(tmp_path / f"file-{i}") for i in range(8)]
+
+    done = threading.Event()
+    thread = threading.Thread(target=done.wait)
+    thread.start()
+    try:
+        assert spack.relocate._relocate_files(_write_pid, files) == files
+    finally:
+        done.set()
+        thread.join()
+
+    pids = set()
+    for path in files:
+        with open(path) as f:
+            pids.add(int(f.read()))
+    assert os.getpid() not in pids
+
+
+def test_relocate_files_in_parallel_reports_errors(tmp_path, monkeypatch):
+    """Tests that all files are processed before the first error is raised."""
+    monkeypatch.setattr(spack.relocate, "MIN_FILES_PER_RELOCATION_JOB", 2)
+    monkeypatch.setattr(spack.util.cpus, "determine_number_of_jobs", lambda **kwargs: 4)
+    files = []
+    for i in range(20):
+        path = tmp_path / f"file-{i}"
+        path.write_bytes(b"/short\0" if i == 3 else b"/much/longer\0")
+        files.append(str(path))
+
+    with pytest.raises(relocate_text.CannotGrowString):
+        spack.relocate.relocate_text_bin(files, {b"/short": b"/much/longer"})
+    assert (tmp_path / "file-3").read_bytes() == b"/short\0"
+    for path in files[4:]:
+        with open(path, "rb") as f:
+            assert f.read() == b"/much/longer\0"
+
+
 @pytest.mark.requires_executables("install_name_tool", "file", "cc")
 def test_fixup_macos_rpaths(make_dylib, make_object_file):
     compiler_cls = spack.repo.PATH.get_pkg_class("apple-clang")
@@ -3,6 +3,8 @@
 #
 # SPDX-License-Identifier: (Apache-2.0 OR MIT)
 import io
+import random
+import re
 from collections import OrderedDict
 
 import pytest
@@ -178,6 +180,68 @@ def replace_and_expect(prefix_map, before, after=None, suffix_safety_size=7):
         )
 
 
+@pytest.mark.parametrize("chunk_size", [1, 5, 16, 47, 1000])
+def test_binary_replacement_across_chunks(chunk_size):
+    """Tests that reading a file in chunks gives the same result as reading it at once,
+    when prefixes and their null terminators are split across chunks.
+    """
+    prefix_map = OrderedDict(
+        [
+            (b"/old-spack/opt/specific-package", b"/first/specific-package"),
+            (b"/old-spack/opt", b"/sec/spack/opt"),
+        ]
+    )
+    rng = random.Random(0)
+    pieces = []
+    for _ in range(200):
+        pieces.append(bytes(rng.choice(b"\0abc/") for _ in range(rng.randint(0, 12))))
+        pieces.append(rng.choice(list(prefix_map)))
+    data = b"".join(pieces)
+
+    def replace(size):
+        f = io.BytesIO(data)
+        relocate_text.BinaryFilePrefixReplacer(prefix_map, chunk_size=size).apply_to_file(f)
+        return f.getvalue()
+
+    expected = replace(len(data))
+    assert expected != data
+    assert replace(chunk_size) == expected
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 16, 47, 1000])
+def test_binary_replacement_at_offsets(chunk_size, tmp_path):
+    """Tests that replacing prefixes only at their recorded offsets gives the same result as
+    scanning the entire file."""
+    prefix_map = OrderedDict(
+        [
+            (b"/old-spack/opt/specific-package", b"/first/specific-package"),
+            (b"/old-spack/opt", b"/sec/spack/opt"),
+        ]
+    )
+    rng = random.Random(1)
+    pieces = []
+    for _ in range(200):
+        pieces.append(bytes(rng.choice(b"\0abc/") for _ in range(rng.randint(0, 12))))
+        pieces.append(rng.choice([*prefix_map, b"/old-spack/other", b"/old-spack/old-spack/opt"]))
+    data = b"".join(pieces)
+
+    scanned, patched = tmp_path / "scanned", tmp_path / "patched"
+    scanned.write_bytes(data)
+    patched.write_bytes(data)
+
+    # Offsets are computed for the store root and the prefixes of the dependencies
+    offsets = relocate_text.find_prefix_offsets(
+        str(patched), ["/old-spack/opt/specific-package", "/old-spack"], chunk_size=chunk_size
+    )
+    assert offsets == [m.start() for m in re.finditer(b"(?=/old-spack)", data)]
+
+    replacer = relocate_text.BinaryFilePrefixReplacer(prefix_map)
+    assert replacer.apply_to_filename(str(scanned))
+    assert replacer.apply_at_offsets(str(patched), offsets)
+    assert patched.read_bytes() == scanned.read_bytes()
+    assert not replacer.apply_at_offsets(str(patched), offsets)
+
+
 def test_inplace_text_replacement():
     def replace_and_expect(prefix_to_prefix, before: bytes, after: bytes):
         f = io.BytesIO(before)
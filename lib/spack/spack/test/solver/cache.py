@@ -0,0 +1,191 @@
+# Copyright 2013-2024 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+"""Unit tests for the on-disk caches used by the solver."""
+import json
+import os
+
+import pytest
+
+import spack.caches
+import spack.repo
+import spack.spec
+import spack.util.file_cache
+from spack.solver import asp
+from spack.solver import cache as solver_cache
+from spack.solver.core import fn
+
+
+def test_function_serialization_round_trip():
+    """Tests that condition ids are shifted, and other arguments are preserved."""
+    cond_id = solver_cache.ConditionId(3)
+    function = fn.pkg_fact("foo", fn.condition_trigger(cond_id, 2), True, "1.2:")
+    data = json.loads(json.dumps(solver_cache.dump_function(function)))
+
+    assert solver_cache.load_function(data, 0) == function
+    assert solver_cache.load_function(data, 10) == fn.pkg_fact(
+        "foo", fn.condition_trigger(13, 2), True, "1.2:"
+    )
+
+
+@pytest.mark.parametrize("pkg_name", ["mpileaks", "conflict", "multivalue-variant", "mpich"])
+def test_replayed_facts_match_direct_emission(pkg_name, mock_packages, config):
+    """Tests that facts replayed from a cache entry are the same as those emitted directly."""
+    pkg_cls = spack.repo.PATH.get_pkg_class(pkg_name)
+
+    direct = asp.SpackSolverSetup()
+    direct.possible_virtuals = {"mpi"}
+    direct.gen = asp.FactsRecorder()
+    direct._package_directive_rules(pkg_cls)
+
+    cached = asp.SpackSolverSetup()
+    cached.possible_virtuals = {"mpi"}
+    entry = json.loads(json.dumps(cached._record_package_directive_rules(pkg_cls)))
+    cached.gen = asp.FactsRecorder()
+    cached._replay_package_directive_rules(entry)
+
+    assert [str(x) for x in cached.gen.asp_problem] == [str(x) for x in direct.gen.asp_problem]
+    assert cached.version_constraints == direct.version_constraints
+    assert cached.target_constraints == direct.target_constraints
+    assert cached.compiler_version_constraints == direct.compiler_version_constraints
+    assert cached.variant_values_from_specs == direct.variant_values_from_specs
+    assert next(cached._id_counter) == next(direct._id_counter)
+
+
+def test_package_facts_cache_invalidation(mock_packages, config, tmp_path):
+    """Tests that entries are returned only if the digest of the inputs match."""
+    pkg_cls = spack.repo.PATH.get_pkg_class("mpileaks")
+    facts_cache = solver_cache.PackageFactsCache(spack.util.file_cache.FileCache(str(tmp_path)))
+    entry = {"conditions": 1, "facts": [["fact", [{"id": 0}]]], "variant_values": []}
+
+    assert facts_cache.get(pkg_cls, "digest") is None
+    facts_cache.put(pkg_cls, "digest", entry)
+    assert facts_cache.get(pkg_cls, "digest")["facts"] == entry["facts"]
+    assert facts_cache.get(pkg_cls, "other-digest") is None
+
+
+def test_package_facts_cache_references(mock_packages, config, tmp_path, monkeypatch):
+    """Tests that entries are invalidated when a package whose variants were referenced
+    changes.
+    """
+    pkg_cls = spack.repo.PATH.get_pkg_class("mpileaks")
+    facts_cache = solver_cache.PackageFactsCache(spack.util.file_cache.FileCache(str(tmp_path)))
+    entry = {"conditions": 0, "facts": [], "variant_values": [["callpath", "foo", "bar"]]}
+    facts_cache.put(pkg_cls, "digest", entry)
+    assert facts_cache.get(pkg_cls, "digest") is not None
+
+    original = solver_cache.package_class_digest
+    monkeypatch.setattr(
+        solver_cache,
+        "package_class_digest",
+        lambda x: "changed" if x.name == "callpath" else original(x),
+    )
+    assert facts_cache.get(pkg_cls, "digest") is None
+
+
+def test_solve_with_fact_cache(mock_packages, mutable_config, tmp_path, monkeypatch):
+    """Tests that concretizing with the fact cache gives the same result as without it."""
+    expected = spack.spec.Spec("mpileaks").concretized()
+
+    file_cache = spack.util.file_cache.FileCache(str(tmp_path))
+    monkeypatch.setattr(spack.caches, "MISC_CACHE", file_cache)
+    mutable_config.set("concretizer:cache", {"facts": True})
+    for _ in range(2):
+        assert spack.spec.Spec("mpileaks").concretized().dag_hash() == expected.dag_hash()
+    assert (tmp_path / "solver" / "facts" / "builtin.mock" / "mpileaks.json").exists()
+
+
+def test_result_cache_eviction_and_stats(tmp_path):
+    """Tests that the least recently used entries are evicted first, and that hits and
+    misses are recorded.
+    """
+    result_cache = solver_cache.ResultCache(
+        spack.util.file_cache.FileCache(str(tmp_path)), max_entries=2
+    )
+    assert result_cache.get("a") is None
+
+    for digest, mtime in (("a", 1), ("b", 2)):
+        result_cache.put(digest, {"answers": digest})
+        os.utime(result_cache.file_cache.cache_path(result_cache._key(digest)), (mtime, mtime))
+
+    # Using "a" makes "b" the least recently used entry
+    assert result_cache.get("a")["answers"] == "a"
+    result_cache.put("c", {"answers": "c"})
+
+    assert result_cache.get("b") is None
+    assert result_cache.get("c")["answers"] == "c"
+    stats = result_cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (2, 2, 2)
+
+
+def test_solve_with_result_cache(mock_packages, mutable_config, tmp_path, monkeypatch):
+    """Tests that a cached result gives the same concrete specs as a solve."""
+    monkeypatch.setattr(spack.caches, "MISC_CACHE", spack.util.file_cache.FileCache(str(tmp_path)))
+    mutable_config.set("concretizer:cache", {"results": True})
+
+    first = spack.spec.Spec("mpileaks").concretized()
+
+    # A hit doesn't need to set up the problem
+    def _fail(*args, **kwargs):
+        raise AssertionError("setup should not be called on a hit")
+
+    monkeypatch.setattr(asp.SpackSolverSetup, "setup", _fail)
+    second = spack.spec.Spec("mpileaks").concretized()
+
+    assert first.dag_hash() == second.dag_hash()
+    assert first is not second
+    stats = asp.result_cache().stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+
+def test_result_cache_keeps_reused_specs(mock_packages, config):
+    """Tests that reused nodes are taken from the reusable specs when reading an entry, so
+    that spliced specs keep their build spec.
+    """
+    spec = spack.spec.Spec("splice-t").concretized()
+    dep = spack.spec.Spec("splice-h+foo").concretized()
+    spliced = spec.splice(dep, True)
+    root = spack.spec.Spec("splice-t")
+    result = asp.Result([root])
+    result.answers.append(([0], 0, {asp.NodeArgument(id="0", pkg="splice-t"): spliced}))
+    result.criteria, result.nmodels, result.possible_dependencies = [], 1, {"splice-t"}
+
+    reusable = asp.ConcreteSpecsByHash()
+    reusable.add(spliced)
+    entry = json.loads(json.dumps(asp._result_to_cache_entry(result, reusable)))
+    assert not entry["specs"] and spliced.dag_hash() in entry["reused"]
+
+    # Reused specs that are not available anymore make the entry unusable
+    assert asp._result_from_cache_entry([root], entry, []) is None
+
+    cached = asp._result_from_cache_entry([root], entry, [spliced])
+    (concrete,) = cached.specs
+    assert concrete.dag_hash() == spliced.dag_hash()
+    assert concrete.spliced
+    assert concrete.build_spec.dag_hash() == spec.dag_hash()
+
+
+def test_result_cache_with_installed_specs(
+    mutable_database, mutable_config, tmp_path, monkeypatch
+):
+    """Tests that a cached result reuses the installed specs, and that it is not used once
+    the set of reusable specs changes.
+    """
+    monkeypatch.setattr(spack.caches, "MISC_CACHE", spack.util.file_cache.FileCache(str(tmp_path)))
+    mutable_config.set("concretizer:cache", {"results": True})
+    mutable_config.set("concretizer:reuse", True)
+    # Specs in the mock database have neither libc nor runtimes
+    monkeypatch.setattr(asp, "using_libc_compatibility", lambda: False)
+    monkeypatch.setattr(asp, "_has_runtime_dependencies", lambda x: True)
+
+    first = spack.spec.Spec("mpileaks").concretized()
+    second = spack.spec.Spec("mpileaks").concretized()
+    assert first.installed and second.installed
+    assert first.dag_hash() == second.dag_hash()
+
+    mutable_database.remove(first)
+    third = spack.spec.Spec("mpileaks").concretized()
+    assert third.dag_hash() != first.dag_hash()
+    stats = asp.result_cache().stats()
+    assert (stats["hits"], stats["misses"]) == (1, 2)
@@ -11,6 +11,7 @@
 import shutil
 import stat
 import sys
+import threading
 
 import pytest
 
@@ -18,7 +19,9 @@
 from llnl.util.symlink import readlink
 
 import spack.error
+import spack.fetch_strategy as fs
 import spack.paths
+import spack.spec
 import spack.stage
 import spack.util.executable
 import spack.util.url as url_util
@@ -915,3 +918,118 @@ def test_override_keep_in_composite_stage():
     assert not stage_1.keep
     assert not stage_2.keep
     assert not stage_3.keep
+
+
+class _MockPackage:
+    def __init__(self, name, url_or_fetcher, target="x86_64"):
+        self.spec = spack.spec.Spec(f"{name}@=1.0 arch=linux-ubuntu22.04-{target}")
+        self.spec._mark_concrete()
+        self.stage = Stage(url_or_fetcher)
+
+
+def test_fetch_scheduler_limits_fetches_per_host():
+    """Tests that fetches from the same host, and fetches of the same package version, are
+    never concurrent beyond their limits.
+    """
+    pkgs = [
+        _MockPackage(f"pkg-{i}", f"https://{host}.example.com/pkg-{i}.tar.gz")
+        for i, host in enumerate("aaaabb")
+    ]
+    pkgs += [
+        _MockPackage("zlib", "https://c.example.com/zlib.tar.gz", target=t)
+        for t in ("x86_64", "aarch64")
+    ]
+
+    lock = threading.Lock()
+    active = collections.Counter()
+    max_active = collections.Counter()
+
+    def fetch(pkg):
+        key = spack.stage._fetch_host(pkg)
+        with lock:
+            active[key] += 1
+            max_active[key] = max(max_active[key], active[key])
+        threading.Event().wait(0.01)
+        with lock:
+            active[key] -= 1
+
+    scheduler = spack.stage.FetchScheduler(jobs=4, jobs_per_host=2)
+    results = scheduler.run(pkgs, fetch)
+
+    assert sorted(id(pkg) for pkg, _ in results) == sorted(id(pkg) for pkg in pkgs)
+    assert all(error is None for _, error in results)
+    assert max_active["a.example.com"] <= 2
+    assert max_active["b.example.com"] <= 2
+    # Both specs of zlib@1.0 have the same archive
+    assert max_active["c.example.com"] == 1
+
+
+def test_fetch_scheduler_retries():
+    """Tests that fetches failing because of download errors are retried, while checksum
+    errors, missing digests and declined fetches are not"""
+    flaky = _MockPackage("flaky", "https://example.com/flaky.tar.gz")
+    broken = _MockPackage("broken", "https://example.com/broken.tar.gz")
+    corrupt = _MockPackage("corrupt", "https://example.com/corrupt.tar.gz")
+    nodigest = _MockPackage("nodigest", "https://example.com/nodigest.tar.gz")
+    declined = _MockPackage("declined", "https://example.com/declined.tar.gz")
+    attempts = collections.Counter()
+
+    def fetch(pkg):
+        attempts[pkg.spec.name] += 1
+        if pkg is corrupt:
+            raise fs.ChecksumError("checksum failed")
+        if pkg is nodigest:
+            raise fs.NoDigestError("no digest")
+        if pkg is declined:
+            raise spack.error.FetchError("Will not fetch declined@1.0")
+        if pkg is broken:
+            raise fs.FailedDownloadError("https://example.com/broken.tar.gz")
+        if attempts["flaky"] < 3:
+            raise spack.stage.FetchersFailedError("All fetchers failed")
+
+    scheduler = spack.stage.FetchScheduler(jobs=2, jobs_per_host=2, retries=3, backoff=0)
+    results = scheduler.run([flaky, broken, corrupt, nodigest, declined], fetch)
+    errors = {pkg.spec.name: error for pkg, error in results}
+
+    assert errors["flaky"] is None
+    assert isinstance(errors["broken"], fs.FailedDownloadError)
+    assert isinstance(errors["corrupt"], fs.ChecksumError)
+    assert isinstance(errors["nodigest"], fs.NoDigestError)
+    assert isinstance(errors["declined"], spack.error.FetchError)
+    assert attempts == {"flaky": 3, "broken": 3, "corrupt": 1, "nodigest": 1, "declined": 1}
+
+
+def test_fetch_scheduler_fetches_vcs_in_main_thread():
+    """Tests that packages fetched from a version control system are fetched in the main
+    thread, after the others.
+    """
+    url_pkg = _MockPackage("url", "https://example.com/url.tar.gz")
+    git_pkg = _MockPackage("git", fs.GitFetchStrategy(git="https://example.com/git.git"))
+    threads = []
+
+    def fetch(pkg):
+        threads.append((pkg.spec.name, threading.current_thread() is threading.main_thread()))
+
+    spack.stage.FetchScheduler(jobs=2).run([git_pkg, url_pkg], fetch)
+    assert threads == [("url", False), ("git", True)]
+
+
+def test_fetch_scheduler_asks_for_confirmation_in_main_thread(mutable_config, monkeypatch):
+    """Tests that packages whose fetch may ask the user for confirmation, because their
+    version has no checksum, are fetched in the main thread.
+    """
+    checksummed = _MockPackage("checksummed", "https://example.com/checksummed.tar.gz")
+    unchecksummed = _MockPackage("unchecksummed", "https://example.com/unchecksummed.tar.gz")
+    for pkg in (checksummed, unchecksummed):
+        pkg.has_code = True
+        pkg.version = pkg.spec.version
+    checksummed.versions = {checksummed.version: {"sha256": "abcd"}}
+    unchecksummed.versions = {}
+    monkeypatch.setattr(sys.stdout, "isatty", lambda: True)
+    threads = []
+
+    def fetch(pkg):
+        threads.append((pkg.spec.name, threading.current_thread() is threading.main_thread()))
+
+    spack.stage.FetchScheduler(jobs=2).run([unchecksummed, checksummed], fetch)
+    assert threads == [("checksummed", False), ("unchecksummed", True)]
@@ -284,6 +284,42 @@ def test_url_extra_fetch(tmpdir, mock_archive, _fetch_method):
             fetcher.fetch()
 
 
+def test_urllib_fetch_computes_checksum(tmpdir, mock_archive, monkeypatch):
+    """Tests that urls are not probed before downloading them, and that the checksum of
+    an archive is computed while downloading it, rather than by reading it again.
+    """
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("unexpected call")
+
+    digest = crypto.checksum(crypto.hash_fun_for_algo("sha256"), mock_archive.archive_file)
+    monkeypatch.setattr(web_util, "url_exists", _fail)
+    with spack.config.override("config:url_fetch_method", "urllib"):
+        fetcher = fs.URLFetchStrategy(
+            url="file:///does-not-exist", mirrors=[mock_archive.url], sha256=digest
+        )
+        with Stage(fetcher, path=str(tmpdir)):
+            fetcher.fetch()
+            with monkeypatch.context() as m:
+                m.setattr(crypto.Checker, "check", _fail)
+                fetcher.check()
+
+            # If the archive changes after being downloaded, it's read again
+            with open(fetcher.archive_file, "ab") as f:
+                f.write(b"extra bytes")
+            with pytest.raises(fs.ChecksumError):
+                fetcher.check()
+
+
+def test_urllib_fetch_wrong_checksum(tmpdir, mock_archive):
+    with spack.config.override("config:url_fetch_method", "urllib"):
+        fetcher = fs.URLFetchStrategy(url=mock_archive.url, sha256="0" * 64)
+        with Stage(fetcher, path=str(tmpdir)):
+            fetcher.fetch()
+            with pytest.raises(fs.ChecksumError, match="sha256 checksum failed"):
+                fetcher.check()
+
+
 @pytest.mark.parametrize(
     "url,urls,version,expected",
     [
@@ -185,6 +185,48 @@ def test_check_prefix_manifest(tmpdir):
     assert results.errors[spec.prefix] == ["manifest corrupted"]
 
 
+@pytest.mark.parametrize("jobs", [1, 4])
+def test_check_prefix_manifest_fast(tmpdir, jobs):
+    # Test that the fast mode only skips hashing files whose size, mtime and inode are unchanged
+    prefix_path = tmpdir.join("prefix")
+    prefix = str(prefix_path)
+
+    spec = spack.spec.Spec("libelf")
+    spec._mark_concrete()
+    spec.prefix = prefix
+
+    fs.mkdirp(str(prefix_path.join(".spack")))
+    files = [str(prefix_path.join("file-%d" % i)) for i in range(8)]
+    for file in files:
+        with open(file, "w") as f:
+            f.write("abc")
+
+    spack.verify.write_manifest(spec, jobs=jobs)
+    assert not spack.verify.check_spec_manifest(spec, jobs=jobs).has_errors()
+
+    # Change contents, but keep size and mtime
+    stat_before = os.stat(files[0])
+    with open(files[0], "w") as f:
+        f.write("def")
+    os.utime(files[0], ns=(stat_before.st_atime_ns, stat_before.st_mtime_ns))
+
+    results = spack.verify.check_spec_manifest(spec, jobs=jobs)
+    assert list(results.errors) == [files[0]]
+    assert results.errors[files[0]] == ["hash"]
+    assert not spack.verify.check_spec_manifest(spec, fast=True, jobs=jobs).has_errors()
+
+    # A replaced file has a new inode, so it is hashed in fast mode too
+    tmp = files[1] + ".tmp"
+    with open(tmp, "w") as f:
+        f.write("ghi")
+    os.utime(tmp, ns=(stat_before.st_atime_ns, os.stat(files[1]).st_mtime_ns))
+    os.rename(tmp, files[1])
+
+    results = spack.verify.check_spec_manifest(spec, fast=True, jobs=jobs)
+    assert list(results.errors) == [files[1]]
+    assert results.errors[files[1]] == ["hash"]
+
+
 def test_single_file_verification(tmpdir):
     # Test the API to verify a single file, including finding the package
     # to which it belongs
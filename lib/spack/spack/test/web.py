@@ -4,9 +4,12 @@
 # SPDX-License-Identifier: (Apache-2.0 OR MIT)
 import collections
 import email.message
+import http.server
 import os
 import pickle
+import socketserver
 import ssl
+import threading
 import urllib.request
 
 import pytest
@@ -442,3 +445,87 @@ def test_ssl_curl_cert_file(cert_exists, tmpdir, ssl_scrubbed_env, mutable_confi
             assert dump_env["CURL_CA_BUNDLE"] == mock_cert
         else:
             assert "CURL_CA_BUNDLE" not in dump_env
+
+
+class _KeepAliveRequestHandler(http.server.BaseHTTPRequestHandler):
+    """Responds with the path of the request, and keeps the connection open unless the path
+    is /close, in which case the connection is closed without telling the client.
+    """
+
+    protocol_version = "HTTP/1.1"
+    connections: list = []
+
+    def setup(self):
+        super().setup()
+        self.connections.append(self.client_address)
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(self.path) * 1000))
+        self.end_headers()
+
+    def do_GET(self):
+        self.do_HEAD()
+        self.wfile.write(self.path.encode() * 1000)
+        self.close_connection = self.path == "/close"
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def keep_alive_server():
+    """Returns the url of a local HTTP server, and the list of connections it accepted"""
+
+    class Server(socketserver.ThreadingMixIn, http.server.HTTPServer):
+        daemon_threads = True
+
+    handler = type("Handler", (_KeepAliveRequestHandler,), {"connections": []})
+    server = Server(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", handler.connections
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture()
+def keep_alive_opener():
+    pool = spack.util.web.ConnectionPool()
+    yield urllib.request.build_opener(
+        urllib.request.ProxyHandler({}), spack.util.web.KeepAliveHTTPHandler(pool=pool)
+    )
+    pool.clear()
+
+
+def test_keep_alive_reuses_connections(keep_alive_server, keep_alive_opener):
+    """Tests that requests to the same host are sent over the same connection, once the
+    previous responses have been read.
+    """
+    url, connections = keep_alive_server
+    for path in ("/a", "/b", "/c"):
+        with keep_alive_opener.open(f"{url}{path}") as response:
+            assert response.read() == path.encode() * 1000
+    head = keep_alive_opener.open(urllib.request.Request(f"{url}/d", method="HEAD"))
+    assert head.headers["Content-Length"] == "2000"
+    assert keep_alive_opener.open(f"{url}/e").read() == b"/e" * 1000
+    assert len(connections) == 1
+
+
+def test_keep_alive_discards_unread_connections(keep_alive_server, keep_alive_opener):
+    """Tests that connections are not reused if the previous response was not read"""
+    url, connections = keep_alive_server
+    with keep_alive_opener.open(f"{url}/a") as response:
+        assert response.read(2) == b"/a"
+    assert keep_alive_opener.open(f"{url}/b").read() == b"/b" * 1000
+    assert len(connections) == 2
+
+
+def test_keep_alive_retries_closed_connections(keep_alive_server, keep_alive_opener):
+    """Tests that requests are retried on a new connection, if the server closed the one
+    that was reused.
+    """
+    url, connections = keep_alive_server
+    assert keep_alive_opener.open(f"{url}/close").read() == b"/close" * 1000
+    assert keep_alive_opener.open(f"{url}/b").read() == b"/b" * 1000
+    assert len(connections) == 2
@@ -2,21 +2,34 @@
 # Spack Project Developers. See the top-level COPYRIGHT file for details.
 #
 # SPDX-License-Identifier: (Apache-2.0 OR MIT)
+import hashlib
+import json
 import os
 import re
 import sys
+from typing import Any, Dict, List, Optional
 
+import llnl.util.tty as tty
+
+import spack
 import spack.build_environment
+import spack.caches
 import spack.config
 import spack.error
+import spack.repo
 import spack.spec
+import spack.store
 import spack.util.environment as environment
+import spack.util.file_cache
 from spack import traverse
 from spack.context import Context
 
 #: Environment variable name Spack uses to track individually loaded packages
 spack_loaded_hashes_var = "SPACK_LOADED_HASHES"
 
+#: Version of the format used to store environment modifications in the activation cache
+ACTIVATION_CACHE_VERSION = 1
+
 
 def prefix_inspections(platform):
     """Get list of prefix inspections for platform
@@ -118,3 +131,160 @@ def environment_modifications_for_specs(
         project_env_mods(*topo_ordered, view=view, env=env)
 
     return env
+
+
+def _dump_modification(mod) -> Dict[str, Any]:
+    data = {"type": type(mod).__name__, "name": mod.name, "separator": mod.separator}
+    if isinstance(mod, environment.NameValueModifier):
+        value = mod.value
+        data["value"] = [str(x) for x in value] if isinstance(value, list) else str(value)
+    if isinstance(mod, environment.SetEnv):
+        data["force"], data["raw"] = mod.force, mod.raw
+    return data
+
+
+def _load_modification(data: Dict[str, Any]):
+    cls = getattr(environment, data["type"])
+    if issubclass(cls, environment.SetEnv):
+        return cls(data["name"], data["value"], force=data["force"], raw=data["raw"])
+    elif issubclass(cls, environment.NameValueModifier):
+        return cls(data["name"], data["value"], separator=data["separator"])
+    return cls(data["name"], separator=data["separator"])
+
+
+class ActivationCache:
+    """Size-bounded cache of the environment modifications needed to load specs, keyed by a
+    digest of the specs, of the view they are loaded from, and of the other inputs of
+    :func:`environment_modifications_for_specs`.
+
+    Entries are invalidated whenever specs are installed or uninstalled, and the least recently
+    used ones are evicted when the number of entries exceeds the maximum allowed. The
+    modifications are stored rather than the shell code, since the latter depends on the
+    environment of the shell that is modified.
+    """
+
+    def __init__(self, file_cache: "spack.caches.FileCacheType", max_entries: int) -> None:
+        self.file_cache = file_cache
+        self.max_entries = max_entries
+
+    @staticmethod
+    def _key(digest: str) -> str:
+        return os.path.join("activation", f"{digest}.json")
+
+    @staticmethod
+    def digest(specs: List[spack.spec.Spec], view=None) -> str:
+        """Returns a digest of the inputs used to compute the environment modifications for
+        the specs. Package files are identified by their status, so that they are not read.
+        """
+        nodes = list(traverse.traverse_nodes(specs, root=True, deptype=("run", "link")))
+        sha = hashlib.sha256()
+        for part in (
+            ACTIVATION_CACHE_VERSION,
+            spack.spack_version,
+            sys.platform,
+            [s.dag_hash() for s in specs],
+            None if view is None else [view.root, view.projections],
+            {s.platform: prefix_inspections(s.platform) for s in nodes},
+        ):
+            sha.update(f"{json.dumps(part, sort_keys=True, default=str)}\n".encode())
+
+        for s in sorted(nodes, key=lambda x: x.dag_hash()):
+            try:
+                stat = os.stat(spack.repo.PATH.filename_for_package_name(s.fullname))
+                identity = [stat.st_ino, stat.st_mtime_ns, stat.st_size]
+            except (OSError, spack.repo.RepoError):
+                identity = None
+            sha.update(f"{s.fullname}:{identity}\n".encode())
+        return sha.hexdigest()
+
+    @staticmethod
+    def _database_identity() -> List[Any]:
+        return json.loads(json.dumps(spack.store.STORE.db.files_identity()))
+
+    def get(self, digest: str) -> Optional[environment.EnvironmentModifications]:
+        """Returns the cached modifications for a digest, or None if there is no valid entry."""
+        key = self._key(digest)
+        try:
+            if not self.file_cache.init_entry(key):
+                return None
+            with self.file_cache.read_transaction(key) as f:
+                entry = json.load(f)
+            # Mark the entry as recently used
+            os.utime(self.file_cache.cache_path(key))
+        except (OSError, ValueError, spack.util.file_cache.CacheError) as e:
+            tty.debug(f"[ACTIVATION CACHE] cannot read the entry {digest}: {e}")
+            return None
+
+        if (
+            entry.get("version") != ACTIVATION_CACHE_VERSION
+            or entry.get("database") != self._database_identity()
+        ):
+            return None
+
+        try:
+            modifications = [_load_modification(x) for x in entry["modifications"]]
+        except (AttributeError, KeyError, TypeError) as e:
+            tty.debug(f"[ACTIVATION CACHE] invalid entry {digest}: {e}")
+            return None
+
+        result = environment.EnvironmentModifications()
+        result.env_modifications = modifications
+        return result
+
+    def put(self, digest: str, modifications: environment.EnvironmentModifications) -> None:
+        """Stores the modifications for a digest, and evicts the least recently used entries if
+        needed. Errors are reported, but not raised.
+        """
+        entry = {
+            "version": ACTIVATION_CACHE_VERSION,
+            "database": self._database_identity(),
+            "modifications": [_dump_modification(x) for x in modifications],
+        }
+        key = self._key(digest)
+        try:
+            self.file_cache.init_entry(key)
+            with self.file_cache.write_transaction(key) as (_, new):
+                json.dump(entry, new)
+            self._evict()
+        except (OSError, spack.util.file_cache.CacheError) as e:
+            tty.debug(f"[ACTIVATION CACHE] cannot write the entry {digest}: {e}")
+
+    def _entries(self) -> List[os.DirEntry]:
+        try:
+            with os.scandir(self.file_cache.cache_path("activation")) as it:
+                return [x for x in it if x.name.endswith(".json") and x.is_file()]
+        except OSError:
+            return []
+
+    def _evict(self) -> None:
+        entries = sorted(self._entries(), key=lambda x: x.stat().st_mtime)
+        for entry in entries[: max(len(entries) - self.max_entries, 0)]:
+            self.file_cache.remove(os.path.join("activation", entry.name))
+
+
+def activation_cache() -> ActivationCache:
+    """Returns the activation cache, in the misc cache"""
+    max_entries = spack.config.get("config:activation_cache:max_entries", 256)
+    return ActivationCache(spack.caches.MISC_CACHE, max_entries=max_entries)
+
+
+def cached_environment_modifications_for_specs(
+    *specs: spack.spec.Spec, view=None
+) -> environment.EnvironmentModifications:
+    """Same as :func:`environment_modifications_for_specs`, but reuses the modifications
+    computed for the same specs and view, if ``config:activation_cache:enable`` is set. This
+    avoids importing the package classes of the specs, and inspecting their prefixes.
+    """
+    if not spack.config.get("config:activation_cache:enable", False):
+        return environment_modifications_for_specs(*specs, view=view)
+
+    cache = activation_cache()
+    digest = cache.digest(list(specs), view=view)
+    result = cache.get(digest)
+    if result is not None:
+        tty.debug(f"[ACTIVATION CACHE] using the environment modifications in {digest}")
+        return result
+
+    result = environment_modifications_for_specs(*specs, view=view)
+    cache.put(digest, result)
+    return result
@@ -109,14 +109,16 @@ def read_transaction(self, key):
         """
         return ReadTransaction(self._get_lock(key), acquire=lambda: open(self.cache_path(key)))
 
-    def write_transaction(self, key):
+    def write_transaction(self, key, binary=False):
         """Get a write transaction on a file cache item.
 
         Returns a WriteTransaction context manager that opens a temporary file
         for writing.  Once the context manager finishes, if nothing went wrong,
         moves the file into place on top of the old file atomically.
 
+        Files are opened in binary mode if ``binary`` is True.
         """
+        mode = "b" if binary else ""
         filename = self.cache_path(key)
         if os.path.exists(filename) and not os.access(filename, os.W_OK):
             raise CacheError(
@@ -132,10 +134,10 @@ def __enter__(cm):
                 cm.orig_filename = self.cache_path(key)
                 cm.orig_file = None
                 if os.path.exists(cm.orig_filename):
-                    cm.orig_file = open(cm.orig_filename, "r")
+                    cm.orig_file = open(cm.orig_filename, "r" + mode)
 
                 cm.tmp_filename = self.cache_path(key) + ".tmp"
-                cm.tmp_file = open(cm.tmp_filename, "w")
+                cm.tmp_file = open(cm.tmp_filename, "w" + mode)
 
                 return cm.orig_file, cm.tmp_file
 
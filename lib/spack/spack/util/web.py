@@ -4,23 +4,29 @@
 # SPDX-License-Identifier: (Apache-2.0 OR MIT)
 
 import codecs
+import collections
 import concurrent.futures
 import email.message
 import errno
+import functools
+import http.client
 import os
 import os.path
 import re
 import shutil
+import socket
 import ssl
 import stat
 import sys
+import threading
+import time
 import traceback
 import urllib.parse
 from html.parser import HTMLParser
 from pathlib import Path, PurePosixPath
-from typing import IO, Dict, Iterable, List, Optional, Set, Tuple, Union
+from typing import IO, Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
 from urllib.error import HTTPError, URLError
-from urllib.request import HTTPSHandler, Request, build_opener
+from urllib.request import HTTPHandler, HTTPSHandler, Request, build_opener
 
 import llnl.url
 from llnl.util import lang, tty
@@ -61,6 +67,180 @@ def http_error_default(self, req, fp, code, msg, hdrs):
         raise DetailedHTTPError(req, code, msg, hdrs, fp)
 
 
+class ConnectionPool:
+    """Idle HTTP connections, which are reused by later requests to the same host to avoid
+    a new TCP and TLS handshake for each request.
+
+    Connections are checked out by one request at a time, so the pool can be shared by
+    openers used in different threads. Connections inherited from a parent process are
+    never reused.
+    """
+
+    def __init__(self, max_idle_per_host: int = 32, idle_timeout: float = 30.0) -> None:
+        """
+        Args:
+            max_idle_per_host: maximum number of idle connections kept for each host
+            idle_timeout: seconds after which idle connections are closed instead of reused,
+                since servers are likely to have closed them already
+        """
+        self.max_idle_per_host = max_idle_per_host
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._idle: Dict[tuple, collections.deque] = collections.defaultdict(collections.deque)
+        self._pid = os.getpid()
+
+    def get(self, key: tuple) -> Optional[http.client.HTTPConnection]:
+        """Returns an idle connection for the key, or None if there is none"""
+        expired = []
+        connection = None
+        with self._lock:
+            self._forget_parent_connections()
+            idle = self._idle.get(key)
+            now = time.monotonic()
+            while idle:
+                candidate, last_used = idle.pop()
+                if now - last_used < self.idle_timeout:
+                    connection = candidate
+                    break
+                expired.append(candidate)
+        for candidate in expired:
+            candidate.close()
+        return connection
+
+    def put(self, key: tuple, connection: http.client.HTTPConnection) -> None:
+        """Returns a connection, whose last response was read entirely, to the pool"""
+        with self._lock:
+            self._forget_parent_connections()
+            idle = self._idle[key]
+            idle.append((connection, time.monotonic()))
+            dropped = idle.popleft()[0] if len(idle) > self.max_idle_per_host else None
+        if dropped is not None:
+            dropped.close()
+
+    def clear(self) -> None:
+        """Closes all the idle connections"""
+        with self._lock:
+            idle, self._idle = self._idle, collections.defaultdict(collections.deque)
+        for connections in idle.values():
+            for connection, _ in connections:
+                connection.close()
+
+    def _forget_parent_connections(self):
+        # Sockets inherited through fork are shared with the parent, so they can't be used
+        if self._pid != os.getpid():
+            self._idle.clear()
+            self._pid = os.getpid()
+
+
+#: Connections shared by all the openers in Spack that keep connections alive
+connection_pool = ConnectionPool()
+
+
+class _PooledHTTPResponse(http.client.HTTPResponse):
+    """Response that releases its connection when it is closed, telling whether the body
+    was read entirely, in which case the connection can be reused."""
+
+    _release: Optional[Callable[[bool], None]] = None
+    _trailer_read = False
+
+    def _read_and_discard_trailer(self):
+        super()._read_and_discard_trailer()
+        self._trailer_read = True
+
+    def _close_conn(self):
+        super()._close_conn()
+        release, self._release = self._release, None
+        if release is not None:
+            release(self._trailer_read if self.chunked else self.length == 0)
+
+
+class _KeepAliveMixin:
+    """Mixin for urllib handlers, to send requests over persistent connections taken from a
+    ConnectionPool, instead of a new connection for each request.
+
+    A connection goes back to the pool when the body of its response has been read
+    entirely. Requests sent over a reused connection, that the server closed in the
+    meantime, are retried once over a new connection if their body can be sent again.
+    """
+
+    def __init__(self, *args, pool: Optional[ConnectionPool] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool = pool or connection_pool
+
+    def do_open(self, http_class, req, **http_conn_args):
+        # Tunnels through a proxy are set up for each connection
+        if req._tunnel_host:
+            return super().do_open(http_class, req, **http_conn_args)
+
+        # The handler is part of the key, since handlers differ e.g. in their SSL context
+        key = (id(self), http_class, req.host)
+        headers = dict(req.unredirected_hdrs)
+        headers.update({k: v for k, v in req.headers.items() if k not in headers})
+        headers = {name.title(): val for name, val in headers.items()}
+        can_retry = req.data is None or isinstance(req.data, bytes)
+
+        while True:
+            connection = self.pool.get(key)
+            reused = connection is not None
+            if connection is None:
+                connection = http_class(req.host, timeout=req.timeout, **http_conn_args)
+                connection.set_debuglevel(self._debuglevel)
+                connection.response_class = _PooledHTTPResponse
+            else:
+                connection.timeout = req.timeout
+                if connection.sock is not None:
+                    connection.sock.settimeout(
+                        socket.getdefaulttimeout()
+                        if req.timeout is socket._GLOBAL_DEFAULT_TIMEOUT
+                        else req.timeout
+                    )
+
+            try:
+                connection.request(
+                    req.get_method(),
+                    req.selector,
+                    req.data,
+                    headers,
+                    encode_chunked=req.has_header("Transfer-encoding"),
+                )
+                response = connection.getresponse()
+            except (ConnectionError, http.client.BadStatusLine) as e:
+                connection.close()
+                if reused and can_retry:
+                    tty.debug(f"Retrying {req.get_full_url()} on a new connection: {e}")
+                    continue
+                raise URLError(e)
+            except OSError as e:
+                connection.close()
+                raise URLError(e)
+            except BaseException:
+                connection.close()
+                raise
+            break
+
+        response.url = req.get_full_url()
+        response.msg = response.reason
+        response._release = functools.partial(self._release, key, connection, response)
+        if response.length == 0:
+            # Nothing to read, so the connection can be used right away
+            response._close_conn()
+        return response
+
+    def _release(self, key, connection, response, complete):
+        if complete and not response.will_close:
+            self.pool.put(key, connection)
+        else:
+            connection.close()
+
+
+class KeepAliveHTTPHandler(_KeepAliveMixin, HTTPHandler):
+    """HTTP handler that reuses connections to the same host"""
+
+
+class KeepAliveHTTPSHandler(_KeepAliveMixin, HTTPSHandler):
+    """HTTPS handler that reuses connections to the same host"""
+
+
 def custom_ssl_certs() -> Optional[Tuple[bool, str]]:
     """Returns a tuple (is_file, path) if custom SSL certifates are configured and valid."""
     ssl_certs = spack.config.get("config:ssl_certs")
@@ -120,12 +300,20 @@ def _urlopen():
 
     # One opener with HTTPS ssl enabled
     with_ssl = build_opener(
-        s3, gcs, HTTPSHandler(context=ssl_create_default_context()), error_handler
+        s3,
+        gcs,
+        KeepAliveHTTPHandler(),
+        KeepAliveHTTPSHandler(context=ssl_create_default_context()),
+        error_handler,
     )
 
     # One opener with HTTPS ssl disabled
     without_ssl = build_opener(
-        s3, gcs, HTTPSHandler(context=ssl._create_unverified_context()), error_handler
+        s3,
+        gcs,
+        KeepAliveHTTPHandler(),
+        KeepAliveHTTPSHandler(context=ssl._create_unverified_context()),
+        error_handler,
     )
 
     # And dynamically dispatch based on the config:verify_ssl.
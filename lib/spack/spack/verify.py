@@ -3,20 +3,25 @@
 #
 # SPDX-License-Identifier: (Apache-2.0 OR MIT)
 import base64
+import concurrent.futures
 import hashlib
 import os
 import stat
-from typing import Any, Dict
+from typing import Any, Callable, Dict, Iterable, List, Optional, TypeVar
 
 import llnl.util.tty as tty
 from llnl.util.symlink import readlink
 
 import spack.filesystem_view
 import spack.store
+import spack.util.cpus
 import spack.util.file_permissions as fp
 import spack.util.spack_json as sjson
 from spack.package_base import spack_times_log
 
+T = TypeVar("T")
+R = TypeVar("R")
+
 
 def compute_hash(path: str, block_size: int = 1048576) -> str:
     # why is this not using spack.util.crypto.checksum...
@@ -45,11 +50,27 @@ def create_manifest_entry(path: str) -> Dict[str, Any]:
         data["hash"] = compute_hash(path)
         data["time"] = s.st_mtime
         data["size"] = s.st_size
+        data["inode"] = s.st_ino
 
     return data
 
 
-def write_manifest(spec):
+def _map(fn: Callable[[T], R], items: Iterable[T], jobs: Optional[int] = None) -> List[R]:
+    """Applies a function to items in a thread pool, and returns the results in order. Hashing
+    and reading files release the GIL, so threads run concurrently."""
+    items = list(items)
+    if jobs is None:
+        jobs = spack.util.cpus.determine_number_of_jobs(parallel=True)
+    jobs = min(jobs, len(items))
+    if jobs < 2:
+        return [fn(item) for item in items]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(fn, items))
+
+
+def write_manifest(spec, jobs: Optional[int] = None):
+    """Writes the manifest of the files in the prefix of a spec, unless it exists already.
+    Files are hashed by ``jobs`` threads, which defaults to ``config:build_jobs``."""
     manifest_file = os.path.join(
         spec.prefix,
         spack.store.STORE.layout.metadata_dir,
@@ -59,12 +80,13 @@ def write_manifest(spec):
     if not os.path.exists(manifest_file):
         tty.debug("Writing manifest file: No manifest from binary")
 
-        manifest = {}
-        for root, dirs, files in os.walk(spec.prefix):
-            for entry in list(dirs + files):
-                path = os.path.join(root, entry)
-                manifest[path] = create_manifest_entry(path)
-        manifest[spec.prefix] = create_manifest_entry(spec.prefix)
+        paths = [
+            os.path.join(root, entry)
+            for root, dirs, files in os.walk(spec.prefix)
+            for entry in list(dirs + files)
+        ]
+        paths.append(spec.prefix)
+        manifest = dict(zip(paths, _map(create_manifest_entry, paths, jobs)))
 
         with open(manifest_file, "w") as f:
             sjson.dump(manifest, f)
@@ -72,7 +94,9 @@ def write_manifest(spec):
         fp.set_permissions_by_spec(manifest_file, spec)
 
 
-def check_entry(path, data):
+def check_entry(path, data, fast: bool = False):
+    """Checks a file against its manifest entry. In ``fast`` mode, regular files are not hashed
+    if their size, modification time and inode match the manifest."""
     res = VerificationResults()
 
     if not data:
@@ -100,7 +124,8 @@ def check_entry(path, data):
             res.add_error(path, "size")
         if s.st_mtime != data["time"]:
             res.add_error(path, "mtime")
-        if compute_hash(path) != data.get("hash"):
+        unchanged = path not in res.errors and s.st_ino == data.get("inode")
+        if not (fast and unchanged) and compute_hash(path) != data.get("hash"):
             res.add_error(path, "hash")
 
     return res
@@ -138,7 +163,9 @@ def check_file_manifest(filename):
     return results
 
 
-def check_spec_manifest(spec):
+def check_spec_manifest(spec, fast: bool = False, jobs: Optional[int] = None):
+    """Checks the files in the prefix of a spec against its manifest, using ``jobs`` threads,
+    which defaults to ``config:build_jobs``. See :func:`check_entry` for the ``fast`` mode."""
     prefix = spec.prefix
 
     results = VerificationResults()
@@ -157,6 +184,7 @@ def check_spec_manifest(spec):
         results.add_error(prefix, "manifest corrupted")
         return results
 
+    entries = []
     for root, dirs, files in os.walk(prefix):
         for entry in list(dirs + files):
             path = os.path.join(root, entry)
@@ -169,10 +197,12 @@ def check_spec_manifest(spec):
             if entry == spack_times_log:
                 continue
 
-            data = manifest.pop(path, {})
-            results += check_entry(path, data)
+            entries.append((path, manifest.pop(path, {})))
+
+    entries.append((prefix, manifest.pop(prefix, {})))
 
-    results += check_entry(prefix, manifest.pop(prefix, {}))
+    for result in _map(lambda x: check_entry(*x, fast=fast), entries, jobs):
+        results += result
 
     for path in manifest:
         results.add_error(path, "deleted")
@@ -0,0 +1,94 @@
+# Copyright 2013-2024 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+"""Measure time and memory of binary prefix replacement, as done when relocating binaries.
+
+Run with:
+
+    $ spack python share/spack/qa/benchmarks/binary_relocation.py --sizes 64 512
+
+For each size in MiB, a synthetic binary is written with random bytes, where install
+prefixes appear every few KiB, half of them as null-terminated C-strings. The prefixes are
+replaced reading the file at once (which is how files were relocated before), and reading
+it in chunks of a few sizes. The benchmark reports the time needed, and the peak memory
+allocated by Python while replacing prefixes.
+"""
+import argparse
+import hashlib
+import os
+import random
+import shutil
+import tempfile
+import time
+import tracemalloc
+from collections import OrderedDict
+
+import spack.util.crypto
+from spack.relocate_text import BinaryFilePrefixReplacer
+
+OLD_PREFIX = b"/home/spack/opt/spack/" + b"__spack_path_placeholder__/" * 4 + b"zlib-1.3-abcdef"
+NEW_PREFIX = b"/opt/software/linux-x86_64/zlib-1.3-abcdef"
+
+
+def write_binary(path: str, size: int, rng: random.Random, distance: int = 4096):
+    """Writes a file of the given size, with a prefix every ``distance`` bytes on average"""
+    block = 2**20
+    with open(path, "wb") as f:
+        written = 0
+        while written < size:
+            n = min(block, size - written)
+            data = bytearray(rng.getrandbits(8 * n).to_bytes(n, "little"))
+            position = rng.randrange(distance)
+            while position + len(OLD_PREFIX) + 1 < len(data):
+                data[position : position + len(OLD_PREFIX)] = OLD_PREFIX
+                if rng.random() < 0.5:
+                    data[position + len(OLD_PREFIX)] = 0
+                position += rng.randrange(len(OLD_PREFIX) + 2, 2 * distance)
+            f.write(data)
+            written += len(data)
+
+
+def relocate(path: str, chunk_size: int):
+    """Returns the time and peak memory allocated to replace prefixes in a file"""
+    replacer = BinaryFilePrefixReplacer(
+        OrderedDict([(OLD_PREFIX, NEW_PREFIX)]), chunk_size=chunk_size
+    )
+    tracemalloc.start()
+    start = time.perf_counter()
+    replacer.apply_to_filename(path)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[16, 128], help="sizes in MiB")
+    parser.add_argument(
+        "--chunk-sizes", type=int, nargs="+", default=[1, 4, 16], help="chunk sizes in MiB"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'file [MiB]':>10} {'chunk [MiB]':>12} {'time [s]':>9} {'peak [MiB]':>11}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            original = os.path.join(tmpdir, "original")
+            write_binary(original, size * 2**20, rng)
+            digests = set()
+            for chunk_size in [size] + [c for c in args.chunk_sizes if c < size]:
+                copy = os.path.join(tmpdir, f"copy-{chunk_size}")
+                shutil.copyfile(original, copy)
+                elapsed, peak = relocate(copy, chunk_size * 2**20)
+                digests.add(spack.util.crypto.checksum(hashlib.sha256, copy))
+                label = "all" if chunk_size == size else str(chunk_size)
+                print(f"{size:>10} {label:>12} {elapsed:>9.2f} {peak / 2**20:>11.1f}")
+                os.unlink(copy)
+            assert len(digests) == 1, "chunked replacement differs from replacing at once"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# Copyright 2013-2024 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+"""Compare the JSON and binary formats of buildcache indexes, as read by BinaryCacheIndex.
+
+Run with:
+
+    $ spack python share/spack/qa/benchmarks/buildcache_index.py --sizes 1000 10000
+
+For each size, a buildcache index is filled with synthetic concrete specs and written in
+both formats. The benchmark reports the size of each file, the time needed to look up a
+few specs by DAG hash right after reading the index (which is what ``spack install`` does
+for specs that are already concrete), and the time needed to get all the built specs
+(which is what the concretizer does when reusing specs from buildcaches).
+"""
+import argparse
+import io
+import random
+import statistics
+import tempfile
+import time
+
+import spack.binary_distribution as bindist
+import spack.binary_index
+import spack.deptypes as dt
+import spack.spec
+import spack.util.spack_json as sjson
+
+MIRROR_URL = "https://mirror.example.com"
+
+
+def synthetic_specs(size: int, rng: random.Random):
+    """Returns concrete specs, where most specs depend on a few of the first ones"""
+    num_roots = max(1, size // 10)
+    specs = []
+    for i in range(size):
+        spec = spack.spec.Spec(
+            f"pkg-{i % 2000}@={rng.randint(0, 9)}.{rng.randint(0, 9)}.{i} +shared ~debug "
+            f"build_system=generic %gcc@=12.3.0 arch=linux-ubuntu22.04-x86_64_v3"
+        )
+        if i >= num_roots:
+            for dependency in rng.sample(specs[:num_roots], min(4, num_roots)):
+                if dependency.name not in spec._dependencies:
+                    spec._add_dependency(dependency, depflag=dt.BUILD | dt.LINK, virtuals=())
+        specs.append(spec)
+
+    for spec in specs:
+        spec._mark_concrete()
+    return specs
+
+
+def write_indices(specs, root: str):
+    """Returns the content of index.json, and of the binary index, for the specs"""
+    db = bindist.BuildCacheDatabase(root)
+    with db.write_transaction():
+        for spec in specs:
+            db._add(spec)
+            db._mark(spec, "in_buildcache", True)
+
+    stream = io.StringIO()
+    db._write_to_file(stream)
+    index_json = stream.getvalue()
+
+    database = sjson.load(index_json)["database"]
+    binary = io.BytesIO()
+    spack.binary_index.write(
+        database["installs"],
+        binary,
+        database_version=database["version"],
+        index_hash=bindist.compute_hash(index_json),
+    )
+    return index_json, binary.getvalue()
+
+
+def read_index(cache_root: str, data, index_format: str):
+    """Returns a BinaryCacheIndex, after reading an index from its local cache"""
+    index = bindist.BinaryCacheIndex(cache_root)
+    index._init_local_index_cache()
+    cache_key = f"index.{'bin' if index_format == 'binary' else 'json'}"
+    index._index_file_cache.init_entry(cache_key)
+    with index._index_file_cache.write_transaction(cache_key, binary=index_format == "binary") as (
+        _,
+        new,
+    ):
+        new.write(data)
+
+    index._local_index_cache = {
+        MIRROR_URL: {"index_hash": "hash", "index_path": cache_key, "index_format": index_format}
+    }
+    return index
+
+
+def lookup(index, hashes):
+    index.regenerate_spec_cache()
+    for dag_hash in hashes:
+        assert index.find_by_hash(dag_hash)
+
+
+def all_specs(index, hashes):
+    index.regenerate_spec_cache()
+    assert len(index.get_all_built_specs()) == len(hashes)
+
+
+def measure(fn, cache_root, data, index_format, hashes, repeat):
+    timings = []
+    for _ in range(repeat):
+        index = read_index(cache_root, data, index_format)
+        start = time.perf_counter()
+        fn(index, hashes)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--lookups", type=int, default=10, help="specs looked up by hash")
+    parser.add_argument("--repeat", type=int, default=3, help="repetitions of each read")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(
+        f"{'specs':>7} {'json [MB]':>10} {'binary [MB]':>12} {'operation':>10} "
+        f"{'json [ms]':>10} {'binary [ms]':>12} {'speedup':>8}"
+    )
+    for size in args.sizes:
+        specs = synthetic_specs(size, rng)
+        hashes = [s.dag_hash() for s in specs]
+        with tempfile.TemporaryDirectory() as root:
+            index_json, index_bin = write_indices(specs, root)
+            sizes = f"{len(index_json) / 1e6:>10.2f} {len(index_bin) / 1e6:>12.2f}"
+            for label, fn, selected in (
+                ("lookup", lookup, rng.sample(hashes, min(args.lookups, size))),
+                ("all", all_specs, hashes),
+            ):
+                json_time = measure(fn, root, index_json, "json", selected, args.repeat)
+                binary_time = measure(fn, root, index_bin, "binary", selected, args.repeat)
+                print(
+                    f"{size:>7} {sizes} {label:>10} {json_time * 1000:>10.1f} "
+                    f"{binary_time * 1000:>12.1f} {json_time / binary_time:>7.1f}x"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# Copyright 2013-2024 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+"""Measure the latency of database queries as a function of the number of records.
+
+Run with:
+
+    $ spack python share/spack/qa/benchmarks/database_query.py --sizes 1000 10000
+
+Each database is filled with synthetic concrete specs, and every query is timed both with
+the indexes used by ``Database._query``, and with a linear scan over all the records.
+"""
+import argparse
+import datetime
+import random
+import statistics
+import tempfile
+import time
+
+import spack.database
+import spack.repo
+import spack.spec
+
+QUERIES = {
+    "name": lambda db, name: db.query_local(name),
+    "name@version": lambda db, name: db.query_local(f"{name}@:1.5"),
+    "virtual": lambda db, name: db.query_local("mpi"),
+    "explicit": lambda db, name: db.query_local(name, explicit=True),
+    "start_date": lambda db, name: db.query_local(
+        start_date=datetime.datetime.now() - datetime.timedelta(minutes=1)
+    ),
+}
+
+
+def synthetic_spec(name: str, version: str) -> spack.spec.Spec:
+    spec = spack.spec.Spec(f"{name}@={version} arch=linux-ubuntu22.04-x86_64")
+    spec._mark_concrete()
+    return spec
+
+
+def populate(db: spack.database.Database, size: int, names, rng: random.Random) -> None:
+    with db.write_transaction():
+        for i in range(size):
+            version = f"{rng.randint(0, 2)}.{rng.randint(0, 9)}.{i}"
+            explicit = rng.random() < 0.2
+            # Make older records, so that date queries select only a fraction of them
+            installation_time = time.time() - (30 * 86400 if rng.random() < 0.9 else 0)
+            db._add(
+                synthetic_spec(rng.choice(names), version),
+                explicit=explicit,
+                installation_time=installation_time,
+            )
+
+
+def measure(db, query, name, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        query(db, name)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--packages", type=int, default=500, help="number of distinct names")
+    parser.add_argument("--repeat", type=int, default=5, help="repetitions of each query")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    providers = sorted(set(x.name for x in spack.repo.PATH.providers_for("mpi")))
+    names = providers + sorted(spack.repo.PATH.all_package_names())[: args.packages]
+
+    print(f"{'records':>8} {'query':>14} {'indexed [ms]':>13} {'scan [ms]':>10} {'speedup':>8}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as root:
+            db = spack.database.Database(root)
+            populate(db, size, names, rng)
+            name = rng.choice(names)
+            for label, query in QUERIES.items():
+                indexed = measure(db, query, name, args.repeat)
+                # Disabling the indexes makes queries scan all the records
+                db._query_index.candidates = lambda **kwargs: None
+                scan = measure(db, query, name, args.repeat)
+                del db._query_index.candidates
+                print(
+                    f"{size:>8} {label:>14} {indexed * 1000:>13.2f} {scan * 1000:>10.2f} "
+                    f"{scan / indexed:>7.1f}x"
+                )
+
+
+if __name__ == "__main__":
+    main()
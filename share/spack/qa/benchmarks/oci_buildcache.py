@@ -0,0 +1,235 @@
+# Copyright 2013-2024 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+"""Measure push and pull throughput, and request counts, for OCI build caches.
+
+Run with:
+
+    $ spack python share/spack/qa/benchmarks/oci_buildcache.py --packages 10 100 --jobs 1 8
+
+No network is needed: a registry is served over HTTPS on localhost, with a self-signed
+certificate created by ``openssl`` and trusted through ``config:ssl_certs``. With ``--auth``,
+the registry requires bearer tokens, which are handed out by the same server. Requests go
+through the default opener of ``spack.oci.opener``, with its TLS and persistent connections.
+
+For each number of packages, synthetic packages with tarballs of random bytes are transferred
+in three phases, using as many threads as jobs:
+
+- check: the manifest of each package is looked up, like ``spack buildcache push`` does to
+  skip packages that are in the build cache already
+- push: the tarball, config and manifest of each package are uploaded
+- pull: the manifest, config and tarball of each package are downloaded and verified, like
+  ``spack install`` does for binary packages
+
+Tarballs are not created nor extracted, so only transfers are measured. The registry runs in
+the same process, so it competes with the client for the GIL; use ``--latency`` to simulate
+the round trip time to a remote registry, which is where concurrent transfers pay off. The
+registry keeps blobs in memory, so the number of packages times their size should fit in
+memory.
+"""
+import argparse
+import collections
+import concurrent.futures
+import contextlib
+import hashlib
+import io
+import json
+import os
+import random
+import tempfile
+import time
+from typing import Dict, List, NamedTuple
+from urllib.request import Request
+
+import spack.cmd.buildcache
+import spack.config
+import spack.oci.oci
+import spack.oci.opener
+import spack.util.web
+from spack.oci.image import Digest, ImageReference, default_config, default_manifest
+from spack.test.oci.mock_registry import (
+    DummyServer,
+    InMemoryOCIRegistry,
+    InMemoryOCIRegistryWithAuth,
+    LocalhostHTTPSServer,
+    TrivialAuthServer,
+    create_self_signed_certificate,
+)
+
+
+class Package(NamedTuple):
+    tag: str
+    tarball: str
+    digest: Digest
+    size: int
+
+
+def synthetic_packages(count: int, size: int, root: str, rng: random.Random) -> List[Package]:
+    """Writes tarballs of random bytes, whose sizes are uniform in [size / 2, 3 * size / 2]"""
+    packages = []
+    for i in range(count):
+        n = rng.randint(size // 2, 3 * size // 2)
+        data = rng.getrandbits(8 * n).to_bytes(n, "little")
+        tarball = os.path.join(root, f"pkg-{i}.tar.gz")
+        with open(tarball, "wb") as f:
+            f.write(data)
+        digest = Digest.from_sha256(hashlib.sha256(data).hexdigest())
+        packages.append(Package(f"pkg-{i}-1.0-{digest.digest[:32]}.spack", tarball, digest, n))
+    return packages
+
+
+def check(image: ImageReference, package: Package, root: str) -> None:
+    assert spack.cmd.buildcache._get_spack_binary_blob(image.with_tag(package.tag)) is None
+
+
+def push(image: ImageReference, package: Package, root: str) -> None:
+    ref = image.with_tag(package.tag)
+    spack.oci.oci.upload_blob_with_retry(ref, file=package.tarball, digest=package.digest)
+
+    config = default_config("amd64", "linux")
+    config["rootfs"]["diff_ids"].append(str(package.digest))
+    config_file = os.path.join(root, f"{package.tag}.config.json")
+    with open(config_file, "w") as f:
+        json.dump(config, f, separators=(",", ":"))
+    with open(config_file, "rb") as f:
+        config_digest = Digest.from_sha256(hashlib.sha256(f.read()).hexdigest())
+    spack.oci.oci.upload_blob_with_retry(ref, file=config_file, digest=config_digest)
+
+    manifest = default_manifest()
+    manifest["config"] = {
+        "mediaType": "application/vnd.oci.image.config.v1+json",
+        "digest": str(config_digest),
+        "size": os.path.getsize(config_file),
+    }
+    manifest["layers"].append(
+        {
+            "mediaType": "application/vnd.oci.image.layer.v1.tar+gzip",
+            "digest": str(package.digest),
+            "size": package.size,
+        }
+    )
+    spack.oci.oci.upload_manifest_with_retry(ref, manifest=manifest)
+
+
+def pull(image: ImageReference, package: Package, root: str) -> None:
+    ref = image.with_tag(package.tag)
+    response = spack.oci.opener.urlopen(
+        Request(
+            url=ref.manifest_url(),
+            headers={"Accept": ", ".join(spack.oci.oci.manifest_content_type)},
+        )
+    )
+    manifest = json.load(response)
+    for blob in (manifest["config"], manifest["layers"][-1]):
+        digest = Digest.from_string(blob["digest"])
+        hasher = hashlib.sha256()
+        response = spack.oci.opener.urlopen(ref.blob_url(digest))
+        with open(os.path.join(root, f"{digest.digest}.pulled"), "wb") as f:
+            for chunk in iter(lambda: response.read(2**20), b""):
+                hasher.update(chunk)
+                f.write(chunk)
+        assert hasher.hexdigest() == digest.digest
+
+
+def add_latency(server: DummyServer, seconds: float) -> None:
+    """Delays the response to each request"""
+
+    def delay(req):
+        time.sleep(seconds)
+        return req
+
+    server.router.add_middleware(delay)
+
+
+def run_phase(fn, image, packages, root, jobs) -> float:
+    start = time.perf_counter()
+    # Do not print a message for each uploaded blob
+    with contextlib.redirect_stdout(io.StringIO()):
+        with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+            for _ in executor.map(lambda package: fn(image, package, root), packages):
+                pass
+    return time.perf_counter() - start
+
+
+def count_requests(servers, num_packages: int) -> str:
+    counts: Dict[str, int] = collections.Counter(
+        method for server in servers for method, _ in server.requests
+    )
+    for server in servers:
+        server.clear_log()
+    return " ".join(f"{method} {counts[method] / num_packages:.1f}" for method in sorted(counts))
+
+
+def benchmark(args, cert: str, key: str, packages: List[Package], jobs: int, root: str):
+    total_mb = sum(p.size for p in packages) / 2**20
+
+    with LocalhostHTTPSServer(cert, key) as server:
+        if args.auth:
+            registry: InMemoryOCIRegistry = InMemoryOCIRegistryWithAuth(
+                server.domain,
+                token="token",
+                realm=f"https://{server.domain}/login",
+                allow_single_post=False,
+            )
+            servers = [registry, TrivialAuthServer(server.domain, token="token")]
+            server.add_server(servers[1], prefix="/login")
+        else:
+            registry = InMemoryOCIRegistry(server.domain, allow_single_post=False)
+            servers = [registry]
+        server.add_server(registry)
+        for s in servers:
+            add_latency(s, args.latency / 1000)
+
+        # A new opener for each run, so that logins are counted too
+        spack.util.web.connection_pool.clear()
+        spack.oci.opener.urlopen = spack.oci.opener.create_opener().open
+
+        image = ImageReference.from_string(f"{server.domain}/buildcache")
+        for phase, fn in (("check", check), ("push", push), ("pull", pull)):
+            elapsed = run_phase(fn, image, packages, root, jobs)
+            throughput = f"{total_mb / elapsed:>8.1f}" if phase != "check" else f"{'-':>8}"
+            print(
+                f"{len(packages):>8} {jobs:>5} {phase:>6} {elapsed:>9.3f} {throughput} "
+                f"  {count_requests(servers, len(packages))}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--packages", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--jobs", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--size", type=int, default=1024, help="mean tarball size in KiB")
+    parser.add_argument(
+        "--chunk-size", type=int, default=0, help="chunk size of uploads in KiB, 0 to disable"
+    )
+    parser.add_argument("--auth", action="store_true", help="require bearer tokens")
+    parser.add_argument(
+        "--latency", type=float, default=0, help="delay of each response in milliseconds"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(
+        f"{'packages':>8} {'jobs':>5} {'phase':>6} {'time [s]':>9} {'MiB/s':>8}   "
+        "requests/package"
+    )
+    with tempfile.TemporaryDirectory() as root:
+        cert, key = create_self_signed_certificate(root)
+        with spack.config.override("config:ssl_certs", cert), spack.config.override(
+            "config:oci_upload_chunk_size", args.chunk_size * 1024
+        ):
+            for count in args.packages:
+                packages = synthetic_packages(count, args.size * 1024, root, rng)
+                for jobs in args.jobs:
+                    with spack.config.override("config:oci_transfer_jobs", jobs):
+                        benchmark(args, cert, key, packages, jobs, root)
+                for package in packages:
+                    os.unlink(package.tarball)
+
+
+if __name__ == "__main__":
+    main()